@@ -0,0 +1,360 @@
+"""
+Stand-ins for the Azure services, used by benchmark_pipeline.py.
+
+- FakeVideoIndexerServer: local HTTP server speaking the Video Indexer endpoints the
+  audit uses (upload, search, Index polling, media download), replaying a recorded
+  Index JSON once a configurable processing delay has passed
+- FakeChatModel: chat model with a configurable latency and answer length that flags
+  the known harmful sample sentences it finds in the audited content
+- HashEmbeddings: deterministic feature-hashing embeddings (no network)
+- build_rule_store: LocalVectorStore filled with synthetic rule chunks
+
+install_fakes() wires them into the process: the shared clients are pre-registered
+in the client registry, so getLLMClient/getEmbedding/getVectorStore hand out the fakes.
+"""
+
+import re
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from backend.src.config.settings import settings, client_registry
+from backend.src.graph.prompt import SCREENING_INSTRUCTIONS
+from backend.src.services import video_indexer
+from backend.src.services.local_vector_store import LocalVectorStore
+
+MEDIA_CHUNK_SIZE = 64 * 1024
+
+
+def _timestamp(seconds: float) -> str:
+    """Video Indexer's h:mm:ss.ff format."""
+    minutes, secs = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours}:{minutes:02d}:{secs:05.2f}"
+
+
+def synthesize_index_json(samples: List[Dict[str, Any]], repeat: int = 1) -> Dict[str, Any]:
+    """
+    Processed Index JSON built from labelled samples ({"text", "label"}): every
+    sample becomes a transcript line (`repeat` passes), every fourth one an OCR line too.
+    """
+    transcript, ocr = [], []
+    position = 0.0
+    for _ in range(repeat):
+        for i, sample in enumerate(samples):
+            start, end = position, position + 4.5
+            instance = {"start": _timestamp(start), "end": _timestamp(end)}
+            transcript.append({"id": len(transcript) + 1, "text": sample["text"], "confidence": 0.92,
+                               "speakerId": 1 + i % 2, "language": "en-US", "instances": [instance]})
+            if i % 4 == 0:
+                ocr.append({"id": len(ocr) + 1, "text": sample["text"][:60], "confidence": 0.8,
+                            "language": "en-US", "instances": [instance]})
+            position = end
+    labels = [{"id": 1, "name": "person", "instances": [{"confidence": 0.9, "start": _timestamp(0), "end": _timestamp(position)}]}]
+
+    return {
+        "state": "Processed",
+        "durationInSeconds": int(position),
+        "videos": [{
+            "state": "Processed",
+            "sourceLanguage": "en-US",
+            "insights": {"transcript": transcript, "ocr": ocr, "labels": labels}
+        }]
+    }
+
+
+class _VideoIndexerHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "FakeVideoIndexerServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send(self, status: int, body: bytes = b"", content_type: str = "application/json") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload: Any, status: int = 200) -> None:
+        self._send(status, json.dumps(payload).encode("utf-8"))
+
+    def _drain_body(self) -> int:
+        """Reads (and drops) the request body, chunked uploads included. Returns its size."""
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            total = 0
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    # Trailer section ends with an empty line
+                    while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    return total
+                self.rfile.read(size + 2)
+                total += size
+
+        remaining = int(self.headers.get("Content-Length") or 0)
+        total = remaining
+        while remaining > 0:
+            remaining -= len(self.rfile.read(min(remaining, MEDIA_CHUNK_SIZE)))
+        return total
+
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0]
+        if path.startswith("/media/"):
+            self._send(200, self.server.media, "video/mp4")
+        elif path.endswith("/Videos/Search"):
+            self._send_json({"results": [], "nextPage": {"done": True, "pageSize": 100, "skip": 0}})
+        elif path.endswith("/Index"):
+            video_id = path.rstrip("/").split("/")[-2]
+            self._send_index(video_id)
+        else:
+            self._send_json({"ErrorType": "NOT_FOUND"}, 404)
+
+    def do_POST(self) -> None:
+        size = self._drain_body()
+        if not self.path.split("?", 1)[0].endswith("/Videos"):
+            self._send_json({"ErrorType": "NOT_FOUND"}, 404)
+            return
+        video_id = uuid.uuid4().hex[:10]
+        self.server.register_upload(video_id, size)
+        self._send_json({"id": video_id, "state": "Uploaded"})
+
+    def do_DELETE(self) -> None:
+        self._send(204)
+
+    def _send_index(self, video_id: str) -> None:
+        uploaded_at = self.server.uploads.get(video_id)
+        if uploaded_at is None:
+            self._send_json({"ErrorType": "VIDEO_NOT_FOUND"}, 404)
+            return
+        self.server.count_poll()
+        elapsed = time.monotonic() - uploaded_at
+        if elapsed < self.server.processing_seconds:
+            progress = int(100 * elapsed / self.server.processing_seconds)
+            self._send_json({"state": "Processing", "videos": [{"state": "Processing", "processingProgress": f"{progress}%"}]})
+        else:
+            self._send(200, self.server.index_body)
+
+
+class FakeVideoIndexerServer(ThreadingHTTPServer):
+    """
+    Video Indexer API on localhost: uploads are accepted (bodies are read and
+    dropped), Index reports "Processing" for `processing_seconds` after the
+    upload and then returns the recorded Index JSON.
+    """
+
+    daemon_threads = True
+    # The audits keep pooled connections open, one handler thread each
+    request_queue_size = 512
+
+    def __init__(self, index_json: Dict[str, Any], processing_seconds: float, media_bytes: int, port: int = 0):
+        super().__init__(("127.0.0.1", port), _VideoIndexerHandler)
+        index_json = dict(index_json, state="Processed")
+        # Serialized once, every poll of a processed video returns the same bytes
+        self.index_body = json.dumps(index_json).encode("utf-8")
+        self.processing_seconds = processing_seconds
+        self.media = b"\0" * media_bytes
+        self.uploads: Dict[str, float] = {}
+        self.uploaded_bytes = 0
+        self.polls = 0
+        self._stats_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def register_upload(self, video_id: str, size: int) -> None:
+        with self._stats_lock:
+            self.uploads[video_id] = time.monotonic()
+            self.uploaded_bytes += size
+
+    def count_poll(self) -> None:
+        with self._stats_lock:
+            self.polls += 1
+
+    def start(self) -> "FakeVideoIndexerServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-video-indexer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class FakeTokenManager:
+    """Video Indexer token manager that never calls ARM."""
+
+    def get_arm_token(self) -> str:
+        return "benchmark-arm-token"
+
+    def get_vi_token(self) -> str:
+        return "benchmark-vi-token"
+
+    async def aget_vi_token(self) -> str:
+        return self.get_vi_token()
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Auditor model stand-in answering in the plain-JSON AuditResult format
+    (AUDIT_OUTPUT_MODE=text). Waits `latency_seconds` before answering, pads the
+    report to about `output_tokens` tokens, and reports one HIGH issue per
+    `flag_phrases` entry found in the user message.
+    """
+
+    latency_seconds: float = 1.0
+    output_tokens: int = 200
+    flag_phrases: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark-fake-chat"
+
+    def _answer(self, messages: List[BaseMessage]) -> str:
+        content = str(messages[-1].content) if messages else ""
+        if messages and SCREENING_INSTRUCTIONS in str(messages[0].content):
+            return self._screening_answer(content)
+        issues = [{
+            "category": "Hate Speech",
+            "description": "Benchmark sample labelled as harmful",
+            "severity": "HIGH",
+            "time_stamp": None,
+            "flagged_text": phrase,
+            "legal_reference": "BNS 196"
+        } for phrase in self.flag_phrases if phrase in content]
+
+        # ~1 token per word, minus what the JSON around it costs
+        filler = max(self.output_tokens - 40 * (len(issues) + 1), 0)
+        return json.dumps({
+            "compliance_results": issues,
+            "status": "FAIL" if issues else "PASS",
+            "final_report": " ".join(["reviewed"] * filler)
+        })
+
+    def _screening_answer(self, content: str) -> str:
+        """Tiered routing: high risk for the segments holding a flagged phrase."""
+        scores = [{"id": int(match.group(1)),
+                   "risk": 0.9 if any(phrase in match.group(2) for phrase in self.flag_phrases) else 0.05}
+                  for match in re.finditer(r"^\[(\d+)\] (.*)$", content, re.MULTILINE)]
+        return json.dumps({"scores": scores})
+
+    def _usage(self, messages: List[BaseMessage], answer: str) -> Dict[str, int]:
+        input_tokens = sum(len(str(message.content)) for message in messages) // 4
+        output_tokens = len(answer) // 4
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        answer = self._answer(messages)
+        message = AIMessage(content=answer, usage_metadata=self._usage(messages, answer))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _chunks(self, messages: List[BaseMessage]) -> Iterator[ChatGenerationChunk]:
+        answer = self._answer(messages)
+        pieces = [answer[i:i + 64] for i in range(0, len(answer), 64)]
+        for i, piece in enumerate(pieces):
+            usage = self._usage(messages, answer) if i == len(pieces) - 1 else None
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece, usage_metadata=usage))
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency_seconds)
+        return self._result(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency_seconds)
+        return self._result(messages)
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency_seconds)
+        yield from self._chunks(messages)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency_seconds)
+        for chunk in self._chunks(messages):
+            yield chunk
+
+
+class HashEmbeddings(Embeddings):
+    """Feature-hashed bag of words: deterministic, similar texts get similar vectors."""
+
+    def __init__(self, dimensions: int = 256, latency_seconds: float = 0.0):
+        self.dimensions = dimensions
+        self.latency_seconds = latency_seconds
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            bucket = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=4).digest(), "little")
+            vector[bucket % self.dimensions] += 1.0
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+RULE_LAWS = ["BNS 196", "BNS 197", "BNS 299", "BNS 353", "SC/ST Act 3(1)(r)", "IT Rules 3(1)(b)"]
+RULE_TARGETS = ["religious groups", "castes", "linguistic groups", "regional communities", "women", "tribes"]
+RULE_ACTS = ["promotes enmity", "incites violence", "insults the beliefs", "spreads false claims", "calls for a boycott", "demeans"]
+
+
+def build_rule_store(embedding: Embeddings, index_dir: str, chunks: int) -> LocalVectorStore:
+    """Local rule index with `chunks` synthetic legal guideline chunks."""
+    texts, metadatas = [], []
+    for i in range(chunks):
+        law = RULE_LAWS[i % len(RULE_LAWS)]
+        target = RULE_TARGETS[(i // len(RULE_LAWS)) % len(RULE_TARGETS)]
+        act = RULE_ACTS[(i // 7) % len(RULE_ACTS)]
+        texts.append(f"[{law}] Guideline {i}: content that {act} against {target}, whether spoken, "
+                     f"shown on screen or written in the description, is a violation under {law}.")
+        metadatas.append({"source": "benchmark-rules", "page": i // 20, "id": f"rule-{i}"})
+    return LocalVectorStore.from_texts(texts, embedding, metadatas, index_dir=index_dir, keys=[m["id"] for m in metadatas])
+
+
+def install_fakes(server: FakeVideoIndexerServer, chat_model: FakeChatModel, embedding: Embeddings,
+                  vector_store: LocalVectorStore) -> None:
+    """
+    Points the process at the fakes: Video Indexer calls go to `server` (YouTube
+    resolution returns its media URL) and both chat deployments answer with `chat_model`.
+    """
+    client_registry.clear()
+    for deployment in filter(None, [settings.AZURE_OPEN_AI_CHAT_DEPLOYMENT, settings.AZURE_OPEN_AI_SCREENING_DEPLOYMENT]):
+        client_registry.get(f"llm:{deployment}", lambda: chat_model)
+    if not settings.AZURE_OPEN_AI_CHAT_DEPLOYMENT:
+        client_registry.get("llm:", lambda: chat_model)
+    client_registry.get("embedding", lambda: embedding)
+    client_registry.get("vector_store", lambda: vector_store)
+
+    settings.AZURE_VI_API_URL = server.base_url
+    video_indexer._token_manager = FakeTokenManager()
+
+    def resolve_source(self, url: str) -> Dict[str, Any]:
+        youtube_id = url.rstrip("/").rsplit("/", 1)[-1]
+        return {
+            "media_url": f"{server.base_url}/media/{youtube_id}.mp4",
+            "http_headers": {},
+            "ext": "mp4",
+            "title": f"Benchmark video {youtube_id}",
+            "description": "Recorded benchmark fixture",
+            "tags": ["benchmark"],
+        }
+
+    video_indexer.VideoIndexerService.resolve_source = resolve_source
@@ -0,0 +1,343 @@
+"""
+Offline load benchmark of the whole audit pipeline.
+
+Runs audits end to end with Azure stubbed out (see benchmark_fakes.py): a local
+Video Indexer server replaying a recorded Index JSON after a processing delay,
+a chat model with a fixed latency and answer length, hash embeddings and a
+local rule index. Everything else (ingest, polling, extraction, pre-filter,
+retrieval, prompt building, parsing, checkpoints) is the production code.
+
+Targets:
+- graph:       compliance graph with invoke(), one thread per in-flight audit
+- graph-async: the same graph with ainvoke() on one event loop
+- api:         POST /audit on the FastAPI app (in process, through the ASGI transport)
+
+Reports throughput, p50/p95/p99 latency and memory per in-flight audit as JSON.
+With --baseline, exits with status 1 when a metric regressed by more than
+--max-regression against that earlier report, so CI can gate on it.
+
+Runs with AUDIT_OUTPUT_MODE=text, CACHE_BACKEND=none and a throwaway sqlite
+checkpoint unless those are set in the environment.
+
+Usage (from the repository root):
+    python -m backend.scripts.benchmark_pipeline [--target graph|graph-async|api] [--audits 50] [--concurrency 10]
+        [--llm-latency 1.0] [--vi-processing-seconds 2.0] [--output report.json] [--baseline baseline.json]
+"""
+
+import os
+import gc
+import sys
+import json
+import math
+import time
+import uuid
+import shutil
+import asyncio
+import argparse
+import logging
+import resource
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Step 0 - Benchmark defaults, applied before the settings are imported
+_work_dir = tempfile.mkdtemp(prefix="speechguard-benchmark-")
+for _name, _value in {
+    "AUDIT_OUTPUT_MODE": "text",
+    "CACHE_BACKEND": "none",
+    "EMBEDDING_CACHE_ENABLED": "false",
+    "TELEMETRY_EXPORTER": "none",
+    "CHECKPOINT_SQLITE_PATH": os.path.join(_work_dir, "checkpoints.db"),
+    "VI_POLL_MIN_INTERVAL_SECONDS": "0.5",
+    "VI_POLL_MAX_INTERVAL_SECONDS": "2",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+from backend.src.config.settings import settings
+from backend.src.api.jobs import build_initial_state
+from backend.src.graph.workflow import create_graph
+from backend.src.graph.checkpointer import get_checkpointer, get_async_checkpointer, close_async_checkpointer, build_run_config
+from backend.scripts.benchmark_fakes import (FakeChatModel, FakeVideoIndexerServer, HashEmbeddings,
+                                             build_rule_store, install_fakes, synthesize_index_json)
+
+# .env (loaded by the settings) may turn LangSmith tracing on, which would leave the machine
+os.environ["LANGCHAIN_TRACING_V2"] = "false"
+os.environ["LANGSMITH_TRACING"] = "false"
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(name="Pipeline Benchmark")
+
+# (metric path, True when higher is better)
+REGRESSION_METRICS = [
+    ("throughput_per_second", True),
+    ("latency_seconds.p50", False),
+    ("latency_seconds.p95", False),
+    ("latency_seconds.p99", False),
+    ("memory.per_in_flight_mb", False),
+]
+
+
+class RssSampler:
+    """Samples the resident set size in a background thread and keeps the peak."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.baseline = self.peak = self.current()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    @staticmethod
+    def current() -> int:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            # No procfs (macOS): the lifetime peak is the best available
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self.current())
+
+    def __enter__(self) -> "RssSampler":
+        gc.collect()
+        self.baseline = self.peak = self.current()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+
+def _percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(math.ceil(q * len(sorted_values)) - 1, 0)]
+
+
+def _video_urls(prefix: str, count: int) -> List[str]:
+    # Distinct 11 character YouTube IDs, so no audit reuses another's upload
+    return [f"https://youtu.be/{prefix}{i:06d}" for i in range(count)]
+
+
+def _graph_failed(final_state: Dict[str, Any]) -> bool:
+    return bool(final_state.get("errors")) or not final_state.get("final_report_status")
+
+
+def _run_graph(urls: List[str], warmup_urls: List[str], concurrency: int) -> Tuple[List[Tuple[float, bool]], RssSampler, float]:
+    graph = create_graph(checkpointer=get_checkpointer())
+
+    def audit(url: str) -> Tuple[float, bool]:
+        session_id = str(uuid.uuid4())
+        started_at = time.perf_counter()
+        try:
+            failed = _graph_failed(graph.invoke(build_initial_state(url, session_id), build_run_config(session_id)))
+        except Exception as e:
+            logger.error(f"Audit of {url} failed: {e}")
+            failed = True
+        return time.perf_counter() - started_at, not failed
+
+    for url in warmup_urls:
+        audit(url)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool, RssSampler() as memory:
+        started_at = time.perf_counter()
+        results = list(pool.map(audit, urls))
+        wall_seconds = time.perf_counter() - started_at
+    return results, memory, wall_seconds
+
+
+async def _run_concurrently(audit: Callable, urls: List[str], warmup_urls: List[str],
+                            concurrency: int) -> Tuple[List[Tuple[float, bool]], RssSampler, float]:
+    for url in warmup_urls:
+        await audit(url)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(url: str) -> Tuple[float, bool]:
+        async with semaphore:
+            return await audit(url)
+
+    with RssSampler() as memory:
+        started_at = time.perf_counter()
+        results = await asyncio.gather(*(limited(url) for url in urls))
+        wall_seconds = time.perf_counter() - started_at
+    return list(results), memory, wall_seconds
+
+
+async def _run_graph_async(urls: List[str], warmup_urls: List[str], concurrency: int):
+    graph = create_graph(checkpointer=await get_async_checkpointer())
+
+    async def audit(url: str) -> Tuple[float, bool]:
+        session_id = str(uuid.uuid4())
+        started_at = time.perf_counter()
+        try:
+            final_state = await graph.ainvoke(build_initial_state(url, session_id), build_run_config(session_id))
+            failed = _graph_failed(final_state)
+        except Exception as e:
+            logger.error(f"Audit of {url} failed: {e}")
+            failed = True
+        return time.perf_counter() - started_at, not failed
+
+    try:
+        return await _run_concurrently(audit, urls, warmup_urls, concurrency)
+    finally:
+        await close_async_checkpointer()
+
+
+async def _run_api(urls: List[str], warmup_urls: List[str], concurrency: int):
+    import httpx
+    # Imported here: the server module builds its graphs and job manager on import
+    from backend.src.api.server import api
+
+    async with api.router.lifespan_context(api), \
+            httpx.AsyncClient(transport=httpx.ASGITransport(app=api), base_url="http://benchmark", timeout=None) as client:
+
+        async def audit(url: str) -> Tuple[float, bool]:
+            started_at = time.perf_counter()
+            response = await client.post("/audit", json={"video_url": url})
+            ok = response.status_code == 200 and not response.json().get("errors")
+            if response.status_code != 200:
+                logger.error(f"Audit of {url} failed: {response.status_code} {response.text[:200]}")
+            return time.perf_counter() - started_at, ok
+
+        return await _run_concurrently(audit, urls, warmup_urls, concurrency)
+
+
+def run_benchmark(target: str, audits: int, concurrency: int, warmup: int, llm_latency: float, output_tokens: int,
+                  vi_processing_seconds: float, media_bytes: int, samples_path: str, index_json_path: Optional[str],
+                  transcript_repeat: int, rule_chunks: int) -> dict:
+    # Step 1 - Recorded Index JSON, or one synthesized from the labelled samples
+    with open(samples_path, "r", encoding="utf-8") as f:
+        samples = [json.loads(line) for line in f if line.strip()]
+    if index_json_path:
+        with open(index_json_path, "r", encoding="utf-8") as f:
+            index_json = json.load(f)
+    else:
+        index_json = synthesize_index_json(samples, transcript_repeat)
+
+    # Step 2 - Start the fakes and point the clients at them
+    server = FakeVideoIndexerServer(index_json, vi_processing_seconds, media_bytes).start()
+    embedding = HashEmbeddings()
+    chat_model = FakeChatModel(latency_seconds=llm_latency, output_tokens=output_tokens,
+                               flag_phrases=[sample["text"] for sample in samples if sample["label"] == 1])
+    install_fakes(server, chat_model, embedding, build_rule_store(embedding, os.path.join(_work_dir, "rules"), rule_chunks))
+
+    # Step 3 - Warm up, then run the measured audits
+    urls, warmup_urls = _video_urls("bench", audits), _video_urls("warmu", warmup)
+    try:
+        if target == "graph":
+            results, memory, wall_seconds = _run_graph(urls, warmup_urls, concurrency)
+        elif target == "graph-async":
+            results, memory, wall_seconds = asyncio.run(_run_graph_async(urls, warmup_urls, concurrency))
+        elif target == "api":
+            results, memory, wall_seconds = asyncio.run(_run_api(urls, warmup_urls, concurrency))
+        else:
+            raise Exception(f"Unknown target: {target}")
+    finally:
+        server.stop()
+
+    # Step 4 - Summarize
+    latencies = sorted(seconds for seconds, _ in results)
+    in_flight = min(concurrency, audits)
+    return {
+        "target": target,
+        "audits": audits,
+        "concurrency": concurrency,
+        "failed": sum(1 for _, ok in results if not ok),
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_per_second": round(audits / wall_seconds, 3),
+        "latency_seconds": {
+            "mean": round(sum(latencies) / len(latencies), 3),
+            "p50": round(_percentile(latencies, 0.50), 3),
+            "p95": round(_percentile(latencies, 0.95), 3),
+            "p99": round(_percentile(latencies, 0.99), 3),
+            "max": round(latencies[-1], 3),
+        },
+        "memory": {
+            "baseline_mb": round(memory.baseline / 1e6, 1),
+            "peak_mb": round(memory.peak / 1e6, 1),
+            "per_in_flight_mb": round((memory.peak - memory.baseline) / 1e6 / in_flight, 3),
+        },
+        "video_indexer": {
+            "polls_per_audit": round(server.polls / (audits + len(warmup_urls)), 2),
+            "uploaded_mb": round(server.uploaded_bytes / 1e6, 1),
+        },
+        "fakes": {
+            "llm_latency_seconds": llm_latency,
+            "llm_output_tokens": output_tokens,
+            "vi_processing_seconds": vi_processing_seconds,
+            "media_bytes": media_bytes,
+            "transcript_lines": sum(len(v.get("insights", {}).get("transcript", [])) for v in index_json.get("videos", [])),
+            "rule_chunks": rule_chunks,
+        },
+    }
+
+
+def _metric(report: dict, path: str) -> Optional[float]:
+    value: Any = report
+    for key in path.split("."):
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def find_regressions(report: dict, baseline: dict, max_regression: float) -> List[str]:
+    """Metrics that got worse than `baseline` by more than the `max_regression` fraction."""
+    regressions = []
+    if report["failed"] > baseline.get("failed", 0):
+        regressions.append(f"failed audits: {baseline.get('failed', 0)} -> {report['failed']}")
+
+    for path, higher_is_better in REGRESSION_METRICS:
+        current, previous = _metric(report, path), _metric(baseline, path)
+        if current is None or not previous:
+            continue
+        change = (previous - current) / previous if higher_is_better else (current - previous) / previous
+        if change > max_regression:
+            regressions.append(f"{path}: {previous} -> {current} ({change:.0%} worse)")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load benchmark of the audit pipeline against stubbed Azure services")
+    parser.add_argument("--target", choices=["graph", "graph-async", "api"], default="graph-async")
+    parser.add_argument("--audits", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured audits run first, one at a time")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Seconds per fake LLM call")
+    parser.add_argument("--output-tokens", type=int, default=200, help="Approximate tokens per fake LLM answer")
+    parser.add_argument("--vi-processing-seconds", type=float, default=2.0, help="Fake Video Indexer processing time")
+    parser.add_argument("--media-bytes", type=int, default=1_000_000, help="Size of the fake video streamed to Video Indexer")
+    parser.add_argument("--samples", default=os.path.join(settings.DATA_FOLDER_PATH, "prefilter_samples.jsonl"))
+    parser.add_argument("--index-json", help="Recorded Video Indexer Index JSON to replay (default: synthesized from --samples)")
+    parser.add_argument("--transcript-repeat", type=int, default=4, help="Passes over the samples in the synthesized transcript")
+    parser.add_argument("--rule-chunks", type=int, default=500)
+    parser.add_argument("--output", help="Also write the report to this file")
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed fraction a metric may get worse by")
+    args = parser.parse_args()
+
+    try:
+        report = run_benchmark(args.target, args.audits, args.concurrency, args.warmup, args.llm_latency, args.output_tokens,
+                               args.vi_processing_seconds, args.media_bytes, args.samples, args.index_json,
+                               args.transcript_repeat, args.rule_chunks)
+    finally:
+        shutil.rmtree(_work_dir, ignore_errors=True)
+
+    logger.info(f"{report['audits']} audits at concurrency {report['concurrency']} ({report['target']}): "
+                f"{report['throughput_per_second']} audits/s, p95 {report['latency_seconds']['p95']}s, "
+                f"{report['memory']['per_in_flight_mb']} MB per in-flight audit, {report['failed']} failed")
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = find_regressions(report, json.load(f), args.max_regression)
+        for regression in regressions:
+            logger.error(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
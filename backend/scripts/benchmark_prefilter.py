@@ -0,0 +1,71 @@
+"""
+Benchmark for the lexicon pre-filter.
+
+Replays a labelled sample set (JSONL: {"text": ..., "label": 0|1}) through the
+pre-filter and reports how many LLM calls it would avoid and how many harmful
+samples it would miss.
+
+Usage (from the repository root):
+    python -m backend.scripts.benchmark_prefilter [--samples PATH] [--threshold 0.3]
+"""
+
+import os
+import json
+import time
+import argparse
+import logging
+
+from backend.src.config.settings import settings
+from backend.src.services.prefilter import LexiconPrefilter
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(name="Prefilter Benchmark")
+
+
+def run_benchmark(samples_path: str, lexicon_path: str, threshold: float) -> dict:
+    # Step 1 - Load the labelled samples
+    with open(samples_path, "r", encoding="utf-8") as f:
+        samples = [json.loads(line) for line in f if line.strip()]
+    if not samples:
+        raise Exception(f"No samples found in {samples_path}")
+
+    # Step 2 - Build the pre-filter (includes compiling the lexicon)
+    started_at = time.perf_counter()
+    prefilter = LexiconPrefilter.from_file(lexicon_path, threshold)
+    build_ms = (time.perf_counter() - started_at) * 1000
+
+    # Step 3 - Screen every sample
+    started_at = time.perf_counter()
+    results = [(sample, prefilter.screen(sample["text"])) for sample in samples]
+    screen_seconds = time.perf_counter() - started_at
+
+    # Step 4 - Compare with the labels
+    positives = [result for sample, result in results if sample["label"] == 1]
+    negatives = [result for sample, result in results if sample["label"] == 0]
+    escalated = sum(1 for _, result in results if result.flagged)
+    missed = [sample["text"] for sample, result in results if sample["label"] == 1 and not result.flagged]
+
+    return {
+        "samples": len(samples),
+        "llm_calls_without_prefilter": len(samples),
+        "llm_calls_with_prefilter": escalated,
+        "llm_call_reduction": 1 - escalated / len(samples),
+        "recall": (len(positives) - len(missed)) / len(positives) if positives else None,
+        "false_positive_rate": sum(r.flagged for r in negatives) / len(negatives) if negatives else None,
+        "missed_samples": missed,
+        "lexicon_build_ms": round(build_ms, 2),
+        "screening_us_per_sample": round(screen_seconds / len(samples) * 1e6, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the LLM-call reduction of the lexicon pre-filter")
+    parser.add_argument("--samples", default=os.path.join(settings.DATA_FOLDER_PATH, "prefilter_samples.jsonl"))
+    parser.add_argument("--lexicon", default=settings.PREFILTER_LEXICON_PATH)
+    parser.add_argument("--threshold", type=float, default=settings.PREFILTER_THRESHOLD)
+    args = parser.parse_args()
+
+    report = run_benchmark(args.samples, args.lexicon, args.threshold)
+    logger.info(f"LLM calls: {report['llm_calls_without_prefilter']} -> {report['llm_calls_with_prefilter']} "
+                f"({report['llm_call_reduction']:.0%} reduction), recall {report['recall']:.0%}")
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,38 @@
+"""
+Video Indexer cleanup.
+
+Deletes the Video Indexer entries uploaded by the audit service (tagged with a
+YouTube externalId) that are older than VI_CLEANUP_AFTER_DAYS. Entries within
+VI_REUSE_MAX_AGE_DAYS are what repeat audits reuse, so keep the cleanup age above it.
+
+Usage (from the repository root):
+    python -m backend.scripts.cleanup_video_indexer [--older-than-days N] [--dry-run]
+"""
+
+import argparse
+import logging
+
+from backend.src.config.settings import settings
+from backend.src.services.video_indexer import VideoIndexerService
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(name="Video Indexer Cleanup")
+
+
+def cleanup(older_than_days: int, dry_run: bool) -> None:
+    if older_than_days < settings.VI_REUSE_MAX_AGE_DAYS:
+        logger.warning(f"Deleting entries younger than VI_REUSE_MAX_AGE_DAYS ({settings.VI_REUSE_MAX_AGE_DAYS}), "
+                       "repeat audits of those videos will index them again")
+
+    deleted = VideoIndexerService().cleanup_videos(older_than_days, dry_run=dry_run)
+    for video_id in deleted:
+        logger.info(f" -> {video_id}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete old Video Indexer uploads of the audit service")
+    parser.add_argument("--older-than-days", type=int, default=settings.VI_CLEANUP_AFTER_DAYS)
+    parser.add_argument("--dry-run", action="store_true", help="Only list what would be deleted")
+    args = parser.parse_args()
+
+    cleanup(args.older_than_days, args.dry_run)
@@ -1,8 +1,27 @@
+"""
+Knowledge base indexer.
+
+Incrementally syncs the PDFs in DATA_FOLDER_PATH with the configured vector
+store (Azure AI Search, or the local NumPy index when VECTOR_STORE_BACKEND=local):
+only new or changed chunks are embedded, chunks of changed or deleted files are
+removed from the index. State is kept in a manifest of content hashes.
+
+Usage (from the repository root):
+    python -m backend.scripts.index_document
+"""
+
 import os
 import glob
+import json
+import hashlib
 import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List
 
-from src.config.settings import settings, getEmbedding, getVectorStore
+from backend.src.config.settings import settings, getEmbedding, getVectorStore
+from backend.src.graph.chunking import count_tokens
+from backend.src.services.embedding_cache import get_embedding_cache
+from backend.src.services.rate_limiter import call_with_retry, get_limiter, llm_endpoint
 
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
@@ -10,19 +29,111 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 logging.basicConfig(level=logging.INFO,format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(name="Azure Document Indexer")
 
+_text_splitter = None
+
+
+def _get_text_splitter() -> RecursiveCharacterTextSplitter:
+    """One splitter per (worker) process instead of one per file."""
+    global _text_splitter
+    if _text_splitter is None:
+        _text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=3000,           # ~750 words, ~512 tokens
+            chunk_overlap=300,         # 10% overlap
+            length_function=len,       # Measures by characters
+            separators=[
+                "\n## ",               # Major sections (Markdown headers) - SINGLE backslash
+                "\n### ",              # Subsections - SINGLE backslash
+                "\n#### ",             # Sub-subsections - SINGLE backslash
+                "\n\n",                # Paragraph breaks - SINGLE backslash
+                "\n",                  # Line breaks - SINGLE backslash
+                ". ",                  # Sentences
+                " ",                   # Words
+                ""                     # Characters (fallback)
+            ],
+            keep_separator=True,       # Keeps headers with content
+            is_separator_regex=False   # Literal string matching
+        )
+    return _text_splitter
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(source: str, content: str) -> str:
+    """Content addressed chunk key (hex, valid as an Azure Search document key)."""
+    return hashlib.sha256(f"{source}\x00{content}".encode("utf-8")).hexdigest()
+
+
+def load_and_split(pdf_path: str) -> List[Dict]:
+    """Runs in a worker process: parses one PDF and returns its chunks as plain dicts."""
+    loader = PyPDFLoader(file_path=pdf_path)
+    chunks = _get_text_splitter().split_documents(loader.load())
+
+    source = os.path.basename(pdf_path)
+    results = []
+    for chunk in chunks:
+        # Add the source for citation
+        metadata = {**chunk.metadata, "source": source}
+        results.append({"id": chunk_id(source, chunk.page_content), "content": chunk.page_content, "metadata": metadata})
+    return results
+
+
+def load_manifest(path: str) -> Dict:
+    if not os.path.exists(path):
+        return {"files": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(path: str, manifest: Dict) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def embed_batch(embeddings, texts: List[str]) -> List[List[float]]:
+    """Embeds one batch within the embedding deployment's quota, retried while Azure throttles (services/rate_limiter)."""
+    endpoint = llm_endpoint(settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT)
+    tokens = sum(count_tokens(text) for text in texts) if get_limiter(endpoint).limits_tokens else 0
+    return call_with_retry(endpoint, lambda: embeddings.embed_documents(texts), tokens)
+
+
+def embed_chunks(embeddings, chunks: List[Dict]) -> List[List[float]]:
+    """Embeds chunks in EMBED_BATCH_SIZE batches, EMBED_CONCURRENCY batches at a time."""
+    batch_size = settings.EMBED_BATCH_SIZE
+    batches = [chunks[i:i + batch_size] for i in range(0, len(chunks), batch_size)]
+
+    with ThreadPoolExecutor(max_workers=settings.EMBED_CONCURRENCY) as executor:
+        results = executor.map(lambda batch: embed_batch(embeddings, [c["content"] for c in batch]), batches)
+        return [vector for batch_vectors in results for vector in batch_vectors]
+
+
+def persist_store(vector_store) -> None:
+    """The local index lives in memory until written out, Azure Search is updated in place."""
+    if hasattr(vector_store, "persist"):
+        vector_store.persist()
+        logger.info(f"Local vector index written to {settings.LOCAL_VECTOR_INDEX_DIR}")
+
+
 def index_docs():
     """
     Read PDFs,
     Chunk Documents,
-    Upload Document Azure
+    Upload Document Azure (only what changed since the last run)
     """
 
     # Step 1 - Find the data folder path
     data_folder = settings.DATA_FOLDER_PATH
     if not data_folder:
         raise Exception("Data Folder Not Found - give the correct path")
-        return
-    
+
     # Step 2 - Initialize the Embedding Model
     try:
         logger.info("Intializing Embedding Model")
@@ -31,81 +142,94 @@ def index_docs():
     except Exception as e:
         logger.error(f"Failed to Initialize the embedding due to {e}")
         return
-    
-    # Step 3 - Initialize the Azure Search
+
+    # Step 3 - Initialize the Vector Store
     try:
-        logger.info("Intializing Azure Search")
+        logger.info(f"Intializing Vector Store ({settings.VECTOR_STORE_BACKEND})")
         vector_store = getVectorStore(embeddings)
-        logger.info("Intialized Azure Search")
+        logger.info("Intialized Vector Store")
     except Exception as e:
-        logger.error(f"Failed to Initialize the Azure Search due to {e}")
+        logger.error(f"Failed to Initialize the Vector Store due to {e}")
         return
 
-    # Step 4 - Find the PDF files in data folder
+    # Step 4 - Find the PDF files in data folder and compare with the manifest
     get_all_pdfs = os.path.join(data_folder, "*.pdf")
     pdf_files = glob.glob(pathname=get_all_pdfs)
-    if not pdf_files:
-        logger.warn(f"File Not Found in {data_folder}")
-        return 
-    
-    # Variable which will contain all the splits (chunks)
-    all_splits = []
-
-    # Step 5 - Load Each PDF using PyPDF Loader
-    for pdfs in pdf_files:
-        try: 
-            loader = PyPDFLoader(file_path=pdfs)
-            raw_docs = loader.load()
-
-            # Step 6 - Chunk and Split Each of the loaded split
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=3000,           # ~750 words, ~512 tokens
-                chunk_overlap=300,         # 10% overlap
-                length_function=len,       # Measures by characters
-                separators=[
-                    "\n## ",               # Major sections (Markdown headers) - SINGLE backslash
-                    "\n### ",              # Subsections - SINGLE backslash
-                    "\n#### ",             # Sub-subsections - SINGLE backslash
-                    "\n\n",                # Paragraph breaks - SINGLE backslash
-                    "\n",                  # Line breaks - SINGLE backslash
-                    ". ",                  # Sentences
-                    " ",                   # Words
-                    ""                     # Characters (fallback)
-                ],
-                keep_separator=True,       # Keeps headers with content
-                is_separator_regex=False   # Literal string matching
-            )
-
-            chunks = text_splitter.split_documents(raw_docs)
-
-            # Step 7 - Add the source for citation
-            for chunk in chunks:
-                chunk.metadata["source"] = os.path.basename(pdfs)
-
-            all_splits.extend(chunks)
-            logger.info(f" -> Split into {len(chunks)} chunks.")
-            
+    manifest = load_manifest(settings.INDEX_MANIFEST_PATH)
+    indexed_files = manifest["files"]
+
+    current_hashes = {os.path.basename(path): file_hash(path) for path in pdf_files}
+    changed_files = [path for path in pdf_files
+                     if indexed_files.get(os.path.basename(path), {}).get("sha256") != current_hashes[os.path.basename(path)]]
+    removed_files = [name for name in indexed_files if name not in current_hashes]
+
+    logger.info(f"{len(pdf_files)} PDFs found: {len(changed_files)} new/changed, {len(removed_files)} removed")
+
+    # Step 5 - Drop the chunks of deleted files
+    for name in removed_files:
+        stale_ids = list(indexed_files[name].get("chunks", []))
+        try:
+            if stale_ids:
+                vector_store.delete(ids=stale_ids)
+            del indexed_files[name]
+            logger.info(f" -> Removed {len(stale_ids)} chunks of deleted file {name}")
         except Exception as e:
-            logger.error(f"Failed to process {pdfs}: {e}")
+            logger.error(f"Failed to remove chunks of {name}: {e}")
 
-    # Step 8 - Upload to Azure
-    if all_splits:
-        logger.info(f"Uploading {len(all_splits)} chunks to Azure AI Search Index '{settings.AZURE_SEARCH_INDEX_NAME}'...")
+    if not changed_files:
+        persist_store(vector_store)
+        save_manifest(settings.INDEX_MANIFEST_PATH, manifest)
+        logger.info("Knowledge Base is up to date.")
+        return
+
+    # Step 6 - Parse and chunk the changed PDFs in a process pool
+    with ProcessPoolExecutor(max_workers=min(settings.INDEX_PARSE_WORKERS, len(changed_files))) as executor:
+        futures = {path: executor.submit(load_and_split, path) for path in changed_files}
+
+    total_added = 0
+    for path, future in futures.items():
+        name = os.path.basename(path)
         try:
-            # Azure Search accepts batches automatically via this method
-            vector_store.add_documents(documents=all_splits)
-            logger.info("Indexing Complete! The Knowledge Base is ready.")
-            logger.info(f"Total chunks indexed: {len(all_splits)}")
+            chunks = future.result()
         except Exception as e:
-            logger.error(f"Failed to upload documents to Azure Search: {e}")
-            logger.error("Please check your Azure Search configuration and try again.")
-    else:
-        logger.warning("No documents were processed.")
+            logger.error(f"Failed to process {path}: {e}")
+            continue
 
-if __name__ == "__main__":
-    index_docs()
+        # Step 7 - Diff against the chunks already in the index
+        previous_ids = set(indexed_files.get(name, {}).get("chunks", []))
+        unique_chunks = {chunk["id"]: chunk for chunk in chunks}
+        new_chunks = [chunk for chunk_key, chunk in unique_chunks.items() if chunk_key not in previous_ids]
+        stale_ids = [chunk_key for chunk_key in previous_ids if chunk_key not in unique_chunks]
+        logger.info(f" -> {name}: {len(unique_chunks)} chunks, {len(new_chunks)} to embed, {len(stale_ids)} to delete")
 
+        # Step 8 - Embed only the new chunks and upload them under their content keys
+        try:
+            if new_chunks:
+                vectors = embed_chunks(embeddings, new_chunks)
+                vector_store.add_embeddings(
+                    zip([chunk["content"] for chunk in new_chunks], vectors),
+                    metadatas=[chunk["metadata"] for chunk in new_chunks],
+                    keys=[chunk["id"] for chunk in new_chunks]
+                )
+            if stale_ids:
+                vector_store.delete(ids=stale_ids)
+        except Exception as e:
+            logger.error(f"Failed to upload {name} to the Vector Store: {e}")
+            logger.error("Please check your Vector Store configuration and try again.")
+            continue
+
+        indexed_files[name] = {"sha256": current_hashes[name], "chunks": sorted(unique_chunks)}
+        total_added += len(new_chunks)
 
-            
+    # Step 9 - Persist the local index (if any) and the manifest for the next incremental run
+    persist_store(vector_store)
+    save_manifest(settings.INDEX_MANIFEST_PATH, manifest)
+    logger.info("Indexing Complete! The Knowledge Base is ready.")
+    logger.info(f"Chunks embedded this run: {total_added}")
 
+    embedding_cache = get_embedding_cache()
+    if embedding_cache:
+        logger.info(f"Embedding cache: {embedding_cache.stats()}")
 
+if __name__ == "__main__":
+    index_docs()
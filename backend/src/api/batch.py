@@ -0,0 +1,116 @@
+import json
+import uuid
+import logging
+import itertools
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from backend.src.api.jobs import build_initial_state
+from backend.src.graph.checkpointer import build_run_config
+from backend.src.services.cache import normalize_video_id
+
+logger = logging.getLogger("audit-batch")
+
+
+def read_url_lines(lines: Iterable[str]) -> List[str]:
+    """
+    Accepts plain URL lines or JSONL lines with a "video_url" field; blanks and # comments are ignored.
+    A malformed JSON line is skipped with a warning, it doesn't abort the batch.
+    """
+    urls = []
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            try:
+                record = json.loads(line)
+                line = str(record.get("video_url") or "") if isinstance(record, dict) else ""
+            except json.JSONDecodeError as e:
+                logger.warning(f"Skipping malformed batch line {number}: {e}")
+                continue
+        if line:
+            urls.append(line)
+    return urls
+
+
+def dedupe_urls(urls: List[str]) -> Tuple[List[str], Dict[str, str]]:
+    """
+    De-duplicates by YouTube video ID (by raw URL for anything else).
+    Returns the URLs to audit and a {duplicate_url: audited_url} map.
+    """
+    unique: Dict[str, str] = {}
+    duplicates: Dict[str, str] = {}
+    for url in urls:
+        key = normalize_video_id(url) or url
+        if key in unique:
+            duplicates[url] = unique[key]
+        else:
+            unique[key] = url
+    return list(unique.values()), duplicates
+
+
+def _audit_one(graph, video_url: str) -> Dict[str, Any]:
+    session_id = str(uuid.uuid4())
+    # Batches and backfills queue behind interactive audits for the Azure quotas
+    initial_state = build_initial_state(video_url, session_id, priority="bulk")
+    final_state = graph.invoke(initial_state, build_run_config(session_id))
+
+    return {
+        "video_url": video_url,
+        "youtube_id": final_state.get("youtube_id") or normalize_video_id(video_url),
+        "session_id": session_id,
+        "video_id": final_state.get("video_id", initial_state["video_id"]),
+        "status": final_state.get("final_report_status", "UNKNOWN"),
+        "final_report": final_state.get("final_report", "No report generated."),
+        "compliance_results": final_state.get("compliance_results", []),
+        "errors": final_state.get("errors", []),
+        "token_usage": final_state.get("token_usage", []),
+        "routing": final_state.get("routing", [])
+    }
+
+
+def iter_batch_audits(graph, urls: List[str], max_parallel: int) -> Iterator[Dict[str, Any]]:
+    """
+    Audits many URLs, yielding one result record per input URL as soon as it's ready.
+    - duplicates (same video ID) are reported right away and audited once
+    - at most `max_parallel` graph runs are in flight; downloads, uploads and LLM
+      calls are further bounded process wide by their stage limits
+    - a failing item yields an ERROR record and never aborts the batch
+    """
+    to_audit, duplicates = dedupe_urls(urls)
+    logger.info(f"Batch of {len(urls)} URLs: {len(to_audit)} unique, {len(duplicates)} duplicates")
+
+    for duplicate_url, audited_url in duplicates.items():
+        yield {"video_url": duplicate_url, "status": "DUPLICATE", "duplicate_of": audited_url}
+
+    # Only `max_parallel` items are submitted at a time, so a closed generator (client gone)
+    # leaves nothing queued; the audits already running finish, the rest never start
+    pending_urls = iter(to_audit)
+    executor = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="batch-audit")
+    try:
+        futures = {}
+        for video_url in itertools.islice(pending_urls, max(max_parallel, 1)):
+            futures[executor.submit(_audit_one, graph, video_url)] = video_url
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                video_url = futures.pop(future)
+                next_url = next(pending_urls, None)
+                if next_url is not None:
+                    futures[executor.submit(_audit_one, graph, next_url)] = next_url
+                try:
+                    record = future.result()
+                except Exception as e:
+                    logger.error(f"Batch item {video_url} failed: {str(e)}")
+                    record = {"video_url": video_url, "status": "ERROR", "errors": [str(e)]}
+                yield record
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_batch_jsonl(graph, urls: List[str], max_parallel: int) -> Iterator[str]:
+    """JSONL view of iter_batch_audits, one line per finished audit."""
+    for record in iter_batch_audits(graph, urls, max_parallel):
+        yield json.dumps(record, default=str) + "\n"
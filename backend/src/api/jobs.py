@@ -0,0 +1,303 @@
+import time
+import uuid
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from backend.src.config.settings import settings
+from backend.src.graph.checkpointer import build_run_config, with_violation_stream
+
+logger = logging.getLogger("audit-jobs")
+
+
+class QueueFullError(Exception):
+    """Raised when the number of in-flight audits reaches AUDIT_QUEUE_DEPTH."""
+
+
+class ResumeError(Exception):
+    """Raised when an audit session can't be resumed (unknown session or no checkpointer)."""
+
+
+def build_initial_state(video_url: str, session_id: str, priority: str = "interactive") -> Dict[str, Any]:
+    """Graph input for a new audit session. `priority` ("interactive" or "bulk") is its rate limiter lane."""
+    return {
+        "video_url": video_url,
+        "video_id": f"Vid{session_id[:8]}",
+        "priority": priority,
+        "compliance_results": [],
+        "errors": []
+    }
+
+
+def resume_point(graph, session_id: str) -> Dict[str, Any]:
+    """
+    Graph config to resume a session's audit from, based on its checkpoints:
+    - an interrupted run (process died, node raised) continues at the pending nodes
+    - a finished run that indexed the video re-runs only the audit branches
+    - a finished run with an uploaded video re-runs indexing on the recorded Azure video
+    - anything else starts over
+    Resuming from an earlier checkpoint forks the session thread from there.
+    """
+    config = build_run_config(session_id)
+    if graph.checkpointer is None:
+        raise ResumeError("Checkpointing is disabled (CHECKPOINT_BACKEND=none)")
+
+    snapshot = graph.get_state(config)
+    if not snapshot.values:
+        raise ResumeError(f"No checkpoints for session {session_id}")
+    if snapshot.next:
+        return config
+
+    values = snapshot.values
+    if values.get("transcript"):
+        resume_before = "transcript_auditor"
+    elif values.get("azure_video_id"):
+        resume_before = "indexer"
+    else:
+        resume_before = "ingest"
+
+    for checkpoint in graph.get_state_history(config):
+        if resume_before in checkpoint.next:
+            return checkpoint.config
+    raise ResumeError(f"No checkpoint before {resume_before} for session {session_id}")
+
+
+class AuditJob:
+    """A single audit run tracked by the job manager."""
+
+    def __init__(self, video_url: str, session_id: Optional[str] = None, resume_config: Optional[Dict[str, Any]] = None,
+                 priority: str = "interactive"):
+        self.job_id = str(uuid.uuid4())
+        self.session_id = session_id or self.job_id
+        self.video_url = video_url
+        self.initial_state = build_initial_state(video_url, self.session_id, priority)
+        self.video_id = self.initial_state["video_id"]
+
+        # A resumed job continues from a checkpoint instead of starting from the initial state
+        self.run_input: Optional[Dict[str, Any]] = None if resume_config else self.initial_state
+        # Jobs consume the custom stream, so the auditors stream violations as they're parsed
+        self.run_config = with_violation_stream(resume_config or build_run_config(self.session_id))
+
+        self.status = "queued"  # queued -> running -> completed | failed
+        self.final_state: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.first_violation_at: Optional[float] = None
+
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def emit(self, event_type: str, **data: Any) -> None:
+        with self._lock:
+            self.events.append({"type": event_type, "timestamp": time.time(), **data})
+
+    def events_since(self, cursor: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self.events[cursor:]
+
+    @property
+    def time_to_first_violation(self) -> Optional[float]:
+        """Seconds from the start of the run until the first violation was streamed."""
+        if self.first_violation_at is None or self.started_at is None:
+            return None
+        return self.first_violation_at - self.started_at
+
+
+class AuditJobManager:
+    """
+    Runs the LangGraph workflow on a bounded worker pool.
+    - AUDIT_WORKER_CONCURRENCY audits execute at once
+    - up to AUDIT_QUEUE_DEPTH audits can be queued or running before submissions are rejected
+    - finished jobs are kept for AUDIT_JOB_TTL_SECONDS so clients can fetch the result
+    Once `use_async_graph` is called, audits run as tasks on the event loop instead
+    (AUDIT_ASYNC_CONCURRENCY at once), so audits waiting on Azure don't hold threads.
+    """
+
+    def __init__(self, graph, max_workers: int, max_queue_depth: int, job_ttl: int):
+        self.graph = graph
+        self.max_queue_depth = max_queue_depth
+        self.job_ttl = job_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="audit-worker")
+        self._jobs: Dict[str, AuditJob] = {}
+        self._lock = threading.Lock()
+        # Recent time-to-first-violation samples, in seconds
+        self._ttfv_samples: deque = deque(maxlen=1000)
+
+        # Event loop execution (see use_async_graph)
+        self.async_graph = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_slots: Optional[asyncio.Semaphore] = None
+        self._tasks: set = set()
+
+    def use_async_graph(self, graph, max_concurrency: int) -> None:
+        """
+        Runs new jobs with `graph.astream` on the calling (running) event loop.
+        The graph needs an async checkpointer on the same storage as `self.graph`,
+        which still answers resume lookups.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._async_slots = asyncio.Semaphore(max_concurrency)
+        self.async_graph = graph
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.done)
+
+    def submit(self, video_url: str, priority: str = "interactive") -> AuditJob:
+        return self._enqueue(AuditJob(video_url, priority=priority))
+
+    def resume(self, session_id: str) -> AuditJob:
+        """Queues a job that resumes the session's audit from its last usable checkpoint."""
+        resume_config = resume_point(self.graph, session_id)
+        video_url = self.graph.get_state(resume_config).values.get("video_url", "")
+        job = self._enqueue(AuditJob(video_url, session_id=session_id, resume_config=resume_config))
+        job.emit("resumed", session_id=session_id)
+        return job
+
+    def _enqueue(self, job: AuditJob) -> AuditJob:
+        with self._lock:
+            self._purge_expired()
+            in_flight = sum(1 for other in self._jobs.values() if not other.done)
+            if in_flight >= self.max_queue_depth:
+                raise QueueFullError(f"Audit queue is full ({in_flight} in flight)")
+            self._jobs[job.job_id] = job
+
+        job.emit("queued", video_url=job.video_url)
+        if self.async_graph is not None:
+            # Safe from any thread, e.g. a sync route running in the threadpool
+            self._loop.call_soon_threadsafe(self._start_task, job)
+        else:
+            self._executor.submit(self._run, job)
+        logger.info(f"Queued audit job {job.job_id} for {job.video_url} (session {job.session_id})")
+        return job
+
+    def get(self, job_id: str) -> Optional[AuditJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = sorted(self._ttfv_samples)
+            in_flight = sum(1 for job in self._jobs.values() if not job.done)
+
+        def percentile(p: float) -> Optional[float]:
+            return samples[min(len(samples) - 1, int(p * len(samples)))] if samples else None
+
+        return {
+            "execution": "async" if self.async_graph is not None else "threads",
+            "in_flight": in_flight,
+            "time_to_first_violation": {"count": len(samples), "p50": percentile(0.5), "p95": percentile(0.95)}
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for task in list(self._tasks):
+            task.cancel()
+
+    def _purge_expired(self) -> None:
+        cutoff = time.time() - self.job_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.done and job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _run(self, job: AuditJob) -> None:
+        self._start(job)
+        try:
+            final_state: Dict[str, Any] = dict(job.initial_state)
+            # "updates" drives progress events, "values" carries the full state after each step,
+            # "custom" carries the violations the auditors stream while the LLM is still writing
+            for mode, chunk in self.graph.stream(job.run_input, job.run_config, stream_mode=["updates", "values", "custom"]):
+                final_state = self._handle_chunk(job, mode, chunk, final_state)
+            self._complete(job, final_state)
+        except Exception as e:
+            self._fail(job, e)
+
+    def _start_task(self, job: AuditJob) -> None:
+        task = self._loop.create_task(self._arun(job))
+        # The loop only keeps weak references to tasks
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _arun(self, job: AuditJob) -> None:
+        async with self._async_slots:
+            self._start(job)
+            try:
+                final_state: Dict[str, Any] = dict(job.initial_state)
+                async for mode, chunk in self.async_graph.astream(job.run_input, job.run_config,
+                                                                  stream_mode=["updates", "values", "custom"]):
+                    final_state = self._handle_chunk(job, mode, chunk, final_state)
+                self._complete(job, final_state)
+            except Exception as e:
+                self._fail(job, e)
+
+    def _start(self, job: AuditJob) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        job.emit("running")
+
+    def _handle_chunk(self, job: AuditJob, mode: str, chunk: Any, final_state: Dict[str, Any]) -> Dict[str, Any]:
+        """Turns one stream chunk into job events; returns the latest full state."""
+        if mode == "values":
+            return chunk
+        if mode == "custom":
+            if isinstance(chunk, dict) and chunk.get("type") == "violation":
+                self._record_violation(job, chunk)
+            return final_state
+        for node_name, update in chunk.items():
+            job.emit("node_completed", node=node_name, fields=sorted((update or {}).keys()))
+        return final_state
+
+    def _complete(self, job: AuditJob, final_state: Dict[str, Any]) -> None:
+        job.final_state = final_state
+        job.finished_at = time.time()
+        job.status = "completed"
+        job.emit("completed", status=final_state.get("final_report_status", "UNKNOWN"),
+                 issues=len(final_state.get("compliance_results", [])),
+                 time_to_first_violation=job.time_to_first_violation)
+        logger.info(f"Audit job {job.job_id} complete")
+
+    def _fail(self, job: AuditJob, error: Exception) -> None:
+        logger.error(f"Audit job {job.job_id} failed: {str(error)}")
+        job.error = str(error)
+        job.finished_at = time.time()
+        job.status = "failed"
+        job.emit("failed", error=str(error))
+
+    def _record_violation(self, job: AuditJob, violation: Dict[str, Any]) -> None:
+        if job.first_violation_at is None:
+            job.first_violation_at = time.time()
+            with self._lock:
+                self._ttfv_samples.append(job.time_to_first_violation)
+            logger.info(f"Audit job {job.job_id} first violation after {job.time_to_first_violation:.2f}s")
+        job.emit("violation", branch=violation.get("branch"), window=violation.get("window"), issue=violation.get("issue"))
+
+
+_job_manager: Optional[AuditJobManager] = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager(graph) -> AuditJobManager:
+    """Process wide job manager sized from settings."""
+    global _job_manager
+    if _job_manager is None:
+        with _job_manager_lock:
+            if _job_manager is None:
+                _job_manager = AuditJobManager(
+                    graph,
+                    max_workers=settings.AUDIT_WORKER_CONCURRENCY,
+                    max_queue_depth=settings.AUDIT_QUEUE_DEPTH,
+                    job_ttl=settings.AUDIT_JOB_TTL_SECONDS
+                )
+    return _job_manager
@@ -1,26 +1,66 @@
+import hmac
 import uuid
+import json
+import asyncio
 import logging
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 from fastapi.middleware.cors import CORSMiddleware
 
 
-from backend.src.api.telemetry import setup_telemetry
-from backend.src.graph.workflow import app as compliance_graph
+from backend.src.api.telemetry import setup_telemetry, prometheus_metrics
+from backend.src.api.jobs import get_job_manager, build_initial_state, QueueFullError, ResumeError
+from backend.src.api.batch import iter_batch_jsonl
+from backend.src.graph.workflow import create_graph
+from backend.src.graph.checkpointer import get_checkpointer, get_async_checkpointer, close_async_checkpointer, build_run_config
+from backend.src.services.video_indexer import CallbackSecretFilter, notify_processing_complete
+from backend.src.services.embedding_cache import get_embedding_cache
+from backend.src.config.settings import settings, warmUpClients
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("Drishti - Hate Speech Analyzer")
+# Video Indexer's callback requests carry the callback secret in their query
+logging.getLogger("uvicorn.access").addFilter(CallbackSecretFilter())
 
 # Setting up telemetry
 setup_telemetry()
 
+# Compiled with the persistent checkpointer, so every audit session can be resumed
+compliance_graph = create_graph(checkpointer=get_checkpointer())
+
+# Background workers for the job based API
+job_manager = get_job_manager(compliance_graph)
+
+# Same graph for ainvoke/astream, its async checkpointer is bound to the server's event loop (see lifespan)
+async_compliance_graph = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global async_compliance_graph
+    async_compliance_graph = create_graph(checkpointer=await get_async_checkpointer())
+    if settings.AUDIT_EXECUTION == "async":
+        job_manager.use_async_graph(async_compliance_graph, settings.AUDIT_ASYNC_CONCURRENCY)
+
+    if settings.WARM_UP_CLIENTS:
+        try:
+            await asyncio.to_thread(warmUpClients)
+        except Exception as e:
+            # Clients are built lazily on the first audit instead
+            logger.error(f"Client warm-up failed: {str(e)}")
+    yield
+    job_manager.shutdown()
+    await close_async_checkpointer()
+
 # Creating FASTAPI Instance
 api = FastAPI(
     title="Drishti - Analyser",
     description="API for Drishti Hate Speech Analyzer",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 api.add_middleware(
@@ -34,6 +74,10 @@ api.add_middleware(
 # Data Model
 class AuditRequest(BaseModel):
     video_url : str
+    priority: Literal["interactive", "bulk"] = "interactive"  # Rate limiter lane, "bulk" for backfills
+
+class BatchAuditRequest(BaseModel):
+    video_urls: List[str]
 
 class ComplianceIssue(BaseModel):
     category: str
@@ -52,41 +96,68 @@ class AuditResponse(BaseModel):
     final_report: str
     compliance_results: List[ComplianceIssue]
     errors: List[str] = []  
+    token_usage: List[Dict[str, Any]] = []
+    routing: List[Dict[str, Any]] = []
+
+class AuditJobResponse(BaseModel):
+    job_id: str
+    session_id: str          # Checkpoint thread, used to resume the audit
+    video_url: str
+    status: str              # queued, running, completed, failed
+    progress: List[str] = []  # Graph nodes completed so far
+    result: Optional[AuditResponse] = None
+    error: Optional[str] = None
+    time_to_first_violation: Optional[float] = None  # Seconds, when violations were streamed
+
+
+def build_audit_response(session_id: str, video_id: str, final_state: Dict[str, Any]) -> AuditResponse:
+    return AuditResponse(
+        session_id=str(session_id),
+        video_id=final_state.get("video_id", video_id),
+        status=final_state.get("final_report_status", "UNKNOWN"),
+        final_report=final_state.get("final_report", "No report generated."),
+        compliance_results=final_state.get("compliance_results", []),
+        errors=final_state.get("errors", []),
+        token_usage=final_state.get("token_usage", []),
+        routing=final_state.get("routing", [])
+    )
+
+
+def build_job_response(job) -> AuditJobResponse:
+    return AuditJobResponse(
+        job_id=job.job_id,
+        session_id=job.session_id,
+        video_url=job.video_url,
+        status=job.status,
+        progress=[event["node"] for event in job.events_since(0) if event["type"] == "node_completed"],
+        result=build_audit_response(job.session_id, job.video_id, job.final_state) if job.final_state else None,
+        error=job.error,
+        time_to_first_violation=job.time_to_first_violation
+    )
+
 
 # Model Entry
 @api.post("/audit", response_model=AuditResponse)
-def audit_video(request: AuditRequest):
+async def audit_video(request: AuditRequest):
 
     video_url = request.video_url
 
     # Generate a session_id
     session_id = str(uuid.uuid4())
-    video_id = f"Vid{session_id[:8]}"
 
-    logger.info(f"Created a session {video_id} - video url {video_url}")
-    
     # Graph Input
-    initial_state = {
-        "video_url": video_url,  
-        "video_id": video_id,
-        "compliance_results": [],
-        "errors": []
-    }
+    initial_state = build_initial_state(video_url, session_id, request.priority)
+    video_id = initial_state["video_id"]
+
+    logger.info(f"Created a session {video_id} - video url {video_url}")
 
     try:
-        final_state = compliance_graph.invoke(initial_state)
+        # Runs on the event loop: waiting on Video Indexer and the LLM doesn't hold a worker thread
+        final_state = await async_compliance_graph.ainvoke(initial_state, build_run_config(session_id))
 
         logger.info(f"Graph execution complete for {video_id}")
 
-        return AuditResponse(
-                session_id=str(session_id),
-                video_id=final_state.get("video_id", video_id),
-                
-                status=final_state.get("final_report_status", "UNKNOWN"),
-                final_report=final_state.get("final_report", "No report generated."),
-                compliance_results=final_state.get("compliance_results", []),
-                errors=final_state.get("errors", [])
-            )
+        return build_audit_response(session_id, video_id, final_state)
         
     except Exception as e:
         logger.error(f"Audit Failed: {str(e)}")  
@@ -97,4 +168,117 @@ def audit_video(request: AuditRequest):
         )
 
 
+# Job based API
+@api.post("/audits", response_model=AuditJobResponse, status_code=202)
+def submit_audit(request: AuditRequest):
+    try:
+        job = job_manager.submit(request.video_url, request.priority)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+
+    return build_job_response(job)
+
+
+@api.post("/sessions/{session_id}/resume", response_model=AuditJobResponse, status_code=202)
+def resume_audit(session_id: str):
+    """
+    Resumes a failed or interrupted audit from its checkpoints as a new job.
+    Completed steps aren't repeated; an already uploaded video is reused.
+    """
+    try:
+        job = job_manager.resume(session_id)
+    except ResumeError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+
+    return build_job_response(job)
+
+
+@api.post("/audits/batch")
+def audit_batch(request: BatchAuditRequest):
+    """Audits many URLs and streams one JSON line per video as each audit finishes."""
+    if not request.video_urls:
+        raise HTTPException(status_code=422, detail="video_urls must not be empty")
+
+    return StreamingResponse(
+        iter_batch_jsonl(compliance_graph, request.video_urls, settings.BATCH_MAX_PARALLEL),
+        media_type="application/x-ndjson"
+    )
+
+
+@api.get("/audits/{job_id}", response_model=AuditJobResponse)
+def get_audit(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Audit job {job_id} not found")
+
+    return build_job_response(job)
+
+
+@api.get("/audits/{job_id}/events")
+async def stream_audit_events(job_id: str):
+    """
+    Server-Sent Events stream of job progress, closed once the job finishes.
+    With AUDIT_STREAMING, "violation" events arrive while the auditors are still running;
+    the final "completed" event carries the status.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Audit job {job_id} not found")
+
+    async def event_stream():
+        # Polls the job's event log on the event loop, so open streams don't hold worker threads
+        cursor = 0
+        idle_ticks = 0
+        while True:
+            events = job.events_since(cursor)
+            for event in events:
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            cursor += len(events)
+
+            if job.done and cursor >= len(job.events):
+                break
+
+            idle_ticks = 0 if events else idle_ticks + 1
+            if idle_ticks >= 75:
+                # Keep-alive comment so proxies don't drop an idle connection
+                yield ": ping\n\n"
+                idle_ticks = 0
+            await asyncio.sleep(0.2)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@api.get("/stats")
+def get_stats():
+    """Cache hit/miss counters and audit job metrics of this process."""
+    embedding_cache = get_embedding_cache()
+    return {
+        "embedding_cache": embedding_cache.stats() if embedding_cache else None,
+        "audit_jobs": job_manager.stats()
+    }
+
+
+@api.get("/metrics")
+def get_metrics():
+    """
+    Stage durations, token counts, upload sizes, Video Indexer polls and cache
+    lookups in the Prometheus text format (PROMETHEUS_METRICS_ENABLED).
+    """
+    if not settings.PROMETHEUS_METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Prometheus metrics are disabled")
+    body, content_type = prometheus_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+# Video Indexer completion callback (used when AZURE_VI_CALLBACK_URL is set)
+@api.post("/callbacks/video-indexer")
+def video_indexer_callback(id: str, state: str, request: Request):
+    secret = settings.AZURE_VI_CALLBACK_SECRET
+    if secret and not hmac.compare_digest(request.query_params.get("token", "").encode(), secret.encode()):
+        raise HTTPException(status_code=403, detail="Invalid callback token")
 
+    # The poller re-reads the Index, so an unknown video id is not an error
+    waiting = notify_processing_complete(id, state)
+    return {"video_id": id, "state": state, "waiting": waiting}
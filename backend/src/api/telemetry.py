@@ -1,6 +1,6 @@
-import os 
+import os
 import logging
-from azure.monitor.opentelemetry import configure_azure_monitor
+from typing import List, Tuple
 from opentelemetry.sdk.resources import Resource, SERVICE_NAME, SERVICE_VERSION
 from backend.src.config.settings import settings
 
@@ -9,34 +9,107 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(level
 logger = logging.getLogger(name="Azure Insights")
 
 
-def setup_telemetry():
-    """
-    Observability Framework setup with proper service identification.
-    """
-
-    insight_connection_string = settings.APPLICATION_INSIGHT_CONNECTION_STRING
-    if not insight_connection_string:
-        logger.error("Connection String Not Found!")
-        return 
-    
-    resource = Resource.create({
+def _resource() -> Resource:
+    return Resource.create({
         SERVICE_NAME: "Drishti-Compliance-Engine",
         SERVICE_VERSION: "1.0.0",
         "service.namespace": "hate-speech-detection",
         "service.instance.id": os.getenv("HOSTNAME", "local-instance"),
         "deployment.environment": os.getenv("ENVIRONMENT", "development")
     })
-    
+
+
+def _metric_readers() -> List:
+    """Prometheus reader behind GET /metrics (optional dependency: opentelemetry-exporter-prometheus)."""
+    if not settings.PROMETHEUS_METRICS_ENABLED:
+        return []
+    try:
+        from opentelemetry.exporter.prometheus import PrometheusMetricReader
+    except ImportError:
+        logger.error("opentelemetry-exporter-prometheus is not installed, /metrics is disabled")
+        return []
+    return [PrometheusMetricReader()]
+
+
+def _configure_azure_monitor(resource: Resource, metric_readers: List) -> bool:
+    insight_connection_string = settings.APPLICATION_INSIGHT_CONNECTION_STRING
+    if not insight_connection_string:
+        logger.error("Connection String Not Found!")
+        return False
+
     # Azure Insight Configuration
     try:
+        from azure.monitor.opentelemetry import configure_azure_monitor
+
         configure_azure_monitor(
             connection_string=insight_connection_string,
-            resource=resource, 
-            logger_name="Azure Insights"
+            resource=resource,
+            logger_name="Azure Insights",
+            metric_readers=metric_readers
         )
         logger.info("Azure Monitor Tracking Enabled & Connected!")
         logger.info(f"Service: Drishti-Compliance-Engine v1.0.0")
-    
+        return True
+
     except Exception as e:
         logger.error(f"Setting Azure Insight Failed: {str(e)}")
+        return False
+
+
+def _configure_sdk(resource: Resource, exporter: str, metric_readers: List) -> None:
+    """
+    Plain OpenTelemetry SDK providers for running without Azure Monitor:
+    "otlp" exports to the collector configured by the standard OTEL_EXPORTER_OTLP_* variables
+    (optional dependency: opentelemetry-exporter-otlp), "console" prints spans and metrics,
+    "none" only feeds /metrics.
+    """
+    from opentelemetry import metrics, trace
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import ConsoleMetricExporter, PeriodicExportingMetricReader
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+    tracer_provider = TracerProvider(resource=resource)
+    readers = list(metric_readers)
+
+    if exporter in ("otlp", "console"):
+        if exporter == "otlp":
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
+            span_exporter, metric_exporter = OTLPSpanExporter(), OTLPMetricExporter()
+        else:
+            span_exporter, metric_exporter = ConsoleSpanExporter(), ConsoleMetricExporter()
+        tracer_provider.add_span_processor(BatchSpanProcessor(span_exporter))
+        readers.append(PeriodicExportingMetricReader(metric_exporter,
+                                                     export_interval_millis=settings.TELEMETRY_METRICS_INTERVAL_MS))
+
+    trace.set_tracer_provider(tracer_provider)
+    metrics.set_meter_provider(MeterProvider(resource=resource, metric_readers=readers))
+    logger.info(f"OpenTelemetry enabled (exporter: {exporter}, prometheus: {bool(metric_readers)})")
+
+
+def setup_telemetry():
+    """
+    Observability Framework setup with proper service identification.
+    TELEMETRY_EXPORTER picks Azure Monitor (default), OTLP, console or none;
+    the Prometheus reader for /metrics is added in every mode.
+    """
+    resource = _resource()
+    metric_readers = _metric_readers()
+    exporter = settings.TELEMETRY_EXPORTER.lower()
+
+    if exporter == "azure" and _configure_azure_monitor(resource, metric_readers):
         return
+
+    try:
+        # Without Azure Monitor the spans and metrics still reach /metrics (and OTLP/console if chosen)
+        _configure_sdk(resource, "none" if exporter == "azure" else exporter, metric_readers)
+    except Exception as e:
+        logger.error(f"Setting OpenTelemetry Failed: {str(e)}")
+
+
+def prometheus_metrics() -> Tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, and its content type."""
+    from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+    return generate_latest(), CONTENT_TYPE_LATEST
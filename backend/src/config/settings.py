@@ -1,8 +1,14 @@
 import os
+import time
+import logging
+import threading
 from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+import httpx
 from dotenv import load_dotenv
 from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
 from langchain_community.vectorstores import AzureSearch
+from langchain_core.vectorstores import VectorStore
 
 load_dotenv(override=True)
 
@@ -16,6 +22,11 @@ class BaseSettings:
     AZURE_OPENAI_VERSION = os.getenv("AZURE_OPENAI_VERSION", "")
     AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY", "")
     AZURE_OPEN_AI_CHAT_DEPLOYMENT = os.getenv("AZURE_OPEN_AI_CHAT_DEPLOYMENT", "")
+    AZURE_OPEN_AI_SCREENING_DEPLOYMENT = os.getenv("AZURE_OPEN_AI_SCREENING_DEPLOYMENT", "")  # Smaller, cheaper model
+    AZURE_OPENAI_MAX_CONNECTIONS = int(os.getenv("AZURE_OPENAI_MAX_CONNECTIONS", "50"))
+    AZURE_OPENAI_MAX_KEEPALIVE = int(os.getenv("AZURE_OPENAI_MAX_KEEPALIVE", "20"))
+    AZURE_OPENAI_TIMEOUT_SECONDS = float(os.getenv("AZURE_OPENAI_TIMEOUT_SECONDS", "120"))
+    WARM_UP_CLIENTS = os.getenv("WARM_UP_CLIENTS", "true").lower() == "true"
 
     # Azure Embedding
     AZURE_OPENAI_EMBEDDING_DEPLOYMENT = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT", "")
@@ -29,14 +40,35 @@ class BaseSettings:
     AZURE_VI_NAME = os.getenv("AZURE_VI_NAME", "")
     AZURE_VI_LOCATION = os.getenv("AZURE_VI_LOCATION", "")
     AZURE_VI_ACCOUNT_ID = os.getenv("AZURE_VI_ACCOUNT_ID", "")
+    AZURE_VI_API_URL = os.getenv("AZURE_VI_API_URL", "https://api.videoindexer.ai")  # Overridden by the benchmark's fake server
     AZURE_SUBSCRIPTION_ID = os.getenv("AZURE_SUBSCRIPTION_ID", "")
     AZURE_RESOURCE_GROUP = os.getenv("AZURE_RESOURCE_GROUP", "")
+    VI_TOKEN_REFRESH_MARGIN_SECONDS = int(os.getenv("VI_TOKEN_REFRESH_MARGIN_SECONDS", "300"))
+    VI_HTTP_MAX_CONNECTIONS = int(os.getenv("VI_HTTP_MAX_CONNECTIONS", "20"))
+    VI_HTTP_MAX_KEEPALIVE = int(os.getenv("VI_HTTP_MAX_KEEPALIVE", "10"))
+    AZURE_VI_CALLBACK_URL = os.getenv("AZURE_VI_CALLBACK_URL", "")  # e.g. https://<host>/callbacks/video-indexer
+    AZURE_VI_CALLBACK_SECRET = os.getenv("AZURE_VI_CALLBACK_SECRET", "")
+    VI_POLL_MIN_INTERVAL_SECONDS = float(os.getenv("VI_POLL_MIN_INTERVAL_SECONDS", "5"))
+    VI_POLL_MAX_INTERVAL_SECONDS = float(os.getenv("VI_POLL_MAX_INTERVAL_SECONDS", "30"))
+    VI_PROCESSING_TIMEOUT_SECONDS = float(os.getenv("VI_PROCESSING_TIMEOUT_SECONDS", "3600"))
+    VI_UPLOAD_MODE = os.getenv("VI_UPLOAD_MODE", "stream")  # "url" (streams IP-locked YouTube media URLs), "stream" or "file"
+    VIDEO_TEMP_DIR = os.getenv("VIDEO_TEMP_DIR", "")  # Defaults to the system temp directory
+    VI_REUSE_INDEXED = os.getenv("VI_REUSE_INDEXED", "true").lower() == "true"  # Look up uploads by YouTube ID first
+    VI_REUSE_MAX_AGE_DAYS = int(os.getenv("VI_REUSE_MAX_AGE_DAYS", "30"))  # Older entries are indexed again
+    VI_RETENTION_DAYS = int(os.getenv("VI_RETENTION_DAYS", "0"))  # Video Indexer deletes uploads after this (0 = keep)
+    VI_CLEANUP_AFTER_DAYS = int(os.getenv("VI_CLEANUP_AFTER_DAYS", "90"))  # Used by backend/scripts/cleanup_video_indexer.py
+    # Insight types kept from the index; the transcript is always kept
+    VI_INSIGHT_TYPES = [t.strip() for t in os.getenv("VI_INSIGHT_TYPES", "ocr,labels,namedLocations,audioEffects").split(",") if t.strip()]
+    VI_OCR_MIN_CONFIDENCE = float(os.getenv("VI_OCR_MIN_CONFIDENCE", "0.5"))  # Lower confidence OCR lines are dropped
 
     # Azure Monitoring
     APPLICATION_INSIGHT_CONNECTION_STRING = os.getenv("APPLICATION_INSIGHT_CONNECTION_STRING", "")
     ENVIRONMENT="development"
     SERVICE_NAME="Drishti-Compliance-Engine"
     SERVICE_VERSION="1.0.0"
+    TELEMETRY_EXPORTER = os.getenv("TELEMETRY_EXPORTER", "azure")  # "azure", "otlp" (OTEL_EXPORTER_OTLP_* env), "console" or "none"
+    TELEMETRY_METRICS_INTERVAL_MS = int(os.getenv("TELEMETRY_METRICS_INTERVAL_MS", "60000"))  # otlp / console metric export
+    PROMETHEUS_METRICS_ENABLED = os.getenv("PROMETHEUS_METRICS_ENABLED", "true").lower() == "true"  # Serves GET /metrics
 
     # Langsmith Tracking
     LANGCHAIN_TRACING_V2 = os.getenv("LANGCHAIN_TRACING_V2", "false")
@@ -49,30 +81,205 @@ class BaseSettings:
     BACKEND_PATH = Path(__file__).parent.parent.parent
     DATA_FOLDER_PATH = os.path.join(BACKEND_PATH, "data")
 
-def getLLMClient() -> AzureChatOpenAI:
-    llm = AzureChatOpenAI(
-        azure_deployment=BaseSettings.AZURE_OPEN_AI_CHAT_DEPLOYMENT,
-        api_version=BaseSettings.AZURE_OPENAI_VERSION,
-        # temperature=0.0
+    # Vector Store
+    VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "azure")  # "azure" or "local"
+    LOCAL_VECTOR_INDEX_DIR = os.getenv("LOCAL_VECTOR_INDEX_DIR", os.path.join(BACKEND_PATH, ".cache", "vector_index"))
+
+    # Knowledge Base Indexing (one manifest per backend, each index is synced independently)
+    INDEX_MANIFEST_PATH = os.getenv("INDEX_MANIFEST_PATH", os.path.join(BACKEND_PATH, ".cache", f"index_manifest_{VECTOR_STORE_BACKEND}.json"))
+    INDEX_PARSE_WORKERS = int(os.getenv("INDEX_PARSE_WORKERS", str(os.cpu_count() or 2)))
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+    EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+
+    # Embedding Cache
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(BACKEND_PATH, ".cache", "embeddings.db"))
+
+    # Audit Cache
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")  # "sqlite", "redis" or "none"
+    CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "86400"))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+    CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", os.path.join(BACKEND_PATH, ".cache", "audit_cache.db"))
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+    # Graph Checkpointing (resumable audits)
+    CHECKPOINT_BACKEND = os.getenv("CHECKPOINT_BACKEND", "sqlite")  # "sqlite", "postgres" or "none"
+    CHECKPOINT_SQLITE_PATH = os.getenv("CHECKPOINT_SQLITE_PATH", os.path.join(BACKEND_PATH, ".cache", "checkpoints.db"))
+    CHECKPOINT_POSTGRES_URL = os.getenv("CHECKPOINT_POSTGRES_URL", "")  # Needs the "postgres" extra (psycopg 3)
+
+    # Transcript Audit
+    AUDIT_MODE = os.getenv("AUDIT_MODE", "map_reduce")  # "single" or "map_reduce"
+    AUDIT_WINDOW_TOKENS = int(os.getenv("AUDIT_WINDOW_TOKENS", "3000"))
+    AUDIT_MAX_PARALLEL = int(os.getenv("AUDIT_MAX_PARALLEL", "4"))
+
+    # Rule Retrieval (multi-query)
+    RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "5"))
+    RETRIEVAL_QUERY_TOKENS = int(os.getenv("RETRIEVAL_QUERY_TOKENS", "200"))
+    RETRIEVAL_MAX_QUERIES = int(os.getenv("RETRIEVAL_MAX_QUERIES", "32"))
+    RETRIEVAL_TOKEN_BUDGET = int(os.getenv("RETRIEVAL_TOKEN_BUDGET", "3000"))
+
+    # Audit Output Parsing
+    AUDIT_OUTPUT_MODE = os.getenv("AUDIT_OUTPUT_MODE", "function_calling")  # "function_calling", "json_schema", "json_mode" or "text"
+    AUDIT_REPAIR_RETRIES = int(os.getenv("AUDIT_REPAIR_RETRIES", "1"))
+
+    # Streaming audits: violations are pushed to job event streams as the model writes them
+    AUDIT_STREAMING = os.getenv("AUDIT_STREAMING", "true").lower() == "true"
+
+    # Prompt Budget
+    PROMPT_MAX_RULE_TOKENS = int(os.getenv("PROMPT_MAX_RULE_TOKENS", "4000"))
+    PROMPT_MAX_CONTENT_TOKENS = int(os.getenv("PROMPT_MAX_CONTENT_TOKENS", "8000"))
+
+    # Lexicon Pre-filter
+    PREFILTER_ENABLED = os.getenv("PREFILTER_ENABLED", "true").lower() == "true"
+    PREFILTER_LEXICON_PATH = os.getenv("PREFILTER_LEXICON_PATH", os.path.join(DATA_FOLDER_PATH, "prefilter_lexicon.json"))
+    PREFILTER_THRESHOLD = float(os.getenv("PREFILTER_THRESHOLD", "0.3"))
+    PREFILTER_CLEAN_ACTION = os.getenv("PREFILTER_CLEAN_ACTION", "cheap")  # "skip" or "cheap"
+
+    # Model Routing: "prefilter" (the lexicon routes each request) or "tiered" (AZURE_OPEN_AI_SCREENING_DEPLOYMENT
+    # scores every segment the lexicon didn't flag; only high-risk ones reach the full model)
+    AUDIT_ROUTING = os.getenv("AUDIT_ROUTING", "prefilter")
+    SCREENING_ESCALATE_THRESHOLD = float(os.getenv("SCREENING_ESCALATE_THRESHOLD", "0.5"))  # Risk at which a segment is escalated
+    SCREENING_CONTEXT_SEGMENTS = int(os.getenv("SCREENING_CONTEXT_SEGMENTS", "1"))  # Neighbours sent along with an escalated segment
+
+    # Audit Job Workers
+    AUDIT_WORKER_CONCURRENCY = int(os.getenv("AUDIT_WORKER_CONCURRENCY", "4"))
+    AUDIT_EXECUTION = os.getenv("AUDIT_EXECUTION", "async")  # "async" (event loop) or "threads" (worker pool)
+    AUDIT_ASYNC_CONCURRENCY = int(os.getenv("AUDIT_ASYNC_CONCURRENCY", "200"))  # Audits in flight on the event loop
+    AUDIT_QUEUE_DEPTH = int(os.getenv("AUDIT_QUEUE_DEPTH", "500"))
+    AUDIT_JOB_TTL_SECONDS = int(os.getenv("AUDIT_JOB_TTL_SECONDS", "3600"))
+
+    # Per-stage concurrency (shared by all audits in the process)
+    DOWNLOAD_CONCURRENCY = int(os.getenv("DOWNLOAD_CONCURRENCY", "4"))
+    VI_UPLOAD_CONCURRENCY = int(os.getenv("VI_UPLOAD_CONCURRENCY", "4"))
+    LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "16"))
+    BATCH_MAX_PARALLEL = int(os.getenv("BATCH_MAX_PARALLEL", "16"))  # Audits in flight per batch
+
+    # Client side rate limits per endpoint (requests / tokens per minute, 0 = unlimited), set to the Azure quotas
+    AZURE_OPENAI_RPM = int(os.getenv("AZURE_OPENAI_RPM", "0"))
+    AZURE_OPENAI_TPM = int(os.getenv("AZURE_OPENAI_TPM", "0"))
+    AZURE_OPENAI_SCREENING_RPM = int(os.getenv("AZURE_OPENAI_SCREENING_RPM", "0"))
+    AZURE_OPENAI_SCREENING_TPM = int(os.getenv("AZURE_OPENAI_SCREENING_TPM", "0"))
+    AZURE_OPENAI_EMBEDDING_RPM = int(os.getenv("AZURE_OPENAI_EMBEDDING_RPM", "0"))  # Knowledge base indexing
+    AZURE_OPENAI_EMBEDDING_TPM = int(os.getenv("AZURE_OPENAI_EMBEDDING_TPM", "0"))
+    VI_UPLOAD_RPM = int(os.getenv("VI_UPLOAD_RPM", "0"))
+    VI_API_RPM = int(os.getenv("VI_API_RPM", "0"))  # Search, Index polls, deletes
+    RATE_LIMIT_OUTPUT_TOKENS = int(os.getenv("RATE_LIMIT_OUTPUT_TOKENS", "1000"))  # Expected answer size, counted against TPM up front
+    RATE_LIMIT_BULK_RESERVE = float(os.getenv("RATE_LIMIT_BULK_RESERVE", "0.2"))  # Share of each quota bulk audits leave to interactive ones
+    RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "5"))  # Throttled (429/503) and transient failures
+    RATE_LIMIT_BASE_BACKOFF_SECONDS = float(os.getenv("RATE_LIMIT_BASE_BACKOFF_SECONDS", "1"))
+    RATE_LIMIT_MAX_BACKOFF_SECONDS = float(os.getenv("RATE_LIMIT_MAX_BACKOFF_SECONDS", "60"))
+
+logger = logging.getLogger("client-registry")
+
+
+class ClientRegistry:
+    """
+    Process wide registry of the Azure clients.
+    Each client is built once on first use (or at warm-up) and then shared by
+    every graph run, so audits reuse the same connection pools.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, factory: Callable[[], Any]) -> Any:
+        client = self._clients.get(name)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(name)
+                if client is None:
+                    client = factory()
+                    self._clients[name] = client
+        return client
+
+    def find(self, name: str) -> Optional[Any]:
+        """The client if it's already built, without building it."""
+        return self._clients.get(name)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clients.clear()
+
+
+client_registry = ClientRegistry()
+
+
+def _httpClients() -> Dict[str, Any]:
+    """Sized connection pools handed to the OpenAI SDK clients."""
+    limits = httpx.Limits(
+        max_connections=BaseSettings.AZURE_OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=BaseSettings.AZURE_OPENAI_MAX_KEEPALIVE
     )
-    return llm
+    timeout = httpx.Timeout(BaseSettings.AZURE_OPENAI_TIMEOUT_SECONDS)
+    return {
+        "http_client": httpx.Client(limits=limits, timeout=timeout),
+        "http_async_client": httpx.AsyncClient(limits=limits, timeout=timeout)
+    }
+
+def getLLMClient(deployment: Optional[str] = None) -> AzureChatOpenAI:
+    deployment = deployment or BaseSettings.AZURE_OPEN_AI_CHAT_DEPLOYMENT
+
+    def build() -> AzureChatOpenAI:
+        return AzureChatOpenAI(
+            azure_deployment=deployment,
+            api_version=BaseSettings.AZURE_OPENAI_VERSION,
+            # temperature=0.0
+            # Retries go through services/rate_limiter, which shares the backoff between audits
+            max_retries=0,
+            **_httpClients()
+        )
+    return client_registry.get(f"llm:{deployment}", build)
 
 def getEmbedding() -> AzureOpenAIEmbeddings:
-    embeddings = AzureOpenAIEmbeddings(
-        model=BaseSettings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT,
-        api_version=BaseSettings.AZURE_OPENAI_VERSION
-    )
-    return embeddings
-
-def getVectorStore(embedding: AzureOpenAIEmbeddings) -> AzureSearch:
-    vector_store = AzureSearch(
-        azure_search_endpoint=BaseSettings.AZURE_SEARCH_ENDPOINT,
-        azure_search_key=BaseSettings.AZURE_SEARCH_API_KEY,
-        index_name=BaseSettings.AZURE_SEARCH_INDEX_NAME,
-        embedding_function=embedding.embed_query
-    )
+    def build() -> AzureOpenAIEmbeddings:
+        # Imported here, the cache module itself depends on settings
+        from backend.src.services.embedding_cache import CachedEmbeddings, get_embedding_cache
+
+        embeddings = AzureOpenAIEmbeddings(
+            model=BaseSettings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT,
+            api_version=BaseSettings.AZURE_OPENAI_VERSION,
+            **_httpClients()
+        )
+        cache = get_embedding_cache()
+        if cache is None:
+            return embeddings
+        return CachedEmbeddings(embeddings, cache, BaseSettings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT)
+    return client_registry.get("embedding", build)
+
+def getVectorStore(embedding: Optional[AzureOpenAIEmbeddings] = None) -> VectorStore:
+    if BaseSettings.VECTOR_STORE_BACKEND == "local":
+        from backend.src.services.local_vector_store import LocalVectorStore
+
+        # The local index is searched by vector, the shared embedding client is only built if it embeds texts itself
+        if embedding is not None and embedding is not client_registry.find("embedding"):
+            return LocalVectorStore(BaseSettings.LOCAL_VECTOR_INDEX_DIR, embedding)
+        return client_registry.get("vector_store", lambda: LocalVectorStore(BaseSettings.LOCAL_VECTOR_INDEX_DIR,
+                                                                             embedding_factory=getEmbedding))
+
+    def build(embedding: AzureOpenAIEmbeddings) -> VectorStore:
+        return AzureSearch(
+            azure_search_endpoint=BaseSettings.AZURE_SEARCH_ENDPOINT,
+            azure_search_key=BaseSettings.AZURE_SEARCH_API_KEY,
+            index_name=BaseSettings.AZURE_SEARCH_INDEX_NAME,
+            embedding_function=embedding.embed_query
+        )
+
+    # Azure AI Search embeds with the client it's built with; only the store bound to the shared one is cached
+    shared_embedding = getEmbedding()
+    if embedding is not None and embedding is not shared_embedding:
+        return build(embedding)
+    return client_registry.get("vector_store", lambda: build(shared_embedding))
 
-    return vector_store
+def warmUpClients() -> None:
+    """Builds every shared client up front so the first audit doesn't pay for it."""
+    started_at = time.perf_counter()
+    getLLMClient()
+    if BaseSettings.AZURE_OPEN_AI_SCREENING_DEPLOYMENT:
+        getLLMClient(BaseSettings.AZURE_OPEN_AI_SCREENING_DEPLOYMENT)
+    getVectorStore()
+    getEmbedding()
+    logger.info(f"Clients warmed up in {time.perf_counter() - started_at:.2f}s")
 
 
 settings = BaseSettings()
\ No newline at end of file
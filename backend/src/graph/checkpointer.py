@@ -0,0 +1,144 @@
+import os
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from backend.src.config.settings import settings
+
+logger = logging.getLogger("graph-checkpointer")
+
+_checkpointer = None
+_checkpointer_lock = threading.Lock()
+_async_checkpointer = None
+
+
+def build_run_config(session_id: str) -> Dict[str, Any]:
+    """Graph config of an audit session: checkpoints are kept per session (LangGraph thread)."""
+    return {"configurable": {"thread_id": session_id}}
+
+
+def with_violation_stream(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run config that asks the auditors to stream violations to the graph's custom stream.
+    Only for callers that consume stream_mode="custom"; plain invoke() keeps the structured output path.
+    """
+    return {**config, "configurable": {**config.get("configurable", {}), "stream_violations": True}}
+
+
+def _sqlite_checkpointer():
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    os.makedirs(os.path.dirname(settings.CHECKPOINT_SQLITE_PATH) or ".", exist_ok=True)
+    # The saver serializes access to the shared connection itself
+    conn = sqlite3.connect(settings.CHECKPOINT_SQLITE_PATH, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    saver = SqliteSaver(conn)
+    saver.setup()
+    return saver
+
+
+def _require_postgres() -> None:
+    """The postgres backend's packages are an optional extra (langgraph-checkpoint-postgres, psycopg 3, psycopg_pool)."""
+    try:
+        import langgraph.checkpoint.postgres  # noqa: F401
+        import psycopg  # noqa: F401
+        import psycopg_pool  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            "CHECKPOINT_BACKEND=postgres needs the 'postgres' extra: "
+            f"pip install '.[postgres]' (or uv sync --extra postgres). Missing: {e.name}"
+        ) from e
+
+
+def _postgres_checkpointer():
+    _require_postgres()
+    from langgraph.checkpoint.postgres import PostgresSaver
+    from psycopg.rows import dict_row
+    from psycopg_pool import ConnectionPool
+
+    pool = ConnectionPool(
+        settings.CHECKPOINT_POSTGRES_URL,
+        max_size=settings.AUDIT_WORKER_CONCURRENCY + settings.BATCH_MAX_PARALLEL,
+        kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+        open=True
+    )
+    saver = PostgresSaver(pool)
+    saver.setup()
+    return saver
+
+
+def get_checkpointer() -> Optional[Any]:
+    """
+    Process wide LangGraph checkpointer chosen by CHECKPOINT_BACKEND:
+    "sqlite" (default, local file), "postgres" (CHECKPOINT_POSTGRES_URL) or "none".
+    """
+    global _checkpointer
+    if settings.CHECKPOINT_BACKEND == "none":
+        return None
+    if _checkpointer is None:
+        with _checkpointer_lock:
+            if _checkpointer is None:
+                if settings.CHECKPOINT_BACKEND == "postgres":
+                    _checkpointer = _postgres_checkpointer()
+                else:
+                    _checkpointer = _sqlite_checkpointer()
+                logger.info(f"Graph checkpoints stored in {settings.CHECKPOINT_BACKEND}")
+    return _checkpointer
+
+
+async def _async_sqlite_checkpointer():
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    os.makedirs(os.path.dirname(settings.CHECKPOINT_SQLITE_PATH) or ".", exist_ok=True)
+    conn = await aiosqlite.connect(settings.CHECKPOINT_SQLITE_PATH)
+    await conn.execute("PRAGMA journal_mode=WAL")
+    saver = AsyncSqliteSaver(conn)
+    await saver.setup()
+    return saver
+
+
+async def _async_postgres_checkpointer():
+    _require_postgres()
+    from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+    from psycopg.rows import dict_row
+    from psycopg_pool import AsyncConnectionPool
+
+    pool = AsyncConnectionPool(
+        settings.CHECKPOINT_POSTGRES_URL,
+        max_size=settings.AUDIT_ASYNC_CONCURRENCY,
+        kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+        open=False
+    )
+    await pool.open()
+    saver = AsyncPostgresSaver(pool)
+    await saver.setup()
+    return saver
+
+
+async def get_async_checkpointer() -> Optional[Any]:
+    """
+    Checkpointer for graphs run with ainvoke/astream, on the same storage as
+    get_checkpointer() so either graph can resume the other's sessions.
+    Its connection belongs to the calling event loop: build it once at startup.
+    """
+    global _async_checkpointer
+    if settings.CHECKPOINT_BACKEND == "none":
+        return None
+    if _async_checkpointer is None:
+        if settings.CHECKPOINT_BACKEND == "postgres":
+            _async_checkpointer = await _async_postgres_checkpointer()
+        else:
+            _async_checkpointer = await _async_sqlite_checkpointer()
+        logger.info(f"Async graph checkpoints stored in {settings.CHECKPOINT_BACKEND}")
+    return _async_checkpointer
+
+
+async def close_async_checkpointer() -> None:
+    """Closes the async checkpointer's connection (aiosqlite runs its own thread until closed)."""
+    global _async_checkpointer
+    if _async_checkpointer is not None:
+        # aiosqlite connection or psycopg AsyncConnectionPool
+        await _async_checkpointer.conn.close()
+        _async_checkpointer = None
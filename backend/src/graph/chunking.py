@@ -0,0 +1,136 @@
+import re
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from backend.src.graph.states import ComplianceIssue, TranscriptSegment
+
+logger = logging.getLogger("transcript-chunking")
+
+SEVERITY_RANK = {"LOW": 0, "MEDIUM": 1, "HIGH": 2, "CRITICAL": 3}
+
+# A failed encoding download is retried after this many seconds (estimates are used meanwhile)
+ENCODER_RETRY_SECONDS = 300
+
+_encoder = None
+_encoder_failed_at: Optional[float] = None
+_encoder_lock = threading.Lock()
+
+
+def _get_encoder():
+    """
+    The tiktoken encoder, loaded once (it may download the encoding). False when tiktoken isn't
+    installed; None while a failed load (e.g. a download without network) waits for its retry.
+    """
+    global _encoder, _encoder_failed_at
+    if _encoder is None and not _encoder_backing_off():
+        # Audit batches and to_thread calls count tokens concurrently, only one of them loads it
+        with _encoder_lock:
+            if _encoder is None and not _encoder_backing_off():
+                try:
+                    import tiktoken
+                except ImportError as e:
+                    logger.warning(f"tiktoken not installed, estimating tokens from length: {e}")
+                    _encoder = False
+                    return _encoder
+                try:
+                    _encoder = tiktoken.get_encoding("o200k_base")
+                    _encoder_failed_at = None
+                except Exception as e:
+                    logger.warning(f"tiktoken encoding unavailable, estimating tokens from length for {ENCODER_RETRY_SECONDS}s: {e}")
+                    _encoder_failed_at = time.monotonic()
+    return _encoder
+
+
+def _encoder_backing_off() -> bool:
+    return _encoder_failed_at is not None and time.monotonic() - _encoder_failed_at < ENCODER_RETRY_SECONDS
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken, falling back to a ~4 chars/token estimate when it's unavailable."""
+    encoder = _get_encoder()
+    if encoder:
+        return len(encoder.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cuts `text` to at most `max_tokens` tokens (same tokenizer/fallback as count_tokens)."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoder = _get_encoder()
+    if encoder:
+        return encoder.decode(encoder.encode(text, disallowed_special=())[:max_tokens]) + "\n[... truncated]"
+    return text[:max_tokens * 4] + "\n[... truncated]"
+
+
+def format_segment(segment: TranscriptSegment) -> str:
+    speaker = f"Speaker {segment['speaker']}: " if segment.get("speaker") is not None else ""
+    return f"[{segment.get('start') or '?'} - {segment.get('end') or '?'}] {speaker}{segment.get('text', '')}"
+
+
+def build_windows(segments: List[TranscriptSegment], max_tokens: int, overlap_segments: int = 1) -> List[Dict[str, Any]]:
+    """
+    Splits timestamped transcript segments into token-bounded windows.
+    Consecutive windows share `overlap_segments` segments so a sentence cut at
+    the boundary is still seen whole by one of them.
+    """
+    windows: List[Dict[str, Any]] = []
+    current: List[TranscriptSegment] = []
+    current_tokens = 0
+
+    def close_window():
+        windows.append({
+            "start": current[0].get("start"),
+            "end": current[-1].get("end"),
+            "segments": list(current),
+            "text": "\n".join(format_segment(segment) for segment in current)
+        })
+
+    for segment in segments:
+        segment_tokens = count_tokens(format_segment(segment))
+        if current and current_tokens + segment_tokens > max_tokens:
+            close_window()
+            current = current[-overlap_segments:] if overlap_segments else []
+            current_tokens = sum(count_tokens(format_segment(s)) for s in current)
+        current.append(segment)
+        current_tokens += segment_tokens
+
+    if current:
+        close_window()
+    return windows
+
+
+def _normalize_text(text: Optional[str]) -> str:
+    return re.sub(r"\W+", " ", (text or "").lower()).strip()
+
+
+def locate_timestamp(flagged_text: Optional[str], segments: List[TranscriptSegment]) -> Optional[str]:
+    """Start time of the first segment containing the flagged text, if it can be found verbatim."""
+    needle = _normalize_text(flagged_text)
+    if not needle:
+        return None
+    for segment in segments:
+        if needle in _normalize_text(segment.get("text")):
+            return segment.get("start")
+    return None
+
+
+def merge_issues(issue_lists: List[List[ComplianceIssue]]) -> List[ComplianceIssue]:
+    """
+    Merges per-window results, de-duplicating issues found by overlapping windows.
+    Duplicates share category and flagged text; the highest severity is kept.
+    """
+    merged: Dict[tuple, ComplianceIssue] = {}
+    for issues in issue_lists:
+        for issue in issues:
+            key = (_normalize_text(issue.get("category")), _normalize_text(issue.get("flagged_text") or issue.get("description")))
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = issue
+                continue
+            if SEVERITY_RANK.get(str(issue.get("severity")).upper(), 1) > SEVERITY_RANK.get(str(existing.get("severity")).upper(), 1):
+                merged[key] = {**issue, "time_stamp": existing.get("time_stamp") or issue.get("time_stamp")}
+
+    return list(merged.values())
@@ -1,167 +1,940 @@
 import json
 import os
+import asyncio
 import logging
 import re
-from typing import Dict, Any, List
-import logging
-
-from backend.src.graph.states import ComplianceIssue, VideoAuditState
-from backend.src.config.settings import settings, getLLMClient, getEmbedding, getVectorStore
-from backend.src.services.video_indexer import VideoIndexerService
-from backend.src.graph.prompt import setSystemPrompt
+import time
+from collections import Counter
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from backend.src.graph.states import AuditReport, AuditResult, ComplianceIssue, RoutingDecision, TokenUsage, TranscriptSegment, VideoAuditState
+from backend.src.graph.chunking import build_windows, count_tokens, format_segment, locate_timestamp, merge_issues
+from backend.src.config.settings import settings, getLLMClient
+from backend.src.services.video_indexer import AsyncVideoIndexerService, VideoIndexerService
+from backend.src.services.cache import get_audit_cache, normalize_video_id, content_hash
+from backend.src.services.prefilter import get_prefilter
+from backend.src.services.concurrency import async_stage_slot, stage_slot
+from backend.src.services.rate_limiter import acall_with_retry, call_with_retry, get_limiter, llm_endpoint
+from backend.src.services.instrumentation import record_cache_lookup, record_token_usage, traced_stage
+from backend.src.graph.prompt import (REPAIR_INSTRUCTIONS, SCREENING_INSTRUCTIONS, setSystemPrompt, setUserPrompt, setRepairPrompt,
+                                      setScreeningPrompt, countPromptTokens)
+from backend.src.graph.output_parser import (AuditParseError, IssueStreamParser, parse_audit_json, parse_screening_scores, raw_text,
+                                             read_response, validate_audit_result)
+from backend.src.graph.retrieval import retrieve_rules
 from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+from langgraph.config import get_config, get_stream_writer
 
 logger = logging.getLogger(name="compliance_engine")
 logging.basicConfig(level=logging.INFO)
 
+AUDIT_BRANCHES = ["transcript", "ocr", "metadata"]
 
-# Node 1
-def index_video_node(state: VideoAuditState) -> Dict[str, Any]:
+# Routes whose requests never reach the full model: lexicon "skip", and "screened" (cleared by the screening model)
+NO_CALL_ROUTES = ("skip", "screened")
+
+
+# Node 1a
+def ingest_video_node(state: VideoAuditState) -> Dict[str, Any]:
     """
     - Download YT Video
     - Upload to Azure Video Indexer (Blob Storage)
-    - Extract Content
+    - Records the Azure video ID in the (checkpointed) state
     """
+    video_url, video_name, youtube_id, shortcut = _ingest_shortcut(state)
+    if shortcut is not None:
+        return shortcut
+
+    try:
+        # Step 2: Creating an instance of Video Indexer Service
+        vi_service = VideoIndexerService()
+
+        if not youtube_id:
+            raise Exception("Please provide a valid URL")
+
+        # Step 3-5: Reuse the Video Indexer entry of this YouTube ID, or stream / upload the YT video
+        # (any temp file is per-session and cleaned up by the service)
+        azure_video_id, source = vi_service.ingest(video_url, video_name=video_name, external_id=youtube_id)
+        return _ingested(video_url, youtube_id, azure_video_id, source)
+
+    except Exception as e:
+        return _ingest_failed("Ingest", video_url, e)
+
+
+async def aingest_video_node(state: VideoAuditState) -> Dict[str, Any]:
+    """Async ingest_video_node: Video Indexer calls run on the event loop."""
+    video_url, video_name, youtube_id, shortcut = await asyncio.to_thread(_ingest_shortcut, state)
+    if shortcut is not None:
+        return shortcut
+
+    try:
+        vi_service = AsyncVideoIndexerService()
+
+        if not youtube_id:
+            raise Exception("Please provide a valid URL")
+
+        azure_video_id, source = await vi_service.ingest(video_url, video_name=video_name, external_id=youtube_id)
+        return _ingested(video_url, youtube_id, azure_video_id, source)
+
+    except Exception as e:
+        return _ingest_failed("Ingest", video_url, e)
+
 
+def _ingest_shortcut(state: VideoAuditState) -> Tuple[str, str, Optional[str], Optional[Dict[str, Any]]]:
+    """Returns (video_url, video_name, youtube_id, result) where result is set when nothing has to be uploaded."""
     # Step 1: Get the YT URL and ID Link from state
     video_url = state.get("video_url", "")
     input_video_id = state.get("video_id", "demo")
+    youtube_id = normalize_video_id(video_url)
 
-    logger.info(f"Node 1 (Indexer) Processing {video_url}")
+    logger.info(f"Node 1 (Ingest) Processing {video_url}")
 
-    # Step 2: Setting a local file name (temp download)
-    local_file_name = "yt_temp_video.mp4"
+    # Step 1.5: Short-circuit if this YouTube video was already indexed
+    cache = get_audit_cache()
+    if cache and youtube_id:
+        cached_insights = cache.get_insights(youtube_id)
+        record_cache_lookup("insights", bool(cached_insights))
+        if cached_insights:
+            logger.info(f"Node 1 (Ingest) Cache hit for {youtube_id}, skipping Video Indexer")
+            return video_url, input_video_id, youtube_id, {**cached_insights, "youtube_id": youtube_id}
 
-    try:
-        # Step 3: Creating an instance of Video Indexer Service
-        vi_service = VideoIndexerService()
+    # Step 1.6: A resumed audit reuses the video it already uploaded
+    if state.get("azure_video_id"):
+        logger.info(f"Node 1 (Ingest) Reusing uploaded video {state['azure_video_id']}")
+        return video_url, input_video_id, youtube_id, {"youtube_id": youtube_id}
 
-        # Step 4: Download the YT video to local path
-        if "youtube.com" in video_url:
-            local_path = vi_service.download(video_url, output_path=local_file_name)
-        else:
-            raise Exception("Please provide a valid URL")
-        
-        # Step 5: Upload the video to Azure Video Indexer
-        azure_video_id = vi_service.upload(local_path, video_name=input_video_id)
+    return video_url, input_video_id, youtube_id, None
+
+
+def _ingested(video_url: str, youtube_id: str, azure_video_id: str, source: Dict[str, Any]) -> Dict[str, Any]:
+    logger.info(f"Node 1 (Ingest) Upload Successful {video_url} to Azure - {azure_video_id}")
+    return {
+        "azure_video_id": azure_video_id,
+        "youtube_id": youtube_id,
+        "video_meta_data": {key: source[key] for key in ("title", "description", "tags") if source.get(key)}
+    }
+
+
+def _ingest_failed(node: str, video_url: str, error: Exception) -> Dict[str, Any]:
+    logger.error(f"Node 1 ({node}) {'Upload' if node == 'Ingest' else 'VideoIndexer'} Failed {video_url}")
+    return {
+        "errors": [f"{node} failed: {error}"],
+        "final_report_status": "FAIL",
+        "transcript": "",
+        "ocr_text": []
+    }
+
+
+# Node 1b
+def index_video_node(state: VideoAuditState) -> Dict[str, Any]:
+    """
+    - Waits for Azure Video Indexer to process the uploaded video
+    - Extract Content
+    """
+    video_url = state.get("video_url", "")
+    azure_video_id = state.get("azure_video_id")
 
-        logger.info(f"Node 1 (Indexer) Upload Successful {video_url} to Azure - {azure_video_id}")
+    # Cached insights were already loaded, or the upload failed
+    if state.get("transcript") or not azure_video_id:
+        return {}
 
-        # Step 5: Clean up the local storage
-        if os.path.exists(local_path):
-            os.remove(local_path)
+    try:
+        vi_service = VideoIndexerService()
 
         # Step 6: Get insights / extraction from VideoIndexer
         raw_insights = vi_service.wait_for_processing(azure_video_id)
 
-        # Step 7: Cleaning the data
+        # Step 7: Cleaning the data, the raw Index JSON can be several MB so it's released right away
         clean_data = vi_service.extract_data(raw_insights)
+        del raw_insights
+        return _indexed(state, clean_data)
+
+    except Exception as e:
+        return _ingest_failed("Indexer", video_url, e)
 
-        logger.info(f"Node 1 (Indexer) VideoIndexer Extraction Successful {video_url} to Azure - {azure_video_id}")
 
-        return clean_data
-    
+async def aindex_video_node(state: VideoAuditState) -> Dict[str, Any]:
+    """Async index_video_node: the wait for Video Indexer holds no thread."""
+    video_url = state.get("video_url", "")
+    azure_video_id = state.get("azure_video_id")
+
+    if state.get("transcript") or not azure_video_id:
+        return {}
+
+    try:
+        vi_service = AsyncVideoIndexerService()
+        raw_insights = await vi_service.wait_for_processing(azure_video_id)
+        clean_data = vi_service.extract_data(raw_insights)
+        del raw_insights
+        return await asyncio.to_thread(_indexed, state, clean_data)
+
     except Exception as e:
-        logger.error(f"Node 1 (Indexer) VideoIndexer Failed {video_url}")
-        return {
-            "error" : str(e),
-            "final_report_status": "Fail",
-            "transcript": "",
-            "ocr_text": []
-        }
+        return _ingest_failed("Indexer", video_url, e)
+
+
+def _indexed(state: VideoAuditState, clean_data: Dict[str, Any]) -> Dict[str, Any]:
+    clean_data["video_meta_data"] = {**clean_data["video_meta_data"], **(state.get("video_meta_data") or {})}
+
+    logger.info(f"Node 1 (Indexer) VideoIndexer Extraction Successful {state.get('video_url', '')} to Azure - {state.get('azure_video_id')}")
+
+    # Step 8: Cache the insights for repeat submissions of the same video
+    cache = get_audit_cache()
+    youtube_id = state.get("youtube_id")
+    if cache and youtube_id:
+        cache.set_insights(youtube_id, clean_data)
+
+    return clean_data
+
 
 
+# Node 2 (parallel branches): transcript, on-screen text and metadata audits
+def transcript_auditor(state: VideoAuditState) -> Dict[str, Any]:
+    """
+    - Audits the spoken content (timestamped transcript)
+    - Long transcripts are split into windows and audited concurrently (map-reduce)
+    """
+    return _audit_content("transcript", state, *_transcript_requests(state))
+
+
+def ocr_auditor(state: VideoAuditState) -> Dict[str, Any]:
+    """
+    - Audits the on-screen text (OCR) on its own, with rules retrieved for that text
+    """
+    ocr_text = state.get("ocr_text", [])
+    if not ocr_text:
+        return {"audit_reports": [AuditReport(branch="ocr", status="SKIPPED", report="No on-screen text.")]}
+    return _audit_content("ocr", state, *_ocr_requests(ocr_text))
+
 
-# Node 2
-def compliance_auditor(state: VideoAuditState)-> Dict[str, Any]:
+def metadata_auditor(state: VideoAuditState) -> Dict[str, Any]:
     """
-    - Perform RAG to audit the given content of the Video
-    - Builds a compliance report
+    - Audits the video title, description and tags
     """
+    text_fields = _metadata_fields(state)
+    if not text_fields:
+        return {"audit_reports": [AuditReport(branch="metadata", status="SKIPPED", report="No textual metadata.")]}
+    return _audit_content("metadata", state, *_metadata_requests(text_fields))
+
+
+async def atranscript_auditor(state: VideoAuditState) -> Dict[str, Any]:
+    return await _aaudit_content("transcript", state, *_transcript_requests(state))
 
-    logger.info("Compliance Auditor Running - Querying using Knowledge base and LLM")
 
-    # Step 1: Get the transcript the state
+async def aocr_auditor(state: VideoAuditState) -> Dict[str, Any]:
+    ocr_text = state.get("ocr_text", [])
+    if not ocr_text:
+        return {"audit_reports": [AuditReport(branch="ocr", status="SKIPPED", report="No on-screen text.")]}
+    return await _aaudit_content("ocr", state, *_ocr_requests(ocr_text))
+
+
+async def ametadata_auditor(state: VideoAuditState) -> Dict[str, Any]:
+    text_fields = _metadata_fields(state)
+    if not text_fields:
+        return {"audit_reports": [AuditReport(branch="metadata", status="SKIPPED", report="No textual metadata.")]}
+    return await _aaudit_content("metadata", state, *_metadata_requests(text_fields))
+
+
+AuditRequests = Tuple[str, List[str], List[Tuple[str, str, List[TranscriptSegment]]]]
+
+
+def _transcript_requests(state: VideoAuditState) -> AuditRequests:
+    """(content label, retrieval query texts, [(label, user message, segments)]) of the transcript branch."""
     transcript = state.get("transcript", "")
-    if not transcript:
+    segments = state.get("transcript_segments") or []
+
+    if segments:
+        windows = build_windows(segments, settings.AUDIT_WINDOW_TOKENS) if settings.AUDIT_MODE == "map_reduce" else []
+        if len(windows) <= 1:
+            windows = [{"start": segments[0].get("start"), "end": segments[-1].get("end"), "segments": segments,
+                        "text": "\n".join(format_segment(segment) for segment in segments)}]
+    else:
+        windows = [{"start": None, "end": None, "segments": [], "text": transcript}]
+
+    requests = []
+    for window in windows:
+        label = f"{window['start']} - {window['end']}" if window["start"] else "transcript"
+        requests.append((label, f"TRANSCRIPT ({label}):\n{window['text']}", window["segments"]))
+
+    query_texts = [segment.get("text", "") for segment in segments] or [transcript]
+    return "the spoken Transcript", query_texts, requests
+
+
+def _ocr_requests(ocr_text: List[str]) -> AuditRequests:
+    return "the On-Screen Text (OCR)", list(ocr_text), [("on-screen text", f"ON-SCREEN TEXT (OCR): {ocr_text}", [])]
+
+
+def _metadata_fields(state: VideoAuditState) -> Dict[str, Any]:
+    metadata = state.get("video_meta_data", {})
+    return {key: metadata[key] for key in ("title", "description", "tags") if metadata.get(key)}
+
+
+def _metadata_requests(text_fields: Dict[str, Any]) -> AuditRequests:
+    return ("the video Title, Description and Tags", [str(value) for value in text_fields.values()],
+            [("metadata", f"VIDEO TITLE / DESCRIPTION / TAGS: {text_fields}", [])])
+
+
+# Node 3
+def aggregate_results(state: VideoAuditState) -> Dict[str, Any]:
+    """
+    - Joins the parallel audit branches
+    - Makes the final PASS/FAIL decision and builds the report
+    """
+    if not state.get("transcript"):
         logger.warning("Transcript not found, Skipping Audit")
         return {
             "final_report_status": "FAIL",
             "final_report" : "Audit skipped because video processing failed (No Transcript)"
         }
-    
-    # Step 2: Intialize the LLM Client
-    llm = getLLMClient()
 
-    # Step 3: Intialize the Embedding Client
-    embedding = getEmbedding()
+    reports = sorted(state.get("audit_reports", []), key=lambda report: AUDIT_BRANCHES.index(report["branch"]))
+    issues = state.get("compliance_results", [])
+
+    # Any finding, failed branch or branch that couldn't be audited fails the video
+    failed = bool(issues) or any(report["status"] in ("FAIL", "ERROR") for report in reports)
+
+    return {
+        "final_report_status": "FAIL" if failed else "PASS",
+        "final_report": "\n\n".join(f"{report['branch'].upper()}: {report['report']}" for report in reports)
+                        or "No report generated."
+    }
+
+
+def route_audits(state: VideoAuditState) -> List[str]:
+    """Fans out to every audit branch, or straight to the aggregator when indexing produced no transcript."""
+    if not state.get("transcript"):
+        return ["aggregator"]
+    return [f"{branch}_auditor" for branch in AUDIT_BRANCHES]
+
+
+class _PreparedAudit:
+    """Everything `_audit_content` computes before the model calls of one branch."""
+
+    def __init__(self, branch, requests, routes, system_prompt, youtube_id, fingerprint, metadata, writer):
+        self.branch = branch
+        self.routes = routes
+        self.system_prompt = system_prompt
+        self.youtube_id = youtube_id
+        self.fingerprint = fingerprint
+        self.metadata = metadata
+        self.writer = writer
+        self.requests, self.user_prompts, self.messages, self.on_issue = [], [], [], []
+        for request in requests:
+            self.requests.append(request)
+            self.user_prompts.append(None)
+            self.messages.append(None)
+            self.on_issue.append(None)
+            self.set_request(len(self.requests) - 1, request)
+
+        # Screening model results (tiered routing): request index -> highest segment risk
+        self.risks: Dict[int, float] = {}
+        self.routing = RoutingDecision(branch=branch, mode=settings.AUDIT_ROUTING, requests=len(requests), routes={},
+                                       screened_items=0, escalated_items=0, max_risk=None, screening_failures=0,
+                                       screening_tokens=0, screening_seconds=0.0)
+
+    def set_request(self, index: int, request: Tuple[str, str, List[TranscriptSegment]]) -> None:
+        """(Re)builds the prompt, messages and violation emitter of one request."""
+        label, user_message, segments = request
+        user_prompt = setUserPrompt(self.metadata, user_message)
+        self.requests[index] = request
+        self.user_prompts[index] = user_prompt
+        self.messages[index] = [SystemMessage(content=self.system_prompt), HumanMessage(content=user_prompt)]
+        self.on_issue[index] = _issue_emitter(self.writer, self.branch, label, segments) if self.writer else None
+
+
+def _audit_content(branch: str, state: VideoAuditState, content_label: str, query_texts: List[str],
+                   requests: List[Tuple[str, str, List[TranscriptSegment]]]) -> Dict[str, Any]:
+    """
+    Shared audit step of every branch:
+    - screens each request with the local lexicon pre-filter; only flagged ones go to the full model
+    - with AUDIT_ROUTING=tiered the screening model scores the other requests per segment,
+      and only the high-risk segments (with some context) go on to the full model
+    - retrieves the rules for this branch's content (one query per group of segments/lines) and builds its system prompt
+    - short-circuits on a cached result for the same video, branch, prompt and rules
+    - runs the (label, user message, segments) requests concurrently, bounded by AUDIT_MAX_PARALLEL;
+      with AUDIT_STREAMING and a run that reads the custom stream (jobs), each violation is written to it as soon as it's parsed
+    - merges and de-duplicates the ComplianceIssues
+    Branches never write final_report_status, the aggregator owns the decision.
+    """
+    prepared = _prepare_audit(branch, state, content_label, query_texts, requests)
+    if isinstance(prepared, dict):
+        return prepared
+
+    _screen_requests(prepared)
+    responses = _invoke_routed(prepared.messages, prepared.routes, prepared.on_issue)
+    results = []
+    for response, route in zip(responses, prepared.routes):
+        try:
+            results.append(_read_routed(response, route))
+        except Exception as e:
+            results.append(e)
+    return _finish_audit(prepared, responses, results)
+
+
+async def _aaudit_content(branch: str, state: VideoAuditState, content_label: str, query_texts: List[str],
+                          requests: List[Tuple[str, str, List[TranscriptSegment]]]) -> Dict[str, Any]:
+    """
+    Async `_audit_content`: the model calls (and repairs) are awaited on the event loop.
+    Retrieval, the cache and token counting are short blocking steps and run in a worker thread.
+    """
+    prepared = await asyncio.to_thread(_prepare_audit, branch, state, content_label, query_texts, requests)
+    if isinstance(prepared, dict):
+        return prepared
+
+    await _ascreen_requests(prepared)
+    responses = await _ainvoke_routed(prepared.messages, prepared.routes, prepared.on_issue)
+    results = await asyncio.gather(
+        *(_aread_routed(response, route) for response, route in zip(responses, prepared.routes)),
+        return_exceptions=True
+    )
+    return await asyncio.to_thread(_finish_audit, prepared, responses, list(results))
+
+
+def _prepare_audit(branch: str, state: VideoAuditState, content_label: str, query_texts: List[str],
+                   requests: List[Tuple[str, str, List[TranscriptSegment]]]):
+    """Routes, rules and prompts of a branch, or its final result when no model call is needed."""
+    logger.info(f"Compliance Auditor ({branch}) Running - Querying using Knowledge base and LLM")
+
+    # Route every request: "full" model, "cheap" screening model, "skip" the LLM entirely,
+    # or "screen" (tiered routing) to let the screening model pick the segments the full model gets
+    tiered = settings.AUDIT_ROUTING == "tiered"
+    routes = ["screen" if tiered else "full"] * len(requests)
+    prefilter = get_prefilter()
+    if prefilter:
+        if tiered:
+            clean_route = "screen"
+        else:
+            clean_route = "skip" if settings.PREFILTER_CLEAN_ACTION == "skip" else "cheap"
+        routes = ["full" if prefilter.screen(user_message).flagged else clean_route for _, user_message, _ in requests]
+        logger.info(f"Compliance Auditor ({branch}) pre-filter escalated {routes.count('full')}/{len(routes)} requests")
+        if all(route == "skip" for route in routes):
+            return {"audit_reports": [AuditReport(branch=branch, status="PASS",
+                                                  report="No lexicon matches, LLM audit skipped by the pre-filter.")]}
+
+    try:
+        system_prompt = setSystemPrompt(retrieve_rules(query_texts), content_label)
+    except Exception as e:
+        logger.error(f"Rule retrieval failed in {branch} auditor: {str(e)}")
+        return {"errors": [f"{branch}: {str(e)}"],
+                "audit_reports": [AuditReport(branch=branch, status="ERROR", report="Rule retrieval failed.")]}
+
+    cache = get_audit_cache()
+    youtube_id = state.get("youtube_id") or normalize_video_id(state.get("video_url", ""))
+    fingerprint = content_hash(
+        branch, settings.AZURE_OPEN_AI_CHAT_DEPLOYMENT, settings.AUDIT_MODE, str(settings.AUDIT_WINDOW_TOKENS),
+        settings.AZURE_OPEN_AI_SCREENING_DEPLOYMENT, ",".join(routes), system_prompt,
+        *([str(settings.SCREENING_ESCALATE_THRESHOLD), str(settings.SCREENING_CONTEXT_SEGMENTS)] if tiered else [])
+    )
+    writer = _stream_writer()
+    if cache and youtube_id:
+        cached_result = cache.get_audit(youtube_id, fingerprint)
+        record_cache_lookup("audit", bool(cached_result))
+        if cached_result:
+            logger.info(f"Compliance Auditor ({branch}) Cache hit for {youtube_id}, skipping LLM call")
+            if writer:
+                for issue in cached_result.get("compliance_results", []):
+                    writer({"type": "violation", "branch": branch, "window": None, "issue": issue})
+            return cached_result
+
+    if len(requests) > 1:
+        logger.info(f"Compliance Auditor ({branch}) map-reduce over {len(requests)} windows (parallelism {settings.AUDIT_MAX_PARALLEL})")
+    return _PreparedAudit(branch, requests, routes, system_prompt, youtube_id, fingerprint,
+                          state.get("video_meta_data", {}), writer)
+
+
+def _screening_items(request: Tuple[str, str, List[TranscriptSegment]]) -> List[str]:
+    """What the screening model scores: the window's segments, or the whole request (OCR, metadata)."""
+    _, user_message, segments = request
+    return [segment.get("text", "") for segment in segments] or [user_message]
+
+
+def _screening_messages(items: List[str]) -> list:
+    return [SystemMessage(content=SCREENING_INSTRUCTIONS), HumanMessage(content=setScreeningPrompt(items))]
+
+
+def _escalated_indexes(scores: List[float], threshold: float, context: int) -> List[int]:
+    """Segments at or above the threshold, plus `context` neighbours on each side."""
+    keep = set()
+    for i, score in enumerate(scores):
+        if score >= threshold:
+            keep.update(range(max(i - context, 0), min(i + context + 1, len(scores))))
+    return sorted(keep)
+
+
+def _narrowed_request(request: Tuple[str, str, List[TranscriptSegment]], keep: List[int]) -> Tuple[str, str, List[TranscriptSegment]]:
+    label, _, segments = request
+    kept = [segments[i] for i in keep]
+    text = "\n".join(format_segment(segment) for segment in kept)
+    return label, f"TRANSCRIPT ({label}, high-risk segments):\n{text}", kept
+
+
+def _screening_targets(prepared: _PreparedAudit) -> Tuple[List[int], Dict[int, List[str]]]:
+    indexes = [i for i, route in enumerate(prepared.routes) if route == "screen"]
+    return indexes, {i: _screening_items(prepared.requests[i]) for i in indexes}
+
+
+def _screen_requests(prepared: _PreparedAudit) -> None:
+    """Tiered routing: scores the "screen" requests with the screening model (see `_apply_screening`)."""
+    indexes, items = _screening_targets(prepared)
+    if not indexes:
+        return
+
+    deployment = _route_deployment("cheap")
+    started_at = time.perf_counter()
+    screening_llm = RunnableLambda(lambda messages: _invoke_with_slot(getLLMClient(deployment), messages, deployment))
+    responses = screening_llm.batch(
+        [_screening_messages(items[i]) for i in indexes],
+        config={"max_concurrency": settings.AUDIT_MAX_PARALLEL},
+        return_exceptions=True
+    )
+    _apply_screening(prepared, indexes, items, responses, time.perf_counter() - started_at)
+
+
+async def _ascreen_requests(prepared: _PreparedAudit) -> None:
+    """Async `_screen_requests`."""
+    indexes, items = _screening_targets(prepared)
+    if not indexes:
+        return
+
+    deployment = _route_deployment("cheap")
+    parallel = asyncio.Semaphore(settings.AUDIT_MAX_PARALLEL)
+
+    async def screen(i: int):
+        async with parallel:
+            return await _ainvoke_with_slot(getLLMClient(deployment), _screening_messages(items[i]), deployment)
+
+    started_at = time.perf_counter()
+    responses = await asyncio.gather(*(screen(i) for i in indexes), return_exceptions=True)
+    await asyncio.to_thread(_apply_screening, prepared, indexes, items, list(responses), time.perf_counter() - started_at)
+
+
+def _apply_screening(prepared: _PreparedAudit, indexes: List[int], items: Dict[int, List[str]],
+                     responses: List[Any], seconds: float) -> None:
+    """
+    Routes every screened request from its segment risks: "screened" when nothing reaches
+    SCREENING_ESCALATE_THRESHOLD, otherwise "full" with only the high-risk segments (and
+    SCREENING_CONTEXT_SEGMENTS neighbours). A failed or unreadable screening escalates the whole request.
+    """
+    routing = prepared.routing
+    routing["screening_seconds"] += round(seconds, 3)
+
+    for i, response in zip(indexes, responses):
+        label = prepared.requests[i][0]
+        count = len(items[i])
+        routing["screened_items"] += count
+        try:
+            if isinstance(response, Exception):
+                raise response
+            usage = getattr(response, "usage_metadata", None) or {}
+            routing["screening_tokens"] += usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+            scores = parse_screening_scores(raw_text(response), count)
+        except Exception as e:
+            logger.warning(f"Screening failed for {prepared.branch} ({label}), escalating it whole: {e}")
+            routing["screening_failures"] += 1
+            routing["escalated_items"] += count
+            prepared.routes[i] = "full"
+            continue
+
+        risk = max(scores, default=0.0)
+        prepared.risks[i] = risk
+        routing["max_risk"] = max(routing["max_risk"] or 0.0, risk)
+        keep = _escalated_indexes(scores, settings.SCREENING_ESCALATE_THRESHOLD, settings.SCREENING_CONTEXT_SEGMENTS)
+        if not keep:
+            prepared.routes[i] = "screened"
+            continue
+
+        routing["escalated_items"] += len(keep)
+        prepared.routes[i] = "full"
+        segments = prepared.requests[i][2]
+        if segments and len(keep) < len(segments):
+            prepared.set_request(i, _narrowed_request(prepared.requests[i], keep))
+
+    logger.info(f"Compliance Auditor ({prepared.branch}) screening escalated {routing['escalated_items']}/"
+                f"{routing['screened_items']} items in {seconds:.2f}s")
+
+
+def _finish_audit(prepared: _PreparedAudit, responses: List[Any], results: List[Any]) -> Dict[str, Any]:
+    """Merges the read results ((audit data, repairs) or the exception) into the branch result and caches it."""
+    branch, requests = prepared.branch, prepared.requests
+
+    issue_lists, reports, errors = [], [], []
+    any_request_failed = False
+    repair_requests = 0
+    for i, ((label, _, segments), route, response, result) in enumerate(zip(requests, prepared.routes, responses, results)):
+        if route == "skip":
+            if len(requests) > 1:
+                reports.append(f"[{label}] No lexicon matches, skipped.")
+            continue
+        if route == "screened":
+            report = f"Cleared by the screening model (highest risk {prepared.risks.get(i, 0.0):.2f})."
+            reports.append(f"[{label}] {report}" if len(requests) > 1 else report)
+            continue
+        if isinstance(result, Exception):
+            logger.error(f"System Error in Auditor Node ({branch}, {label}): {str(result)}")
+            # Log the raw response to see what went wrong
+            logger.error(f"Raw LLM Response: {raw_text(read_response(response)[0]) if not isinstance(response, Exception) else response}")
+            errors.append(f"{branch} ({label}): {str(result)}")
+            continue
+
+        audit_data, repairs = result
+        repair_requests += repairs
+        issue_lists.append(_to_compliance_issues(audit_data, segments))
+        any_request_failed = any_request_failed or audit_data.get("status", "FAIL") == "FAIL"
+        report = audit_data.get("final_report", "")
+        reports.append(f"[{label}] {report}" if len(requests) > 1 else report)
+
+    if errors:
+        # A partially audited branch can't PASS and isn't cached
+        status = "ERROR"
+    else:
+        status = "FAIL" if any_request_failed else "PASS"
+
+    result = {
+        "compliance_results": merge_issues(issue_lists),
+        "audit_reports": [AuditReport(branch=branch, status=status, report="\n".join(reports) or "No report generated.")]
+    }
+
+    cache = get_audit_cache()
+    if cache and prepared.youtube_id and not errors:
+        cache.set_audit(prepared.youtube_id, prepared.fingerprint, result)
+
+    # Usage and routing describe this run only, so they are kept out of the cached result
+    sent = [i for i, route in enumerate(prepared.routes) if route not in NO_CALL_ROUTES]
+    usage = _token_usage(branch, prepared.system_prompt, [prepared.user_prompts[i] for i in sent],
+                         [responses[i] for i in sent], repair_requests)
+    logger.info(f"Compliance Auditor ({branch}) token usage: {usage}")
+    record_token_usage(usage)
+    routing = RoutingDecision(**{**prepared.routing, "routes": dict(Counter(prepared.routes))})
+    result = {**result, "token_usage": [usage], "routing": [routing]}
+
+    if errors:
+        result["errors"] = errors
+    return result
+
+
+def _token_usage(branch: str, system_prompt: str, user_prompts: List[str], responses: List[Any],
+                 repair_requests: int = 0) -> TokenUsage:
+    """Local prompt token counts plus the usage the model reported (including prompt cache reads)."""
+    usage = TokenUsage(branch=branch, requests=len(user_prompts), static_tokens=0, prompt_tokens=0,
+                       input_tokens=0, cached_tokens=0, output_tokens=0, repair_requests=repair_requests)
+    for user_prompt, response in zip(user_prompts, responses):
+        counts = countPromptTokens(system_prompt, user_prompt)
+        usage["static_tokens"] = counts["static_tokens"]
+        usage["prompt_tokens"] += counts["prompt_tokens"]
+
+        if isinstance(response, dict):
+            response = response.get("raw")
+        reported = getattr(response, "usage_metadata", None) or {}
+        usage["input_tokens"] += reported.get("input_tokens", 0)
+        usage["output_tokens"] += reported.get("output_tokens", 0)
+        usage["cached_tokens"] += (reported.get("input_token_details") or {}).get("cache_read", 0)
+    return usage
+
+
+def _stream_writer() -> Optional[Callable[[Any], None]]:
+    """
+    The graph's custom stream writer when AUDIT_STREAMING is on and the run asked for violations
+    (`with_violation_stream`). LangGraph hands out a writer under plain invoke() too, so the
+    writer alone doesn't mean anyone reads the stream; without the flag the structured output path is kept.
+    """
+    if not settings.AUDIT_STREAMING:
+        return None
+    try:
+        if not get_config().get("configurable", {}).get("stream_violations"):
+            return None
+        return get_stream_writer()
+    except RuntimeError:
+        return None
+
 
-    # Step 4: Intalize the Vector Store
-    vector_store = getVectorStore(embedding)
+def _issue_emitter(writer: Callable[[Any], None], branch: str, label: str,
+                   segments: List[TranscriptSegment]) -> Callable[[Dict[str, Any]], None]:
+    """Writes one streamed violation (before the cross-window merge) to the custom stream."""
+    def emit(issue: Dict[str, Any]) -> None:
+        compliance_issue = _to_compliance_issues({"compliance_results": [issue]}, segments)[0]
+        writer({"type": "violation", "branch": branch, "window": label, "issue": compliance_issue})
+    return emit
 
-    # Step5: RAG (Implmentation)
-    # Step5.5 Get OCR text from the state
-    ocr_text = state.get("ocr_text", [])
 
-    # Step5.6 Combine Transcript and OCR
-    query_text = f"{transcript} {' '.join(ocr_text)}"
+def _invoke_routed(messages: List[list], routes: List[str],
+                   on_issue: Optional[List[Optional[Callable]]] = None) -> List[Any]:
+    """
+    Batches the messages per route and returns the responses in the original order.
+    "cheap" uses AZURE_OPEN_AI_SCREENING_DEPLOYMENT (the main deployment if unset), "skip" and "screened" get None.
+    Requests with an `on_issue` callback are streamed.
+    """
+    on_issue = on_issue or [None] * len(messages)
+    responses: List[Any] = [None] * len(messages)
+
+    for route in ("full", "cheap"):
+        indexes = [i for i, r in enumerate(routes) if r == route]
+        if not indexes:
+            continue
+        deployment = _route_deployment(route)
+        llm = _audit_llm(deployment)
+        # LLM_CONCURRENCY caps calls across all audits in the process, AUDIT_MAX_PARALLEL within this one
+        limited_llm = RunnableLambda(lambda request: (
+            _stream_with_slot(getLLMClient(deployment), request[0], request[1], deployment) if request[1]
+            else _invoke_with_slot(llm, request[0], deployment)
+        ))
+        batch = limited_llm.batch(
+            [(messages[i], on_issue[i]) for i in indexes],
+            config={"max_concurrency": settings.AUDIT_MAX_PARALLEL},
+            return_exceptions=True
+        )
+        for i, response in zip(indexes, batch):
+            responses[i] = response
 
-    # Step5.7 - Similarity Search
-    docs = vector_store.similarity_search(query_text, k=5)
+    return responses
 
-    # Step5.8 - Combine the retrived information
-    retrieved_rules = "\n\n".join([doc.page_content for doc in docs])
 
-    # Step 6 - System Prompt for the LLM (Role of the LLM)
-    system_prompt = setSystemPrompt(retrieved_rules)
+async def _ainvoke_routed(messages: List[list], routes: List[str],
+                          on_issue: Optional[List[Optional[Callable]]] = None) -> List[Any]:
+    """Async `_invoke_routed`: both routes run at once, AUDIT_MAX_PARALLEL requests at a time."""
+    on_issue = on_issue or [None] * len(messages)
+    parallel = asyncio.Semaphore(settings.AUDIT_MAX_PARALLEL)
+    llms = {route: _audit_llm(_route_deployment(route)) for route in set(routes) if route not in NO_CALL_ROUTES}
 
-    # Step 7 - Set User Input
-    user_message = f"""
-    VIDEO METADATA: {state.get('video_meta_data', {})}
-    TRANSCRIPT: {transcript}
-    ON-SCREEN TEXT (OCR): {ocr_text}
+    async def call(i: int):
+        if routes[i] in NO_CALL_ROUTES:
+            return None
+        async with parallel:
+            if on_issue[i]:
+                deployment = _route_deployment(routes[i])
+                return await _astream_with_slot(getLLMClient(deployment), messages[i], on_issue[i], deployment)
+            return await _ainvoke_with_slot(llms[routes[i]], messages[i], _route_deployment(routes[i]))
+
+    return list(await asyncio.gather(*(call(i) for i in range(len(messages))), return_exceptions=True))
+
+
+def _route_deployment(route: str):
+    return (settings.AZURE_OPEN_AI_SCREENING_DEPLOYMENT or None) if route == "cheap" else None
+
+
+def _audit_llm(deployment):
     """
+    The auditor model bound to the AuditResult schema (AUDIT_OUTPUT_MODE). The raw
+    message is kept alongside the parsed result for token usage and fallback parsing.
+    """
+    llm = getLLMClient(deployment)
+    if settings.AUDIT_OUTPUT_MODE == "text":
+        return llm
+    return llm.with_structured_output(AuditResult, method=settings.AUDIT_OUTPUT_MODE, include_raw=True)
 
-    # Step 8 - Invoking the LLM with System prompt and UserMessage
-    try: 
-        response = llm.invoke(
-            [
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=user_message)
-            ]
-        )
 
-        # Step 9 - Cleaning the output of LLM 
-        content = response.content
-        if "```" in content:
-            # Regex to find JSON inside code blocks
-            content = re.search(r"```(?:json)?(.*?)```", content, re.DOTALL).group(1)
+class StreamInterruptedError(Exception):
+    """A streamed answer broke off after violations were emitted; retrying it would emit them twice."""
 
-        audit_data = json.loads(content.strip())
 
-        return {
-            "compliance_results": [
-                ComplianceIssue(
-                    category=issue.get("category", "Unknown"),
-                    sub_category=issue.get("sub_category"),
-                    severity=issue.get("severity", "MEDIUM"),
-                    description=issue.get("description", ""),
-                    flagged_text=issue.get("flagged_text"),
-                    time_stamp=issue.get("time_stamp"),
-                    target_group=issue.get("target_group"),
-                    legal_reference=issue.get("legal_reference")
-                )
-                for issue in audit_data.get("compliance_results", [])
-            ],
-            "final_report_status": audit_data.get("status", "FAIL"),
-            "final_report": audit_data.get("final_report", "No report generated.")
-        }
+def _request_tokens(deployment, request_messages: list) -> int:
+    """Prompt plus expected answer tokens, counted against the deployment's TPM quota (when one is set)."""
+    if not get_limiter(llm_endpoint(deployment)).limits_tokens:
+        return 0
+    return sum(count_tokens(str(message.content)) for message in request_messages) + settings.RATE_LIMIT_OUTPUT_TOKENS
 
-    except Exception as e:
-        logger.error(f"System Error in Auditor Node: {str(e)}")
-        # Log the raw response to see what went wrong
-        logger.error(f"Raw LLM Response: {response.content if 'response' in locals() else 'None'}")
-        return {
-            "errors": [str(e)],
-            "final_report_status": "FAIL"
-        }
\ No newline at end of file
+
+def _settle_tokens(deployment, estimated_tokens: int, response: Any) -> None:
+    if isinstance(response, dict):
+        response = response.get("raw")
+    reported = getattr(response, "usage_metadata", None) or {}
+    get_limiter(llm_endpoint(deployment)).settle(estimated_tokens, reported.get("total_tokens"))
+
+
+def _invoke_with_slot(llm, request_messages: list, deployment=None):
+    """One model call within the deployment's quota, retried while Azure throttles (services/rate_limiter)."""
+    tokens = _request_tokens(deployment, request_messages)
+
+    def call():
+        with stage_slot("llm"), traced_stage("llm.invoke"):
+            return llm.invoke(request_messages)
+
+    response = call_with_retry(llm_endpoint(deployment), call, tokens)
+    _settle_tokens(deployment, tokens, response)
+    return response
+
+
+def _stream_with_slot(llm, request_messages: list, on_issue: Callable[[Dict[str, Any]], None], deployment=None):
+    """
+    Streams the plain-JSON answer, calling `on_issue` for every compliance_results
+    entry as soon as it's complete. Returns the whole message for normal parsing.
+    Only a stream that failed before its first chunk is retried.
+    """
+    tokens = _request_tokens(deployment, request_messages)
+
+    def call():
+        parser = IssueStreamParser()
+        message = None
+        with stage_slot("llm"), traced_stage("llm.stream"):
+            try:
+                for chunk in llm.stream(request_messages):
+                    message = chunk if message is None else message + chunk
+                    for issue in parser.feed(str(chunk.content)):
+                        on_issue(issue)
+            except Exception as e:
+                if message is None:
+                    raise
+                raise StreamInterruptedError(f"Answer stream interrupted: {e}") from e
+        return message
+
+    message = call_with_retry(llm_endpoint(deployment), call, tokens)
+    _settle_tokens(deployment, tokens, message)
+    return message
+
+
+async def _ainvoke_with_slot(llm, request_messages: list, deployment=None):
+    """Async `_invoke_with_slot`."""
+    tokens = await asyncio.to_thread(_request_tokens, deployment, request_messages)
+
+    async def call():
+        async with async_stage_slot("llm"):
+            with traced_stage("llm.invoke"):
+                return await llm.ainvoke(request_messages)
+
+    response = await acall_with_retry(llm_endpoint(deployment), call, tokens)
+    _settle_tokens(deployment, tokens, response)
+    return response
+
+
+async def _astream_with_slot(llm, request_messages: list, on_issue: Callable[[Dict[str, Any]], None], deployment=None):
+    """Async `_stream_with_slot`."""
+    tokens = await asyncio.to_thread(_request_tokens, deployment, request_messages)
+
+    async def call():
+        parser = IssueStreamParser()
+        message = None
+        async with async_stage_slot("llm"):
+            with traced_stage("llm.stream"):
+                try:
+                    async for chunk in llm.astream(request_messages):
+                        message = chunk if message is None else message + chunk
+                        for issue in parser.feed(str(chunk.content)):
+                            on_issue(issue)
+                except Exception as e:
+                    if message is None:
+                        raise
+                    raise StreamInterruptedError(f"Answer stream interrupted: {e}") from e
+        return message
+
+    message = await acall_with_retry(llm_endpoint(deployment), call, tokens)
+    _settle_tokens(deployment, tokens, message)
+    return message
+
+
+def _read_routed(response: Any, route: str) -> Optional[Tuple[Dict[str, Any], int]]:
+    if route in NO_CALL_ROUTES:
+        return None
+    if isinstance(response, Exception):
+        raise response
+    return _read_audit_result(response, route)
+
+
+async def _aread_routed(response: Any, route: str) -> Optional[Tuple[Dict[str, Any], int]]:
+    if route in NO_CALL_ROUTES:
+        return None
+    if isinstance(response, Exception):
+        raise response
+    return await _aread_audit_result(response, route)
+
+
+def _parse_audit_answer(response: Any) -> Tuple[Optional[Dict[str, Any]], str, Optional[Dict[str, Any]], str]:
+    """
+    Steps 1-2 of `_read_audit_result`. Returns (result, answer text, salvaged partial result, error);
+    `result` is None when the answer needs a repair.
+    """
+    raw, audit_data, error = read_response(response)
+    if audit_data is not None:
+        return audit_data, "", None, ""
+
+    answer = raw_text(raw)
+    try:
+        data, complete = parse_audit_json(answer)
+        data = validate_audit_result(data)
+        if complete:
+            return data, answer, None, ""
+        return None, answer, data, "The JSON answer is truncated"
+    except AuditParseError as e:
+        return None, answer, None, str(e)
+
+
+def _repair_messages(answer: str, error: str) -> list:
+    logger.warning(f"Malformed auditor answer ({error}), asking for a repair")
+    return [SystemMessage(content=REPAIR_INSTRUCTIONS), HumanMessage(content=setRepairPrompt(answer, error))]
+
+
+def _read_repaired(repaired: Any) -> Tuple[Optional[Dict[str, Any]], str]:
+    try:
+        data, complete = parse_audit_json(raw_text(repaired))
+        if complete:
+            return validate_audit_result(data), ""
+        return None, "The repaired JSON is truncated"
+    except AuditParseError as e:
+        return None, str(e)
+
+
+def _salvage(salvaged: Optional[Dict[str, Any]], error: str) -> Dict[str, Any]:
+    if salvaged is not None:
+        logger.warning(f"Using the partially parsed auditor answer: {error}")
+        return salvaged
+    raise AuditParseError(error)
+
+
+def _read_audit_result(response: Any, route: str) -> Tuple[Dict[str, Any], int]:
+    """
+    Returns (audit result, repair calls made):
+    1. the schema-validated structured output when the model produced it
+    2. otherwise a tolerant parse of the raw answer
+    3. a broken or truncated answer is sent back alone for a targeted repair
+       (AUDIT_REPAIR_RETRIES times), instead of re-running the whole audit
+    What could be salvaged from a truncated answer is used if the repair fails too.
+    """
+    audit_data, answer, salvaged, error = _parse_audit_answer(response)
+    if audit_data is not None:
+        return audit_data, 0
+
+    repairs = 0
+    deployment = _route_deployment(route)
+    for _ in range(settings.AUDIT_REPAIR_RETRIES):
+        repairs += 1
+        repaired = _invoke_with_slot(getLLMClient(deployment), _repair_messages(answer, error), deployment)
+        audit_data, error = _read_repaired(repaired)
+        if audit_data is not None:
+            return audit_data, repairs
+
+    return _salvage(salvaged, error), repairs
+
+
+async def _aread_audit_result(response: Any, route: str) -> Tuple[Dict[str, Any], int]:
+    """Async `_read_audit_result`, the repair call is awaited."""
+    audit_data, answer, salvaged, error = _parse_audit_answer(response)
+    if audit_data is not None:
+        return audit_data, 0
+
+    repairs = 0
+    deployment = _route_deployment(route)
+    for _ in range(settings.AUDIT_REPAIR_RETRIES):
+        repairs += 1
+        repaired = await _ainvoke_with_slot(getLLMClient(deployment), _repair_messages(answer, error), deployment)
+        audit_data, error = _read_repaired(repaired)
+        if audit_data is not None:
+            return audit_data, repairs
+
+    return _salvage(salvaged, error), repairs
+
+
+def _to_compliance_issues(audit_data: Dict[str, Any], segments: List[TranscriptSegment]) -> List[ComplianceIssue]:
+    """
+    Builds ComplianceIssues from the LLM payload. The time stamp comes from the
+    transcript segment containing the flagged text when it can be located.
+    """
+    return [
+        ComplianceIssue(
+            category=issue.get("category", "Unknown"),
+            sub_category=issue.get("sub_category"),
+            severity=issue.get("severity", "MEDIUM"),
+            description=issue.get("description", ""),
+            flagged_text=issue.get("flagged_text"),
+            time_stamp=locate_timestamp(issue.get("flagged_text"), segments) or issue.get("time_stamp"),
+            target_group=issue.get("target_group"),
+            legal_reference=issue.get("legal_reference")
+        )
+        for issue in audit_data.get("compliance_results", [])
+    ]
@@ -0,0 +1,181 @@
+import re
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.utils.json import parse_partial_json
+
+logger = logging.getLogger("audit-output-parser")
+
+AUDIT_STATUSES = ("PASS", "FAIL")
+
+
+class AuditParseError(ValueError):
+    """The auditor's answer couldn't be turned into an audit result."""
+
+
+def raw_text(message: Any) -> str:
+    """The answer as text: message content, or the tool call arguments under function calling."""
+    content = getattr(message, "content", message)
+    if isinstance(content, str) and content.strip():
+        return content
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        return json.dumps(tool_call.get("args", {}))
+    for tool_call in getattr(message, "invalid_tool_calls", None) or []:
+        return tool_call.get("args") or ""
+    return content if isinstance(content, str) else ""
+
+
+def _json_body(text: str) -> str:
+    """Strips a (possibly unterminated) code fence and anything before the first "{"."""
+    fenced = re.search(r"```(?:json)?(.*?)(?:```|$)", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    start = text.find("{")
+    if start < 0:
+        raise AuditParseError("No JSON object in the answer")
+    return text[start:].strip()
+
+
+def parse_audit_json(text: str) -> Tuple[Dict[str, Any], bool]:
+    """
+    Tolerant parse of the auditor's JSON answer. Returns (data, complete):
+    - strict json.loads, then the first complete object followed by trailing prose
+    - otherwise the streaming partial-JSON parser closes open strings/lists/objects
+      of a truncated answer; `complete` is False and the data may be missing fields
+    """
+    body = _json_body(text)
+    try:
+        return json.loads(body), True
+    except json.JSONDecodeError:
+        pass
+    try:
+        data, _ = json.JSONDecoder().raw_decode(body)
+        return data, True
+    except json.JSONDecodeError:
+        pass
+
+    data = parse_partial_json(body)
+    if not isinstance(data, dict):
+        raise AuditParseError("Malformed JSON that couldn't be recovered")
+    return data, False
+
+
+class IssueStreamParser:
+    """
+    Incremental parser for a streamed audit answer. Tracks strings and nesting
+    character by character (each character is looked at once) and returns every
+    `compliance_results` entry as soon as its closing brace arrives.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._in_results = False
+        self._issue_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        start = len(self._text)
+        self._text += chunk
+        issues = []
+        for i in range(start, len(self._text)):
+            ch = self._text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = self._text[self._string_start + 1:i]
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                # root object -> "compliance_results" list -> issue object
+                if ch == "[" and len(self._stack) == 1 and self._last_string == "compliance_results":
+                    self._in_results = True
+                if ch == "{" and self._in_results and len(self._stack) == 2:
+                    self._issue_start = i
+                self._stack.append(ch)
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if ch == "}" and self._in_results and len(self._stack) == 2 and self._issue_start is not None:
+                    try:
+                        issue = json.loads(self._text[self._issue_start:i + 1])
+                        if isinstance(issue, dict):
+                            issues.append(issue)
+                    except json.JSONDecodeError:
+                        logger.warning("Skipping a streamed issue that isn't valid JSON")
+                    self._issue_start = None
+                elif ch == "]" and self._in_results and len(self._stack) == 1:
+                    self._in_results = False
+        return issues
+
+
+def validate_audit_result(data: Any) -> Dict[str, Any]:
+    """
+    Checks the payload against the AuditResult schema and fills what can be
+    inferred: a missing status follows from the findings, a missing report is empty.
+    """
+    if not isinstance(data, dict):
+        raise AuditParseError(f"Expected a JSON object, got {type(data).__name__}")
+
+    issues = data.get("compliance_results", [])
+    if not isinstance(issues, list):
+        raise AuditParseError("compliance_results is not a list")
+    issues = [issue for issue in issues if isinstance(issue, dict) and (issue.get("category") or issue.get("description"))]
+
+    status = str(data.get("status") or "").upper()
+    if status not in AUDIT_STATUSES:
+        status = "FAIL" if issues else "PASS"
+
+    return {"compliance_results": issues, "status": status, "final_report": str(data.get("final_report") or "")}
+
+
+def parse_screening_scores(text: str, count: int) -> List[float]:
+    """
+    Risk scores of the screening model's answer ({"scores": [{"id", "risk"}]}), one per
+    segment. A segment the answer leaves out scores 1.0, so it's escalated rather than missed.
+    """
+    try:
+        data = json.loads(_json_body(text))
+    except json.JSONDecodeError:
+        data = parse_partial_json(_json_body(text))
+    entries = data.get("scores") if isinstance(data, dict) else None
+    if not isinstance(entries, list):
+        raise AuditParseError("No scores list in the screening answer")
+
+    scores = [1.0] * count
+    for entry in entries:
+        try:
+            index = int(entry["id"]) - 1
+            risk = float(entry["risk"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 0 <= index < count:
+            scores[index] = min(max(risk, 0.0), 1.0)
+    return scores
+
+
+def read_response(response: Any) -> Tuple[Any, Optional[Dict[str, Any]], str]:
+    """
+    Splits a model response into (raw message, validated result or None, error).
+    Handles both structured-output dicts ({"raw", "parsed", "parsing_error"}) and plain messages.
+    """
+    if isinstance(response, dict) and "raw" in response:
+        raw, parsed, parsing_error = response["raw"], response.get("parsed"), response.get("parsing_error")
+        if parsed is not None and not parsing_error:
+            try:
+                return raw, validate_audit_result(parsed), ""
+            except AuditParseError as e:
+                return raw, None, str(e)
+        return raw, None, str(parsing_error or "No structured output")
+    return response, None, "Plain text answer"
@@ -1,10 +1,13 @@
-def setSystemPrompt(retrieved_rules: str) -> str:
+from typing import Any, Dict, List
 
-    HATE_SPEECH_AUDITOR_SYSTEM_PROMPT = f"""
-You are a Senior Content Moderation Specialist with expertise in Indian hate speech laws and social context.
+from backend.src.config.settings import settings
+from backend.src.graph.chunking import count_tokens, truncate_tokens
 
-RELEVANT INDIAN LAWS & GUIDELINES:
-{retrieved_rules}
+# Static instructions come first and never change between audits, so the provider
+# can cache them as a prompt prefix. Everything variable (rules, branch label,
+# video content) goes after them.
+AUDITOR_INSTRUCTIONS = """
+You are a Senior Content Moderation Specialist with expertise in Indian hate speech laws and social context.
 
 HATE SPEECH CATEGORIES TO DETECT:
 1. Religious Hate Speech (IPC 153A, 295A) - Inciting hatred between religious groups
@@ -21,14 +24,15 @@ SEVERITY LEVELS:
 - LOW: Potentially offensive content requiring context review
 
 INSTRUCTIONS:
-1. Analyze the Transcript and OCR text for hate speech violations.
-2. Consider Indian cultural and linguistic context (including transliterated Hindi/regional language slurs).
-3. Identify the target group and nature of each violation.
-4. Return strictly JSON in the following format:
+1. Analyze the content under review (named at the end of this prompt, given in the user message) for hate speech violations.
+2. Apply the relevant Indian laws & guidelines listed at the end of this prompt.
+3. Consider Indian cultural and linguistic context (including transliterated Hindi/regional language slurs).
+4. Identify the target group and nature of each violation.
+5. Return strictly JSON in the following format:
 
-{{
+{
     "compliance_results": [
-        {{
+        {
             "category": "Religious Hate Speech",
             "sub_category": "Anti-Muslim",
             "severity": "HIGH",
@@ -37,11 +41,11 @@ INSTRUCTIONS:
             "time_stamp": "00:01:23",
             "target_group": "Muslims",
             "legal_reference": "IPC 153A"
-        }}
+        }
     ],
     "status": "FAIL",
     "final_report": "Summary of findings with recommendations..."
-}}
+}
 
 If no violations are found, set "status" to "PASS" and "compliance_results" to [].
 
@@ -51,4 +55,65 @@ IMPORTANT:
 - Flag uncertain cases with severity "LOW" for human review.
 """
 
-    return HATE_SPEECH_AUDITOR_SYSTEM_PROMPT
\ No newline at end of file
+REPAIR_INSTRUCTIONS = """
+You fix malformed JSON produced by a content moderation auditor.
+Return ONLY the corrected JSON object with the keys "compliance_results", "status" and "final_report".
+Keep every finding and its wording exactly as given; only fix the syntax and close anything left unterminated.
+"""
+
+# Compact prompt of the screening model (AUDIT_ROUTING=tiered): a risk score per numbered segment,
+# no rules and no report, so the call stays small and the answer short
+SCREENING_INSTRUCTIONS = """
+You screen video content for possible hate speech in the Indian context (religious, caste, communal,
+regional/linguistic, gender or ethnic/tribal hatred, including coded and transliterated slurs).
+For every numbered segment in the user message, estimate the risk that it contains such content,
+from 0.0 (clearly harmless) to 1.0 (clearly hateful). When unsure, score higher rather than lower.
+Return ONLY JSON: {"scores": [{"id": 1, "risk": 0.0}, {"id": 2, "risk": 0.8}]}
+"""
+
+_instruction_tokens = None
+
+
+def setSystemPrompt(retrieved_rules: str, content_label: str = "the Transcript and OCR text") -> str:
+    """Static instructions, then the rules (trimmed to PROMPT_MAX_RULE_TOKENS), then the branch label."""
+    rules = truncate_tokens(retrieved_rules, settings.PROMPT_MAX_RULE_TOKENS)
+
+    HATE_SPEECH_AUDITOR_SYSTEM_PROMPT = f"""{AUDITOR_INSTRUCTIONS}
+RELEVANT INDIAN LAWS & GUIDELINES:
+{rules}
+
+CONTENT UNDER REVIEW: {content_label}
+"""
+
+    return HATE_SPEECH_AUDITOR_SYSTEM_PROMPT
+
+
+def setUserPrompt(metadata: Dict[str, Any], content: str) -> str:
+    """Video metadata and the content to audit, trimmed to PROMPT_MAX_CONTENT_TOKENS."""
+    return f"VIDEO METADATA: {metadata}\n{truncate_tokens(content, settings.PROMPT_MAX_CONTENT_TOKENS)}"
+
+
+def setScreeningPrompt(items: List[str]) -> str:
+    """Numbered segments for the screening model, trimmed to PROMPT_MAX_CONTENT_TOKENS."""
+    content = "\n".join(f"[{i}] {item}" for i, item in enumerate(items, start=1))
+    return f"SEGMENTS:\n{truncate_tokens(content, settings.PROMPT_MAX_CONTENT_TOKENS)}"
+
+
+def setRepairPrompt(broken_answer: str, error: str) -> str:
+    """Only the malformed answer is sent back, not the rules or the audited content."""
+    return f"PARSE ERROR: {error}\n\nMALFORMED ANSWER:\n{truncate_tokens(broken_answer, settings.PROMPT_MAX_CONTENT_TOKENS)}"
+
+
+def countPromptTokens(system_prompt: str, user_prompt: str) -> Dict[str, int]:
+    """Local token counts of one request; `static_tokens` is the cacheable prefix."""
+    global _instruction_tokens
+    if _instruction_tokens is None:
+        _instruction_tokens = count_tokens(AUDITOR_INSTRUCTIONS)
+    system_tokens = count_tokens(system_prompt)
+    user_tokens = count_tokens(user_prompt)
+    return {
+        "static_tokens": _instruction_tokens,
+        "system_tokens": system_tokens,
+        "user_tokens": user_tokens,
+        "prompt_tokens": system_tokens + user_tokens
+    }
@@ -0,0 +1,132 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+from langchain_core.documents import Document
+
+from backend.src.config.settings import settings, getEmbedding, getVectorStore
+from backend.src.graph.chunking import count_tokens
+from backend.src.services.instrumentation import traced_stage
+
+logger = logging.getLogger("rule-retrieval")
+
+# Reciprocal rank fusion constant (the usual value from the RRF paper)
+RRF_K = 60
+
+# Assembled rule sets, keyed by their chunk IDs
+RULE_SET_CACHE_SIZE = 256
+_rule_sets: "OrderedDict[Tuple[str, ...], str]" = OrderedDict()
+_rule_sets_lock = threading.Lock()
+
+
+def group_queries(texts: List[str], max_tokens: int, max_queries: int) -> List[str]:
+    """
+    Packs consecutive texts (transcript segments, OCR lines, ...) into retrieval
+    queries of about `max_tokens`, widening (and if needed merging) the queries so
+    there are at most `max_queries`. Every text ends up in one of them.
+    """
+    texts = [text.strip() for text in texts if text and text.strip()]
+    if not texts:
+        return []
+
+    sizes = [count_tokens(text) for text in texts]
+    max_tokens = max(max_tokens, -(-sum(sizes) // max_queries))
+
+    groups, current, current_tokens = [], [], 0
+    for text, size in zip(texts, sizes):
+        if current and current_tokens + size > max_tokens:
+            groups.append((current, current_tokens))
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += size
+    groups.append((current, current_tokens))
+
+    # Packing can still leave a few groups too many: merge the smallest neighbours
+    # rather than dropping the tail, so late content keeps its rules
+    while len(groups) > max(max_queries, 1):
+        i = min(range(len(groups) - 1), key=lambda j: groups[j][1] + groups[j + 1][1])
+        groups[i:i + 2] = [(groups[i][0] + groups[i + 1][0], groups[i][1] + groups[i + 1][1])]
+    return [" ".join(group) for group, _ in groups]
+
+
+def _chunk_key(doc: Document) -> str:
+    return doc.id or doc.metadata.get("id") or hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+
+
+def _search_all(vector_store, vectors: List[List[float]], k: int) -> List[List[Document]]:
+    """One batched search on the local index, concurrent single searches on remote stores."""
+    if hasattr(vector_store, "similarity_search_by_vectors"):
+        return vector_store.similarity_search_by_vectors(vectors, k=k)
+    with ThreadPoolExecutor(max_workers=min(8, len(vectors))) as executor:
+        return list(executor.map(lambda vector: vector_store.similarity_search_by_vector(vector, k=k), vectors))
+
+
+def fuse_results(result_lists: List[List[Document]], token_budget: int) -> List[Document]:
+    """
+    Unions the per-query hits, re-ranks them by reciprocal rank fusion (a rule
+    hit by many queries beats one hit once) and keeps the best under `token_budget`.
+    """
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results):
+            key = _chunk_key(doc)
+            docs.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (RRF_K + rank + 1)
+
+    selected, used_tokens = [], 0
+    for key in sorted(scores, key=lambda chunk_key: (-scores[chunk_key], chunk_key)):
+        tokens = count_tokens(docs[key].page_content)
+        if selected and used_tokens + tokens > token_budget:
+            continue
+        selected.append(docs[key])
+        used_tokens += tokens
+    return selected
+
+
+def assemble_rule_set(docs: List[Document]) -> str:
+    """
+    Joins the rule chunks in a canonical order (source, page, chunk ID), memoized
+    by the set of chunk IDs: the same rules always produce the exact same text,
+    so the system prompt stays byte-identical and provider-side prompt caching hits.
+    """
+    ordered = sorted(docs, key=lambda doc: (str(doc.metadata.get("source", "")), str(doc.metadata.get("page", "")), _chunk_key(doc)))
+    key = tuple(_chunk_key(doc) for doc in ordered)
+
+    with _rule_sets_lock:
+        if key in _rule_sets:
+            _rule_sets.move_to_end(key)
+            return _rule_sets[key]
+
+    rules = "\n\n".join(doc.page_content for doc in ordered)
+    with _rule_sets_lock:
+        _rule_sets[key] = rules
+        if len(_rule_sets) > RULE_SET_CACHE_SIZE:
+            _rule_sets.popitem(last=False)
+    return rules
+
+
+def retrieve_rules(texts: List[str]) -> str:
+    """
+    RAG over many queries:
+    - groups the content into RETRIEVAL_QUERY_TOKENS sized queries (at most RETRIEVAL_MAX_QUERIES)
+    - embeds them all in one batched request
+    - runs the top-k searches, fuses and de-duplicates the hits under RETRIEVAL_TOKEN_BUDGET
+    """
+    queries = group_queries(texts, settings.RETRIEVAL_QUERY_TOKENS, settings.RETRIEVAL_MAX_QUERIES)
+    if not queries:
+        return ""
+
+    embedding = getEmbedding()
+    vector_store = getVectorStore(embedding)
+    with traced_stage("retrieval.embed", queries=len(queries)):
+        vectors = embedding.embed_documents(queries)
+    with traced_stage("retrieval.search", queries=len(queries)):
+        result_lists = _search_all(vector_store, vectors, settings.RETRIEVAL_TOP_K)
+
+    docs = fuse_results(result_lists, settings.RETRIEVAL_TOKEN_BUDGET)
+    logger.info(f"Retrieved {len(docs)} rule chunks from {len(queries)} queries")
+    return assemble_rule_set(docs)
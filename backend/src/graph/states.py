@@ -14,21 +14,77 @@ class ComplianceIssue(TypedDict):
     legal_reference: Optional[str]  # Relevant Indian law (IPC 153A, 295A, SC/ST Act, etc.)
 
 
+class AuditResult(TypedDict):
+    """Schema the auditor LLM answers with (bound via structured output)."""
+    compliance_results: List[ComplianceIssue]
+    status: str  # "PASS" or "FAIL"
+    final_report: str
+
+
+class TranscriptSegment(TypedDict):
+    text: str
+    start: Optional[str]  # e.g., "0:01:23.45" as reported by Video Indexer
+    end: Optional[str]
+    speaker: Optional[int]  # Video Indexer speakerId
+    language: Optional[str]  # e.g., "hi-IN"
+    confidence: Optional[float]
+
+class VideoInsight(TypedDict):
+    name: str  # Label / location name, or the audio effect type
+    confidence: Optional[float]  # Highest confidence over the instances
+    instances: List[List[Optional[str]]]  # [start, end] pairs
+
+class AuditReport(TypedDict):
+    branch: str  # "transcript", "ocr" or "metadata"
+    status: str  # "PASS", "FAIL", "ERROR" or "SKIPPED"
+    report: str
+
+class TokenUsage(TypedDict):
+    branch: str
+    requests: int  # LLM calls made by the branch
+    static_tokens: int  # Cacheable instruction prefix (per request)
+    prompt_tokens: int  # Counted locally before sending
+    input_tokens: int  # As reported by the model
+    cached_tokens: int  # Input tokens served from the provider's prompt cache
+    output_tokens: int
+    repair_requests: int  # Extra calls made to fix malformed answers
+
+
+class RoutingDecision(TypedDict):
+    branch: str
+    mode: str  # AUDIT_ROUTING: "prefilter" or "tiered"
+    requests: int  # Audit requests (windows) of the branch
+    routes: Dict[str, int]  # Requests per route: "full", "cheap", "skip" (lexicon) or "screened" (cleared by screening)
+    screened_items: int  # Segments / lines scored by the screening model
+    escalated_items: int  # Of those, sent on to the full model (context segments included)
+    max_risk: Optional[float]
+    screening_failures: int  # Screening calls that failed or couldn't be parsed; their requests are escalated whole
+    screening_tokens: int  # Input + output tokens of the screening calls
+    screening_seconds: float
+
 
 # Global State Shared thoughtout workflow
 class VideoAuditState(TypedDict):
     # Input
     video_url: str
     video_id: str
+    youtube_id: Optional[str]
+    priority: Optional[str]  # "interactive" (default) or "bulk": lane of the Azure rate limiters
 
     # Injestion 
+    azure_video_id: Optional[str]  # Recorded right after upload, a resumed audit reuses it
     local_file_path: Optional[str]
     ocr_text: List[str]
     transcript: Optional[str]
+    transcript_segments: List[TranscriptSegment]
     video_meta_data: Dict[str, Any]
+    video_insights: Dict[str, List[VideoInsight]]  # Extra insight types from VI_INSIGHT_TYPES, e.g. "labels"
 
     # Analysis Output
     compliance_results: Annotated[List[ComplianceIssue], operator.add]
+    audit_reports: Annotated[List[AuditReport], operator.add]  # One per parallel audit branch
+    token_usage: Annotated[List[TokenUsage], operator.add]  # One per audited branch (not on cache hits)
+    routing: Annotated[List[RoutingDecision], operator.add]  # One per audited branch (not on cache hits)
 
     # Final Result
     final_report_status: str
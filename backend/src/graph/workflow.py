@@ -1,26 +1,69 @@
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, START, END
 from backend.src.graph.states import VideoAuditState
+from backend.src.services.instrumentation import traced
+from backend.src.services.rate_limiter import in_lane
 from backend.src.graph.nodes import (
+    ingest_video_node,
+    aingest_video_node,
     index_video_node,
-    compliance_auditor
+    aindex_video_node,
+    transcript_auditor,
+    atranscript_auditor,
+    ocr_auditor,
+    aocr_auditor,
+    metadata_auditor,
+    ametadata_auditor,
+    aggregate_results,
+    route_audits
 )
 
-def create_graph():
+
+def _node(name: str, func, afunc=None) -> RunnableLambda:
+    """
+    Traced node ("graph.<name>" span and stage duration) whose Azure calls queue in the
+    rate limiter lane of the state's `priority`. With an async implementation,
+    invoke/stream use `func` and ainvoke/astream `afunc`.
+    """
+    stage = f"graph.{name}"
+    return RunnableLambda(traced(stage)(in_lane(func)), afunc=traced(stage)(in_lane(afunc)) if afunc else None,
+                          name=func.__name__)
+
+
+def create_graph(checkpointer=None):
+    """
+    Builds the audit workflow. With a checkpointer (see graph/checkpointer.py) every
+    step is persisted per session thread, so a failed or interrupted audit can be resumed.
+    The Video Indexer and auditor nodes are async-native under ainvoke/astream, which
+    needs an async checkpointer (get_async_checkpointer).
+    """
 
     workflow = StateGraph(VideoAuditState)
 
     # Adding Nodes
-    workflow.add_node("indexer", index_video_node)
-    workflow.add_node("auditor", compliance_auditor)
+    workflow.add_node("ingest", _node("ingest", ingest_video_node, aingest_video_node))
+    workflow.add_node("indexer", _node("indexer", index_video_node, aindex_video_node))
+    workflow.add_node("transcript_auditor", _node("transcript_auditor", transcript_auditor, atranscript_auditor))
+    workflow.add_node("ocr_auditor", _node("ocr_auditor", ocr_auditor, aocr_auditor))
+    workflow.add_node("metadata_auditor", _node("metadata_auditor", metadata_auditor, ametadata_auditor))
+    workflow.add_node("aggregator", _node("aggregator", aggregate_results))
 
     # Adding Edges
-    workflow.add_edge(START, "indexer")
-    workflow.add_edge("indexer", "auditor")
-    workflow.add_edge("auditor", END)
+    # indexer fans out to the audit branches, which run concurrently and join in the aggregator
+    workflow.add_edge(START, "ingest")
+    workflow.add_edge("ingest", "indexer")
+    workflow.add_conditional_edges(
+        "indexer",
+        route_audits,
+        ["transcript_auditor", "ocr_auditor", "metadata_auditor", "aggregator"]
+    )
+    workflow.add_edge(["transcript_auditor", "ocr_auditor", "metadata_auditor"], "aggregator")
+    workflow.add_edge("aggregator", END)
 
     # Compile the Graph
-    app = workflow.compile()
+    app = workflow.compile(checkpointer=checkpointer)
 
     return app
 
+# Served by `langgraph dev`, which brings its own persistence
 app = create_graph()
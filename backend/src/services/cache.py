@@ -0,0 +1,242 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse, parse_qs
+
+from backend.src.config.settings import settings
+
+logger = logging.getLogger("audit-cache")
+
+YOUTUBE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{11}$")
+YOUTUBE_PATH_PREFIXES = ("shorts", "embed", "live", "v")
+
+# After a failed cache initialization, audits run uncached this long before connecting again
+CACHE_INIT_RETRY_SECONDS = 60
+
+
+def normalize_video_id(video_url: str) -> Optional[str]:
+    """
+    Extracts the canonical 11 character YouTube video ID from any of the
+    common URL forms (watch, youtu.be, shorts, embed, live).
+    Returns None when the URL is not a recognisable YouTube link.
+    """
+    if not video_url:
+        return None
+
+    parsed = urlparse(video_url.strip())
+    host = (parsed.hostname or "").lower()
+    path_parts = [part for part in parsed.path.split("/") if part]
+
+    candidate = None
+    if host.endswith("youtu.be") and path_parts:
+        candidate = path_parts[0]
+    elif host.endswith("youtube.com"):
+        if path_parts and path_parts[0] == "watch":
+            candidate = parse_qs(parsed.query).get("v", [None])[0]
+        elif len(path_parts) >= 2 and path_parts[0] in YOUTUBE_PATH_PREFIXES:
+            candidate = path_parts[1]
+
+    if candidate and YOUTUBE_ID_PATTERN.match(candidate):
+        return candidate
+    return None
+
+
+def content_hash(*parts: str) -> str:
+    """Stable SHA-256 fingerprint over the given text parts."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class SQLiteCacheBackend:
+    """Local disk cache with TTL expiry and least-recently-used eviction."""
+
+    def __init__(self, path: str, max_entries: int):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache(last_access)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at < now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now)
+            )
+            # Drop expired rows first, then the least recently used ones above the limit
+            self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                """
+                DELETE FROM cache WHERE key IN (
+                    SELECT key FROM cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+
+class RedisCacheBackend:
+    """Shared Redis cache. TTL is native, LRU order is tracked in a sorted set."""
+
+    def __init__(self, url: str, max_entries: int, namespace: str = "speechguard"):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("CACHE_BACKEND=redis requires the 'redis' package") from e
+
+        self.client = redis.Redis.from_url(url)
+        self.max_entries = max_entries
+        self.namespace = namespace
+        self.lru_key = f"{namespace}:lru"
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.client.get(self._key(key))
+        if value is None:
+            self.client.zrem(self.lru_key, key)
+            return None
+        self.client.zadd(self.lru_key, {key: time.time()})
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        pipe = self.client.pipeline()
+        pipe.setex(self._key(key), ttl, json.dumps(value))
+        pipe.zadd(self.lru_key, {key: time.time()})
+        pipe.execute()
+
+        overflow = self.client.zcard(self.lru_key) - self.max_entries
+        if overflow > 0:
+            evicted = [member.decode() for member, _ in self.client.zpopmin(self.lru_key, overflow)]
+            if evicted:
+                self.client.delete(*[self._key(k) for k in evicted])
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self._key(key))
+        self.client.zrem(self.lru_key, key)
+
+
+class AuditCache:
+    """
+    Two level cache for the audit workflow:
+    - insights:{video_id}              -> cleaned Video Indexer output
+    - audit:{video_id}:{fingerprint}   -> parsed compliance result for a given prompt + rules
+    Backend failures are logged and treated as a miss, the cache never fails an audit.
+    """
+
+    def __init__(self, backend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Cache read failed for {key}: {e}")
+            return None
+
+    def _set(self, key: str, value: Dict[str, Any]) -> None:
+        try:
+            self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            logger.warning(f"Cache write failed for {key}: {e}")
+
+    def get_insights(self, video_id: str) -> Optional[Dict[str, Any]]:
+        return self._get(f"insights:{video_id}")
+
+    def set_insights(self, video_id: str, insights: Dict[str, Any]) -> None:
+        self._set(f"insights:{video_id}", insights)
+
+    def get_audit(self, video_id: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        return self._get(f"audit:{video_id}:{fingerprint}")
+
+    def set_audit(self, video_id: str, fingerprint: str, result: Dict[str, Any]) -> None:
+        self._set(f"audit:{video_id}:{fingerprint}", result)
+
+
+_audit_cache: Optional[AuditCache] = None
+_audit_cache_failed_at: Optional[float] = None
+_audit_cache_lock = threading.Lock()
+
+
+def _init_backing_off() -> bool:
+    return _audit_cache_failed_at is not None and time.monotonic() - _audit_cache_failed_at < CACHE_INIT_RETRY_SECONDS
+
+
+def get_audit_cache() -> Optional[AuditCache]:
+    """
+    Returns the process wide cache configured by CACHE_BACKEND, or None if disabled.
+    A backend that fails to initialize is tried again after CACHE_INIT_RETRY_SECONDS,
+    not on every audit.
+    """
+    global _audit_cache, _audit_cache_failed_at
+
+    backend_name = settings.CACHE_BACKEND.lower()
+    if backend_name == "none":
+        return None
+
+    if _audit_cache is None:
+        if _init_backing_off():
+            return None
+        with _audit_cache_lock:
+            if _audit_cache is None:
+                if _init_backing_off():
+                    return None
+                try:
+                    if backend_name == "redis":
+                        backend = RedisCacheBackend(settings.REDIS_URL, settings.CACHE_MAX_ENTRIES)
+                    else:
+                        backend = SQLiteCacheBackend(settings.CACHE_SQLITE_PATH, settings.CACHE_MAX_ENTRIES)
+                except Exception as e:
+                    logger.error(f"Failed to initialize {backend_name} cache, caching disabled for {CACHE_INIT_RETRY_SECONDS}s: {e}")
+                    _audit_cache_failed_at = time.monotonic()
+                    return None
+                _audit_cache_failed_at = None
+                _audit_cache = AuditCache(backend, settings.CACHE_TTL_SECONDS)
+                logger.info(f"Audit cache enabled ({backend_name}, ttl={settings.CACHE_TTL_SECONDS}s)")
+
+    return _audit_cache
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterator
+
+from backend.src.config.settings import settings
+
+logger = logging.getLogger("stage-limits")
+
+
+class _StageLimit:
+    """
+    Counting semaphore shared by threads and event loops. A released slot is handed
+    to the oldest waiter directly: a threading.Event for threads, a future (woken
+    through its loop) for coroutines, so neither side can starve the other.
+    """
+
+    def __init__(self, limit: int):
+        self._lock = threading.Lock()
+        self._free = limit
+        self._waiters = deque()
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self._free > 0 and not self._waiters:
+                self._free -= 1
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+        event.wait()
+
+    async def aacquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._free > 0 and not self._waiters:
+                self._free -= 1
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+
+        future = waiter[1]
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                queued = waiter in self._waiters
+                if queued:
+                    self._waiters.remove(waiter)
+            # A slot already handed over is passed on (for a cancelled future, _wake does it)
+            if not queued and future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if isinstance(waiter, threading.Event):
+                    waiter.set()
+                    return
+                loop, future = waiter
+                try:
+                    loop.call_soon_threadsafe(self._wake, future)
+                    return
+                except RuntimeError:
+                    # Its event loop is closed, try the next waiter
+                    continue
+            self._free += 1
+
+    def _wake(self, future: asyncio.Future) -> None:
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+
+_limits: Dict[str, _StageLimit] = {}
+_limits_lock = threading.Lock()
+
+
+def _stage_limit(stage: str) -> _StageLimit:
+    limit = _limits.get(stage)
+    if limit is None:
+        with _limits_lock:
+            limit = _limits.get(stage)
+            if limit is None:
+                sizes = {
+                    "download": settings.DOWNLOAD_CONCURRENCY,
+                    "upload": settings.VI_UPLOAD_CONCURRENCY,
+                    "llm": settings.LLM_CONCURRENCY,
+                }
+                limit = _limits[stage] = _StageLimit(sizes[stage])
+    return limit
+
+
+@contextmanager
+def stage_slot(stage: str) -> Iterator[None]:
+    """
+    Process wide concurrency limit per pipeline stage ("download", "upload", "llm"),
+    shared by every audit running in this process (API jobs, batches, CLI), sync or async.
+    """
+    limit = _stage_limit(stage)
+    limit.acquire()
+    try:
+        yield
+    finally:
+        limit.release()
+
+
+@asynccontextmanager
+async def async_stage_slot(stage: str) -> AsyncIterator[None]:
+    """
+    Event loop counterpart of `stage_slot` for the async graph nodes, drawing on the same
+    per-stage slots as the threaded ones; waiting for a slot doesn't hold a thread.
+    """
+    limit = _stage_limit(stage)
+    await limit.aacquire()
+    try:
+        yield
+    finally:
+        limit.release()
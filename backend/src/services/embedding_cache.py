@@ -0,0 +1,120 @@
+import os
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from backend.src.config.settings import settings
+from backend.src.services.instrumentation import record_cache_lookup
+
+logger = logging.getLogger("embedding-cache")
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding store keyed by (model deployment, text hash).
+    Vectors are kept as raw float32 blobs in SQLite (4 bytes per dimension).
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(deployment: str, text: str) -> str:
+        return hashlib.sha256(f"{deployment}\x00{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch)
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        record_cache_lookup("embedding", True, len(found))
+        record_cache_lookup("embedding", False, len(set(keys)) - len(found))
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items.items()]
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends cache misses to the underlying model, in one batched call."""
+
+    def __init__(self, underlying: Embeddings, cache: EmbeddingCache, deployment: str):
+        self.underlying = underlying
+        self.cache = cache
+        self.deployment = deployment
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self.cache.key(self.deployment, text) for text in texts]
+        found = self.cache.get_many(keys)
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(computed)
+            found.update(computed)
+
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self.cache.key(self.deployment, text)
+        found = self.cache.get_many([key])
+        if key in found:
+            return found[key]
+
+        vector = self.underlying.embed_query(text)
+        self.cache.put_many({key: vector})
+        return vector
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_failed = False
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    Process wide embedding cache, or None when EMBEDDING_CACHE_ENABLED is off or the
+    cache file can't be opened (embeddings are then computed uncached).
+    """
+    global _embedding_cache, _embedding_cache_failed
+    if not settings.EMBEDDING_CACHE_ENABLED or _embedding_cache_failed:
+        return None
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None and not _embedding_cache_failed:
+                try:
+                    _embedding_cache = EmbeddingCache(settings.EMBEDDING_CACHE_PATH)
+                except (OSError, sqlite3.Error) as e:
+                    # Unwritable directory or corrupt database file: not worth failing the embeddings over
+                    logger.error(f"Failed to open embedding cache at {settings.EMBEDDING_CACHE_PATH}, caching disabled: {e}")
+                    _embedding_cache_failed = True
+    return _embedding_cache
@@ -0,0 +1,115 @@
+import time
+import functools
+import inspect
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from opentelemetry import metrics, trace
+
+logger = logging.getLogger("instrumentation")
+
+# Instruments are created on the global (proxy) providers, they start exporting
+# once setup_telemetry() installs the real providers and are no-ops before that
+INSTRUMENTATION_NAME = "speechguard"
+
+tracer = trace.get_tracer(INSTRUMENTATION_NAME)
+meter = metrics.get_meter(INSTRUMENTATION_NAME)
+
+# Buckets span milliseconds (cache, search) up to the hour a long video can take to index
+stage_duration = meter.create_histogram(
+    "speechguard.stage.duration", unit="s",
+    description="Duration of a pipeline stage (Video Indexer call, graph node, retrieval, LLM call)",
+    explicit_bucket_boundaries_advisory=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600]
+)
+llm_tokens = meter.create_histogram(
+    "speechguard.llm.tokens", unit="{token}",
+    description="Tokens per audited branch, by kind (prompt, input, cached, output)",
+    explicit_bucket_boundaries_advisory=[0, 100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000]
+)
+upload_bytes = meter.create_histogram(
+    "speechguard.upload.bytes", unit="By",
+    description="Bytes uploaded to Video Indexer per video",
+    explicit_bucket_boundaries_advisory=[1e6, 1e7, 5e7, 1e8, 2.5e8, 5e8, 1e9, 2e9]
+)
+vi_polls = meter.create_histogram(
+    "speechguard.video_indexer.polls", unit="{request}",
+    description="Index requests made while waiting for Video Indexer to process a video",
+    explicit_bucket_boundaries_advisory=[1, 2, 3, 5, 10, 20, 50, 100]
+)
+rate_limit_wait = meter.create_histogram(
+    "speechguard.rate_limit.wait", unit="s",
+    description="Time a call waited for its endpoint's client side quota, by endpoint and lane",
+    explicit_bucket_boundaries_advisory=[0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120]
+)
+retries = meter.create_counter(
+    "speechguard.retries", unit="{retry}",
+    description="Retried Azure calls by endpoint and reason (throttled or transient)"
+)
+cache_lookups = meter.create_counter(
+    "speechguard.cache.lookups", unit="{lookup}",
+    description="Cache lookups by cache and result (hit or miss); hit rate = hit / (hit + miss)"
+)
+
+
+@contextmanager
+def traced_stage(stage: str, **attributes: Any) -> Iterator[trace.Span]:
+    """Span named after the stage plus a stage duration sample tagged with the outcome."""
+    started_at = time.perf_counter()
+    outcome = "ok"
+    # The span records the exception and sets the error status itself
+    with tracer.start_as_current_span(stage, attributes=attributes) as span:
+        try:
+            yield span
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            stage_duration.record(time.perf_counter() - started_at, {"stage": stage, "outcome": outcome})
+
+
+def traced(stage: str) -> Callable[[Callable], Callable]:
+    """Decorator form of traced_stage, for sync and async functions."""
+    def decorate(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with traced_stage(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with traced_stage(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record_cache_lookup(cache: str, hit: bool, count: int = 1) -> None:
+    if count > 0:
+        cache_lookups.add(count, {"cache": cache, "result": "hit" if hit else "miss"})
+
+
+def record_token_usage(usage: Dict[str, Any]) -> None:
+    """Token counts of one audited branch (a TokenUsage)."""
+    branch = usage.get("branch", "unknown")
+    for kind in ("prompt", "input", "cached", "output"):
+        llm_tokens.record(usage.get(f"{kind}_tokens", 0), {"branch": branch, "kind": kind})
+
+
+def record_upload(num_bytes: Optional[int], mode: str) -> None:
+    if num_bytes is not None:
+        upload_bytes.record(num_bytes, {"mode": mode})
+
+
+def record_polls(count: int, state: str) -> None:
+    vi_polls.record(count, {"state": state})
+
+
+def record_rate_limit_wait(endpoint: str, lane: str, seconds: float) -> None:
+    rate_limit_wait.record(seconds, {"endpoint": endpoint, "lane": lane})
+
+
+def record_retry(endpoint: str, reason: str) -> None:
+    retries.add(1, {"endpoint": endpoint, "reason": reason})
@@ -0,0 +1,175 @@
+import os
+import json
+import logging
+import threading
+import uuid
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+logger = logging.getLogger("local-vector-store")
+
+VECTORS_FILE = "vectors.npy"
+CHUNKS_FILE = "chunks.json"
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector index for the (small, mostly static) legal corpus.
+    - chunk embeddings live in a float32 matrix, L2-normalised so cosine similarity is a dot product
+    - the matrix is memory-mapped from `vectors.npy`, chunk text/metadata come from `chunks.json`
+    - search is exact top-k (argpartition), which at a few thousand chunks is well under a millisecond
+    Supports the same add_embeddings/delete calls index_document.py uses for Azure AI Search.
+    """
+
+    def __init__(self, index_dir: str, embedding: Optional[Embeddings] = None,
+                 embedding_factory: Optional[Callable[[], Embeddings]] = None):
+        self.index_dir = index_dir
+        # Searching by vector needs no embedding client, it's only resolved for add_texts / similarity_search
+        self._embedding = embedding
+        self._embedding_factory = embedding_factory
+        self._lock = threading.Lock()
+        self._ids: List[str] = []
+        self._chunks: List[dict] = []
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._load()
+
+    @property
+    def embedding(self) -> Embeddings:
+        if self._embedding is None:
+            if self._embedding_factory is None:
+                raise ValueError("LocalVectorStore has no embedding client to embed texts with")
+            self._embedding = self._embedding_factory()
+        return self._embedding
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self._embedding
+
+    def _load(self) -> None:
+        vectors_path = os.path.join(self.index_dir, VECTORS_FILE)
+        chunks_path = os.path.join(self.index_dir, CHUNKS_FILE)
+        if not (os.path.exists(vectors_path) and os.path.exists(chunks_path)):
+            logger.warning(f"No local vector index in {self.index_dir}, starting empty")
+            return
+
+        with open(chunks_path, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+        self._ids = [chunk["id"] for chunk in stored]
+        self._chunks = stored
+        self._matrix = np.load(vectors_path, mmap_mode="r")
+        logger.info(f"Loaded local vector index: {len(self._ids)} chunks, dim {self._matrix.shape[1] if self._ids else 0}")
+
+    def persist(self) -> None:
+        """Atomically writes the matrix and chunk table back to `index_dir`."""
+        os.makedirs(self.index_dir, exist_ok=True)
+        with self._lock:
+            matrix = np.ascontiguousarray(self._matrix, dtype=np.float32)
+            chunks = list(self._chunks)
+
+        vectors_tmp = os.path.join(self.index_dir, f"{VECTORS_FILE}.tmp")
+        chunks_tmp = os.path.join(self.index_dir, f"{CHUNKS_FILE}.tmp")
+        with open(vectors_tmp, "wb") as f:
+            np.save(f, matrix)
+        with open(chunks_tmp, "w", encoding="utf-8") as f:
+            json.dump(chunks, f)
+        os.replace(vectors_tmp, os.path.join(self.index_dir, VECTORS_FILE))
+        os.replace(chunks_tmp, os.path.join(self.index_dir, CHUNKS_FILE))
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def add_embeddings(self, text_embeddings: Iterable[Tuple[str, List[float]]],
+                       metadatas: Optional[List[dict]] = None, *, keys: Optional[List[str]] = None) -> List[str]:
+        pairs = list(text_embeddings)
+        if not pairs:
+            return []
+        # Random keys: counting from len(self._ids) reuses live ids once chunks have been deleted
+        keys = keys or [uuid.uuid4().hex for _ in pairs]
+        vectors = self._normalize(np.asarray([vector for _, vector in pairs], dtype=np.float32))
+
+        with self._lock:
+            # Re-adding a key replaces it
+            self._delete_locked(set(keys))
+            matrix = np.asarray(self._matrix, dtype=np.float32)
+            self._matrix = vectors if matrix.size == 0 else np.vstack([matrix, vectors])
+            for i, (text, _) in enumerate(pairs):
+                self._ids.append(keys[i])
+                self._chunks.append({"id": keys[i], "content": text, "metadata": metadatas[i] if metadatas else {}})
+        return keys
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        vectors = self.embedding.embed_documents(texts)
+        return self.add_embeddings(zip(texts, vectors), metadatas, keys=kwargs.get("keys") or kwargs.get("ids"))
+
+    def _delete_locked(self, ids: set) -> None:
+        keep = [i for i, chunk_id in enumerate(self._ids) if chunk_id not in ids]
+        if len(keep) == len(self._ids):
+            return
+        self._matrix = np.asarray(self._matrix)[keep]
+        self._ids = [self._ids[i] for i in keep]
+        self._chunks = [self._chunks[i] for i in keep]
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> bool:
+        if ids:
+            with self._lock:
+                self._delete_locked(set(ids))
+        return True
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        with self._lock:
+            matrix, chunks = self._matrix, self._chunks
+        if not chunks:
+            return []
+
+        query = self._normalize(np.asarray(embedding, dtype=np.float32))
+        scores = matrix @ query
+        k = min(k, len(chunks))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            (Document(id=chunks[i]["id"], page_content=chunks[i]["content"], metadata=chunks[i]["metadata"]), float(scores[i]))
+            for i in top
+        ]
+
+    def similarity_search_by_vectors(self, embeddings: List[List[float]], k: int = 4) -> List[List[Document]]:
+        """Batched top-k: every query is scored in a single matrix product."""
+        with self._lock:
+            matrix, chunks = self._matrix, self._chunks
+        if not chunks or not embeddings:
+            return [[] for _ in embeddings]
+
+        queries = self._normalize(np.asarray(embeddings, dtype=np.float32))
+        scores = queries @ matrix.T
+        k = min(k, len(chunks))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+        results = []
+        for row, candidates in zip(scores, top):
+            ranked = candidates[np.argsort(-row[candidates])]
+            results.append([Document(id=chunks[i]["id"], page_content=chunks[i]["content"], metadata=chunks[i]["metadata"])
+                            for i in ranked])
+        return results
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self.embedding.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(self.embedding.embed_query(query), k)
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   index_dir: str = "", **kwargs: Any) -> "LocalVectorStore":
+        store = cls(index_dir, embedding)
+        store.add_texts(texts, metadatas, **kwargs)
+        return store
@@ -0,0 +1,107 @@
+import re
+import json
+import math
+import logging
+import threading
+import unicodedata
+from typing import Dict, List, Optional
+
+from backend.src.config.settings import settings
+
+logger = logging.getLogger("content-prefilter")
+
+# Common digit/symbol substitutions used to dodge keyword filters
+LEET_TABLE = str.maketrans({"0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "@": "a", "$": "s"})
+
+# Extra score when a hostile term appears next to a targeted group
+GROUP_CO_OCCURRENCE_BONUS = 0.8
+
+
+def normalize_text(text: str) -> str:
+    """
+    Lowercases, strips diacritics, undoes leetspeak and squeezes stretched
+    letters ("kiiiill" -> "kiill") so transliterated variants hit the lexicon.
+    """
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = text.lower().translate(LEET_TABLE)
+    return re.sub(r"(.)\1{2,}", r"\1\1", text)
+
+
+def _compile(terms: List[str]) -> Optional[re.Pattern]:
+    """One alternation regex for the whole term list, longest terms first, word-bounded."""
+    if not terms:
+        return None
+    alternatives = []
+    for term in sorted({normalize_text(t) for t in terms}, key=len, reverse=True):
+        # Words of a phrase may be separated by any punctuation/whitespace ("kaat-do", "kaat  do")
+        alternatives.append(r"[\W_]*".join(re.escape(word) for word in term.split()))
+    return re.compile(r"(?<!\w)(?:" + "|".join(alternatives) + r")(?!\w)")
+
+
+class ScreeningResult:
+    def __init__(self, score: float, matches: List[str], groups: List[str], threshold: float):
+        self.score = score
+        self.matches = matches
+        self.groups = groups
+        self.flagged = score >= threshold
+
+    def __repr__(self) -> str:
+        return f"ScreeningResult(score={self.score:.2f}, flagged={self.flagged}, matches={self.matches})"
+
+
+class LexiconPrefilter:
+    """
+    Local pre-screening stage in front of the LLM auditor.
+    - compiled regex automaton over the hostile-term lexicon and the group lexicon
+    - cheap score: 1 - exp(-(sum of matched term weights + co-occurrence bonus))
+    Text scoring below PREFILTER_THRESHOLD is treated as clean.
+    """
+
+    def __init__(self, lexicon: Dict, threshold: float):
+        self.threshold = threshold
+        self.weights = {normalize_text(entry["term"]): float(entry.get("weight", 1.0))
+                        for entry in lexicon.get("hostile_terms", [])}
+        self.hostile_pattern = _compile(list(self.weights.keys()))
+        self.group_pattern = _compile(lexicon.get("group_terms", []))
+
+    @classmethod
+    def from_file(cls, path: str, threshold: float) -> "LexiconPrefilter":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f), threshold)
+
+    def _weight(self, match: str) -> float:
+        # Phrase matches may contain separators the lexicon key doesn't have
+        return self.weights.get(match, self.weights.get(" ".join(re.findall(r"\w+", match)), 1.0))
+
+    def screen(self, text: str) -> ScreeningResult:
+        normalized = normalize_text(text)
+        matches = self.hostile_pattern.findall(normalized) if self.hostile_pattern else []
+        groups = self.group_pattern.findall(normalized) if self.group_pattern else []
+
+        raw_score = sum(self._weight(match) for match in set(matches))
+        if matches and groups:
+            raw_score += GROUP_CO_OCCURRENCE_BONUS
+        score = 1 - math.exp(-raw_score)
+
+        return ScreeningResult(score, sorted(set(matches)), sorted(set(groups)), self.threshold)
+
+
+_prefilter: Optional[LexiconPrefilter] = None
+_prefilter_lock = threading.Lock()
+
+
+def get_prefilter() -> Optional[LexiconPrefilter]:
+    """Process wide pre-filter, or None when PREFILTER_ENABLED is off or the lexicon can't be loaded."""
+    global _prefilter
+    if not settings.PREFILTER_ENABLED:
+        return None
+    if _prefilter is None:
+        with _prefilter_lock:
+            if _prefilter is None:
+                try:
+                    _prefilter = LexiconPrefilter.from_file(settings.PREFILTER_LEXICON_PATH, settings.PREFILTER_THRESHOLD)
+                except Exception as e:
+                    logger.error(f"Failed to load lexicon {settings.PREFILTER_LEXICON_PATH}, pre-filter disabled: {e}")
+                    return None
+    return _prefilter
@@ -0,0 +1,355 @@
+import time
+import random
+import asyncio
+import logging
+import threading
+import functools
+import inspect
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Iterator, Mapping, Optional, TypeVar
+
+from backend.src.config.settings import settings
+from backend.src.services.instrumentation import record_rate_limit_wait, record_retry
+
+logger = logging.getLogger("rate-limiter")
+
+T = TypeVar("T")
+
+# "interactive" audits (single /audit and job requests) go ahead of "bulk" ones (batches, backfills)
+LANES = ("interactive", "bulk")
+_lane: ContextVar[str] = ContextVar("rate_limit_lane", default="interactive")
+
+THROTTLED_STATUSES = (429, 503)
+RETRYABLE_STATUSES = (408, 429, 500, 502, 503, 504)
+
+# Longest single sleep while waiting for quota, so a waiter notices lane and pause changes
+MAX_WAIT_STEP_SECONDS = 1.0
+
+# Adaptive rate: each throttled response cuts the refill rate, successful calls win it back
+THROTTLE_DECREASE = 0.7
+RECOVERY_INCREASE = 0.02
+MIN_RATE_SCALE = 0.2
+
+_limiters: Dict[str, "EndpointLimiter"] = {}
+_limiters_lock = threading.Lock()
+
+
+class ThrottledError(Exception):
+    """A 429/503 answer of an endpoint called over plain httpx (Video Indexer)."""
+
+    def __init__(self, message: str, status_code: int, headers: Optional[Mapping[str, str]] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.headers = dict(headers or {})
+
+
+def current_lane() -> str:
+    return _lane.get()
+
+
+@contextmanager
+def lane_scope(lane: Optional[str]) -> Iterator[None]:
+    """Calls made inside (threads and tasks started from it included) queue in `lane`."""
+    token = _lane.set(lane if lane in LANES else "interactive")
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def in_lane(func: Callable) -> Callable:
+    """Runs a graph node in the lane of its state's `priority`."""
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(state, *args, **kwargs):
+            with lane_scope(state.get("priority")):
+                return await func(state, *args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(state, *args, **kwargs):
+        with lane_scope(state.get("priority")):
+            return func(state, *args, **kwargs)
+    return wrapper
+
+
+class _Bucket:
+    """Token bucket holding one minute of quota, refilled continuously."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+
+    def refill(self, elapsed: float, scale: float) -> None:
+        self.level = min(self.capacity, self.level + elapsed * self.rate * scale)
+
+    def wait_for(self, amount: float, reserve: float, scale: float) -> float:
+        """Seconds until `amount` can be taken while leaving `reserve` (a share of the capacity) untouched."""
+        floor = self.capacity * reserve
+        # A request bigger than the bucket would never fit, it only needs a full bucket
+        amount = min(amount, self.capacity - floor)
+        missing = amount + floor - self.level
+        return missing / (self.rate * scale) if missing > 0 else 0.0
+
+
+class EndpointLimiter:
+    """
+    Client side quota of one endpoint (an Azure OpenAI deployment, Video Indexer
+    uploads or API calls): a requests-per-minute and a tokens-per-minute bucket
+    (0 = unlimited), shared by every audit in the process.
+    - bulk callers leave RATE_LIMIT_BULK_RESERVE of each bucket to interactive
+      ones and wait while an interactive caller is queued
+    - a throttled answer pauses the whole endpoint for its Retry-After and lowers
+      the refill rate, which successful calls raise back to the configured quota
+    """
+
+    def __init__(self, name: str, rpm: int, tpm: int = 0):
+        self.name = name
+        self._requests = _Bucket(rpm) if rpm > 0 else None
+        self._tokens = _Bucket(tpm) if tpm > 0 else None
+        self._scale = 1.0
+        self._paused_until = 0.0
+        self._updated_at = time.monotonic()
+        self._interactive_waiting = 0
+        self._lock = threading.Lock()
+
+    @property
+    def limits_tokens(self) -> bool:
+        return self._tokens is not None
+
+    def _buckets(self):
+        return [bucket for bucket in (self._requests, self._tokens) if bucket is not None]
+
+    def _try_acquire(self, tokens: int, lane: str) -> float:
+        """Takes the quota and returns 0, or returns how long to wait before trying again."""
+        with self._lock:
+            now = time.monotonic()
+            for bucket in self._buckets():
+                bucket.refill(now - self._updated_at, self._scale)
+            self._updated_at = now
+
+            if now < self._paused_until:
+                return self._paused_until - now
+            if lane == "bulk" and self._interactive_waiting:
+                return 0.05
+
+            reserve = settings.RATE_LIMIT_BULK_RESERVE if lane == "bulk" else 0.0
+            waits = [bucket.wait_for(amount, reserve, self._scale)
+                     for bucket, amount in ((self._requests, 1), (self._tokens, tokens)) if bucket is not None]
+            wait = max(waits, default=0.0)
+            if wait > 0:
+                return wait
+
+            if self._requests:
+                self._requests.level -= 1
+            if self._tokens:
+                self._tokens.level -= min(tokens, self._tokens.capacity)
+            return 0.0
+
+    def _waiting(self, lane: str, delta: int) -> None:
+        if lane == "interactive":
+            with self._lock:
+                self._interactive_waiting += delta
+
+    def acquire(self, tokens: int = 0, lane: Optional[str] = None) -> float:
+        """Blocks until the request fits the quota. Returns the seconds waited."""
+        lane = lane or current_lane()
+        wait = self._try_acquire(tokens, lane)
+        if not wait:
+            return 0.0
+
+        started_at = time.monotonic()
+        self._waiting(lane, 1)
+        try:
+            while wait:
+                time.sleep(min(wait, MAX_WAIT_STEP_SECONDS))
+                wait = self._try_acquire(tokens, lane)
+        finally:
+            self._waiting(lane, -1)
+        waited = time.monotonic() - started_at
+        record_rate_limit_wait(self.name, lane, waited)
+        return waited
+
+    async def aacquire(self, tokens: int = 0, lane: Optional[str] = None) -> float:
+        """Async `acquire`, waits with asyncio.sleep."""
+        lane = lane or current_lane()
+        wait = self._try_acquire(tokens, lane)
+        if not wait:
+            return 0.0
+
+        started_at = time.monotonic()
+        self._waiting(lane, 1)
+        try:
+            while wait:
+                await asyncio.sleep(min(wait, MAX_WAIT_STEP_SECONDS))
+                wait = self._try_acquire(tokens, lane)
+        finally:
+            self._waiting(lane, -1)
+        waited = time.monotonic() - started_at
+        record_rate_limit_wait(self.name, lane, waited)
+        return waited
+
+    def settle(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        """Corrects the token bucket with the usage the endpoint reported, and regains rate after a throttle."""
+        with self._lock:
+            if self._tokens and actual_tokens is not None:
+                self._tokens.level = min(self._tokens.capacity, self._tokens.level + estimated_tokens - actual_tokens)
+            self._scale = min(1.0, self._scale + RECOVERY_INCREASE)
+
+    def throttle(self, pause_seconds: float) -> None:
+        """The endpoint answered 429/503: nobody calls it for `pause_seconds`, and the refill rate drops."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + pause_seconds)
+            self._scale = max(MIN_RATE_SCALE, self._scale * THROTTLE_DECREASE)
+            for bucket in self._buckets():
+                bucket.level = min(bucket.level, 0.0)
+        logger.warning(f"{self.name} throttled, pausing it for {pause_seconds:.1f}s (rate at {self._scale:.0%} of quota)")
+
+
+def _quotas(endpoint: str):
+    """(RPM, TPM) configured for an endpoint name: "llm:<deployment>", "vi:upload" or "vi:api"."""
+    if endpoint.startswith("llm:"):
+        deployment = endpoint[len("llm:"):]
+        if settings.AZURE_OPEN_AI_SCREENING_DEPLOYMENT and deployment == settings.AZURE_OPEN_AI_SCREENING_DEPLOYMENT:
+            return settings.AZURE_OPENAI_SCREENING_RPM, settings.AZURE_OPENAI_SCREENING_TPM
+        if settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT and deployment == settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT:
+            return settings.AZURE_OPENAI_EMBEDDING_RPM, settings.AZURE_OPENAI_EMBEDDING_TPM
+        return settings.AZURE_OPENAI_RPM, settings.AZURE_OPENAI_TPM
+    if endpoint == "vi:upload":
+        return settings.VI_UPLOAD_RPM, 0
+    return settings.VI_API_RPM, 0
+
+
+def get_limiter(endpoint: str) -> EndpointLimiter:
+    limiter = _limiters.get(endpoint)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(endpoint)
+            if limiter is None:
+                rpm, tpm = _quotas(endpoint)
+                limiter = _limiters[endpoint] = EndpointLimiter(endpoint, rpm, tpm)
+    return limiter
+
+
+def llm_endpoint(deployment: Optional[str]) -> str:
+    return f"llm:{deployment or settings.AZURE_OPEN_AI_CHAT_DEPLOYMENT}"
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    return getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+
+
+def _headers(error: Exception) -> Mapping[str, str]:
+    headers = getattr(error, "headers", None)
+    if headers is None:
+        headers = getattr(getattr(error, "response", None), "headers", None)
+    return headers or {}
+
+
+def retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    """Retry-After of a throttled answer: retry-after-ms (Azure OpenAI), or seconds / an HTTP date."""
+    headers = {key.lower(): value for key, value in headers.items()}
+    for key in ("retry-after-ms", "x-ms-retry-after-ms"):
+        if headers.get(key):
+            try:
+                return float(headers[key]) / 1000
+            except ValueError:
+                pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        try:
+            return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Throttling, transient server errors and dropped connections (openai and httpx)."""
+    if _status_code(error) in RETRYABLE_STATUSES:
+        return True
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError", "ConnectError", "ReadTimeout",
+                                    "ConnectTimeout", "RemoteProtocolError", "ReadError")
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter, capped at RATE_LIMIT_MAX_BACKOFF_SECONDS."""
+    return random.uniform(0, min(settings.RATE_LIMIT_MAX_BACKOFF_SECONDS, settings.RATE_LIMIT_BASE_BACKOFF_SECONDS * 2 ** attempt))
+
+
+def _after_failure(limiter: EndpointLimiter, error: Exception, attempt: int, retries: bool,
+                   retry_if: Optional[Callable[[Exception], bool]] = None) -> Optional[float]:
+    """
+    Seconds this caller sleeps before its next attempt, or None when `error` must be raised.
+    A throttled answer pauses the whole endpoint (the next acquire waits it out), retried or not.
+    """
+    status = _status_code(error)
+    throttled = status in THROTTLED_STATUSES
+    retry_after = retry_after_seconds(_headers(error))
+    delay = backoff_delay(attempt)
+    if throttled:
+        limiter.throttle(retry_after if retry_after is not None else delay)
+
+    if not retries or not (retry_if or is_retryable)(error) or attempt >= settings.RATE_LIMIT_MAX_RETRIES:
+        return None
+    record_retry(limiter.name, "throttled" if throttled else "transient")
+
+    if throttled:
+        delay = random.uniform(0, 0.25)  # Spreads the callers released together when the pause ends
+    elif retry_after is not None:
+        delay = retry_after
+    logger.warning(f"{limiter.name} call failed ({status or type(error).__name__}), retry {attempt + 1}/{settings.RATE_LIMIT_MAX_RETRIES}")
+    return delay
+
+
+def call_with_retry(endpoint: str, func: Callable[[], T], tokens: int = 0, retries: bool = True,
+                    retry_if: Optional[Callable[[Exception], bool]] = None) -> T:
+    """
+    Calls `func` within the endpoint's quota (`tokens` estimated for TPM), retrying
+    throttled and transient failures (RATE_LIMIT_MAX_RETRIES) with Retry-After aware backoff.
+    `retry_if` replaces `is_retryable` for calls that aren't safe to repeat on every transient error.
+    """
+    limiter = get_limiter(endpoint)
+    attempt = 0
+    while True:
+        limiter.acquire(tokens)
+        try:
+            return func()
+        except Exception as e:
+            delay = _after_failure(limiter, e, attempt, retries, retry_if)
+            if delay is None:
+                raise
+            time.sleep(delay)
+            attempt += 1
+
+
+async def acall_with_retry(endpoint: str, func: Callable[[], Awaitable[T]], tokens: int = 0, retries: bool = True,
+                           retry_if: Optional[Callable[[Exception], bool]] = None) -> T:
+    """Async `call_with_retry`: `func` returns a new awaitable per attempt."""
+    limiter = get_limiter(endpoint)
+    attempt = 0
+    while True:
+        await limiter.aacquire(tokens)
+        try:
+            return await func()
+        except Exception as e:
+            delay = _after_failure(limiter, e, attempt, retries, retry_if)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+def raise_for_throttling(response: Any, action: str) -> None:
+    """Turns a 429/503 httpx response into a ThrottledError, so call_with_retry backs off and retries it."""
+    if response.status_code in THROTTLED_STATUSES:
+        raise ThrottledError(f"{action} Throttled ({response.status_code}): {response.text}",
+                             response.status_code, response.headers)
@@ -1,55 +1,418 @@
+import io
 import os
 import time
+import asyncio
+import json
+import base64
+import shutil
 import logging
+import tempfile
+import threading
+import weakref
+from datetime import datetime, timedelta, timezone
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlencode, urlparse
 import httpx
 import yt_dlp
 
 from azure.identity import DefaultAzureCredential
-from src.config.settings import settings
+from backend.src.config.settings import settings
+from backend.src.services.concurrency import async_stage_slot, stage_slot
+from backend.src.services.rate_limiter import acall_with_retry, call_with_retry, raise_for_throttling
+from backend.src.services.instrumentation import record_polls, record_upload, traced, traced_stage
 
 logger = logging.getLogger("video-indexer")
 
-class VideoIndexerService:
-    def __init__(self):
-        self.account_id = settings.AZURE_VI_ACCOUNT_ID
-        self.location = settings.AZURE_VI_LOCATION
+# Video Indexer account tokens are valid for one hour
+VI_TOKEN_DEFAULT_LIFETIME = 3600
+
+# Entries in these states can be reused instead of uploading the video again
+VI_REUSABLE_STATES = ("Processed", "Processing", "Uploaded")
+
+# Marker stored in the upload metadata, so cleanup only touches this service's uploads
+VI_METADATA_SOURCE = "speechguard"
+
+# Clock skew allowed when searching for the entry a failed upload may have created anyway
+VI_UPLOAD_LOOKUP_SKEW_MINUTES = 10
+
+# Upload errors raised before the request reached Video Indexer
+_UNSENT_UPLOAD_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+_http_client: Optional[httpx.Client] = None
+# httpx.AsyncClient pools are bound to the event loop they were opened on
+_async_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_token_manager: Optional["VideoIndexerTokenManager"] = None
+_shared_lock = threading.Lock()
+
+# Callback mode: video_id -> one Event per waiting audit, set by the /callbacks/video-indexer endpoint
+# (reused Video Indexer entries mean several audits can wait on the same video)
+_completion_events: Dict[str, List[threading.Event]] = {}
+# Async waiters: video_id -> (event loop, asyncio.Event) per waiting audit
+_async_completion_events: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+_completion_lock = threading.Lock()
+
+
+class CallbackSecretFilter(logging.Filter):
+    """
+    Masks AZURE_VI_CALLBACK_SECRET in log lines. The secret travels in the callback URL's
+    query, which shows up in httpx request logs (URL-encoded in callbackUrl) and in access logs.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        secret = settings.AZURE_VI_CALLBACK_SECRET
+        if secret:
+            message = record.getMessage()
+            masked = message
+            encoded = secret
+            for _ in range(3):
+                masked = masked.replace(encoded, "***")
+                encoded = quote(encoded, safe="")
+            if masked != message:
+                record.msg, record.args = masked, None
+        return True
+
+
+# Video Indexer request URLs (with the callback URL in their query) are logged by httpx
+logging.getLogger("httpx").addFilter(CallbackSecretFilter())
+
+
+def get_http_client() -> httpx.Client:
+    """Process wide pooled client with keep-alive, shared by every VideoIndexerService."""
+    global _http_client
+    if _http_client is None:
+        with _shared_lock:
+            if _http_client is None:
+                _http_client = httpx.Client(timeout=httpx.Timeout(60.0), limits=_http_limits())
+    return _http_client
+
+
+def _http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.VI_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.VI_HTTP_MAX_KEEPALIVE
+    )
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Pooled async client of the running event loop, shared by every AsyncVideoIndexerService on it."""
+    loop = asyncio.get_running_loop()
+    client = _async_http_clients.get(loop)
+    if client is None:
+        client = _async_http_clients.setdefault(loop, httpx.AsyncClient(timeout=httpx.Timeout(60.0), limits=_http_limits()))
+    return client
+
+
+def get_token_manager() -> "VideoIndexerTokenManager":
+    """Process wide token manager, so concurrent audits share cached tokens."""
+    global _token_manager
+    if _token_manager is None:
+        with _shared_lock:
+            if _token_manager is None:
+                _token_manager = VideoIndexerTokenManager(refresh_margin=settings.VI_TOKEN_REFRESH_MARGIN_SECONDS)
+    return _token_manager
+
+
+def _jwt_expiry(token: str) -> Optional[float]:
+    """Reads the `exp` claim of a JWT without verifying it."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except Exception:
+        return None
+
+
+def _completion_event(video_id: str) -> threading.Event:
+    event = threading.Event()
+    with _completion_lock:
+        _completion_events.setdefault(video_id, []).append(event)
+    return event
+
+
+def _async_completion_event(video_id: str) -> Tuple[asyncio.AbstractEventLoop, asyncio.Event]:
+    waiter = (asyncio.get_running_loop(), asyncio.Event())
+    with _completion_lock:
+        _async_completion_events.setdefault(video_id, []).append(waiter)
+    return waiter
+
+
+def _remove_waiter(registry: Dict[str, List[Any]], video_id: str, waiter: Any) -> None:
+    """Unregisters one audit's waiter, leaving the other audits waiting on the video in place."""
+    with _completion_lock:
+        waiters = registry.get(video_id, [])
+        if waiter in waiters:
+            waiters.remove(waiter)
+        if not waiters:
+            registry.pop(video_id, None)
+
+
+def notify_processing_complete(video_id: str, state: str) -> bool:
+    """
+    Wakes up the audits waiting on `video_id` (called from the Video Indexer callback).
+    Returns False when no audit in this process is waiting on that video.
+    """
+    with _completion_lock:
+        events = list(_completion_events.get(video_id, []))
+        async_waiters = list(_async_completion_events.get(video_id, []))
+    if not events and not async_waiters:
+        return False
+    logger.info(f"Callback received for video {video_id}: {state} ({len(events) + len(async_waiters)} waiting)")
+    for event in events:
+        event.set()
+    for loop, async_event in async_waiters:
+        try:
+            loop.call_soon_threadsafe(async_event.set)
+        except RuntimeError:
+            # That audit's event loop is gone, its waiter is stale
+            pass
+    return True
+
+
+def _read_index(response: httpx.Response, video_id: str) -> Optional[dict]:
+    """
+    Index JSON of one poll. None on a 401 (expired or revoked token: the caller refreshes
+    it and polls again); any other error status fails the wait instead of polling until timeout.
+    """
+    if response.status_code == 401:
+        return None
+    if response.status_code >= 400:
+        raise Exception(f"Azure Video Index Failed for {video_id} ({response.status_code}): {response.text}")
+    return response.json()
+
+
+def _parse_progress(data: dict) -> Optional[float]:
+    """Reads processingProgress (e.g. "42%") from the Index JSON."""
+    for video in data.get("videos", []):
+        progress = video.get("processingProgress")
+        if progress:
+            try:
+                return float(str(progress).rstrip("%"))
+            except ValueError:
+                return None
+    return None
+
+
+def _check_failed_state(state: Optional[str]) -> None:
+    if state == "Failed":
+        raise Exception("Video Indexing Failed in Azure.")
+    elif state == "Quarantined":
+        raise Exception("Video Quarantined (Copyright/Content Policy Violation).")
+
+
+def _is_ip_locked(media_url: Optional[str]) -> bool:
+    """
+    YouTube media URLs (googlevideo.com) only serve the IP that resolved them and expire
+    within hours, so Video Indexer can't fetch them from its own network.
+    """
+    parsed = urlparse(media_url or "")
+    host = (parsed.hostname or "").lower()
+    return host == "googlevideo.com" or host.endswith(".googlevideo.com") or "ip" in parse_qs(parsed.query)
+
+
+def _search_cutoff(days: int = 0, minutes: int = 0) -> str:
+    return (datetime.now(timezone.utc) - timedelta(days=days, minutes=minutes)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class _UploadAttempts:
+    """
+    Retry bookkeeping of one upload. The POST isn't idempotent: repeating one that Video Indexer
+    already accepted creates a second video. So only a 429 or a connection that failed before
+    sending is retried as is; after a 5xx or a connection dropped mid request the next attempt
+    first searches for the entry by externalId and re-posts only if there is none (without an
+    externalId such failures aren't retried).
+    """
+
+    def __init__(self, external_id: Optional[str]):
+        self.external_id = external_id
+        self.created_after = _search_cutoff(minutes=VI_UPLOAD_LOOKUP_SKEW_MINUTES)
+        self.uncertain = False
+
+    def retry_if(self, error: Exception) -> bool:
+        if getattr(error, "status_code", None) == 429 or isinstance(error, _UNSENT_UPLOAD_ERRORS):
+            return True
+        return self.uncertain and bool(self.external_id)
+
+    def failed(self, error: Exception) -> None:
+        if not isinstance(error, _UNSENT_UPLOAD_ERRORS):
+            self.uncertain = True
+
+    def result(self, response: httpx.Response) -> str:
+        if response.status_code >= 500:
+            self.uncertain = True
+        raise_for_throttling(response, "Azure Upload")
+        if response.status_code != 200:
+            raise Exception(f"Azure Upload Failed ({response.status_code}): {response.text}")
+        return response.json().get("id")
+
+    def created(self, existing_id: Optional[str]) -> Optional[str]:
+        """`existing_id` found by the lookup before a retry; None means the upload is posted again."""
+        if existing_id:
+            logger.warning(f"Upload of {self.external_id} failed, but Video Indexer created {existing_id}; using it")
+        self.uncertain = False
+        return existing_id
+
+
+def _pick_reusable(candidates: List[Dict[str, Any]], external_id: str) -> Optional[str]:
+    """Id of the best reusable entry: a finished one first, then the newest."""
+    reusable = [video for video in candidates
+                if video.get("externalId") == external_id and video.get("state") in VI_REUSABLE_STATES]
+    if not reusable:
+        return None
+    reusable.sort(key=lambda video: (video.get("state") == "Processed", video.get("created", "")), reverse=True)
+    return reusable[0].get("id")
+
+
+def next_poll_interval(attempt: int, progress: Optional[float], elapsed: float) -> float:
+    """
+    Adaptive backoff: starts at VI_POLL_MIN_INTERVAL_SECONDS and grows by 1.5x per
+    attempt, but once Azure reports progress the interval follows the estimated
+    remaining time so we don't sleep far past completion.
+    """
+    min_interval = settings.VI_POLL_MIN_INTERVAL_SECONDS
+    max_interval = settings.VI_POLL_MAX_INTERVAL_SECONDS
+
+    interval = min_interval * (1.5 ** attempt)
+    if progress and 0 < progress < 100:
+        estimated_remaining = elapsed * (100 - progress) / progress
+        interval = estimated_remaining / 2
+
+    return max(min_interval, min(interval, max_interval))
+
+
+@contextmanager
+def managed_temp_file(session_name: str, suffix: str = ".mp4") -> Iterator[str]:
+    """
+    Unique per-session temp path inside VIDEO_TEMP_DIR.
+    The whole session directory is removed on exit, even if the audit fails.
+    """
+    base_dir = settings.VIDEO_TEMP_DIR or None
+    if base_dir:
+        os.makedirs(base_dir, exist_ok=True)
+    session_dir = tempfile.mkdtemp(prefix=f"{session_name}-", dir=base_dir)
+    try:
+        yield os.path.join(session_dir, f"video{suffix}")
+    finally:
+        shutil.rmtree(session_dir, ignore_errors=True)
+
+
+class _ResponseStream(io.RawIOBase):
+    """Read-only file object over a streaming httpx response, for chunked multipart uploads."""
+
+    def __init__(self, response: httpx.Response):
+        self._chunks = response.iter_bytes()
+        self._buffer = b""
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        self.bytes_read += size
+        return size
+
+
+class VideoIndexerTokenManager:
+    """
+    Caches the ARM token and the Video Indexer account token until shortly
+    before they expire. Refreshes happen under one lock, so a burst of
+    concurrent audits triggers a single generateAccessToken call.
+    """
+
+    def __init__(self, refresh_margin: int):
         self.subscription_id = settings.AZURE_SUBSCRIPTION_ID
         self.resource_group = settings.AZURE_RESOURCE_GROUP
         self.vi_name = settings.AZURE_VI_NAME
+        self.refresh_margin = refresh_margin
         self.credential = DefaultAzureCredential()
 
+        self._lock = threading.RLock()
+        self._arm_token: Optional[str] = None
+        self._arm_expires_at = 0.0
+        self._vi_token: Optional[str] = None
+        self._vi_expires_at = 0.0
+
+    def _is_fresh(self, expires_at: float) -> bool:
+        return time.time() < expires_at - self.refresh_margin
+
+    def get_arm_token(self) -> str:
+        """Returns a cached ARM Access Token, refreshing it when close to expiry."""
+        with self._lock:
+            if self._arm_token and self._is_fresh(self._arm_expires_at):
+                return self._arm_token
+            try:
+                token_object = self.credential.get_token("https://management.azure.com/.default")
+            except Exception as e:
+                logger.error(f"Failed to get Azure Token: {e}")
+                raise
+            self._arm_token = token_object.token
+            self._arm_expires_at = float(token_object.expires_on)
+            return self._arm_token
+
+    def get_vi_token(self) -> str:
+        """Returns a cached Video Indexer Account Token, exchanging the ARM token when needed."""
+        with self._lock:
+            if self._vi_token and self._is_fresh(self._vi_expires_at):
+                return self._vi_token
+
+            url = (
+                f"https://management.azure.com/subscriptions/{self.subscription_id}"
+                f"/resourceGroups/{self.resource_group}"
+                f"/providers/Microsoft.VideoIndexer/accounts/{self.vi_name}"
+                f"/generateAccessToken?api-version=2024-01-01"
+            )
+            headers = {"Authorization": f"Bearer {self.get_arm_token()}"}
+            payload = {"permissionType": "Contributor", "scope": "Account"}
+
+            with traced_stage("video_indexer.token_refresh"):
+                response = get_http_client().post(url, headers=headers, json=payload)
+            if response.status_code != 200:
+                raise Exception(f"Failed to get VI Account Token: {response.text}")
+
+            self._vi_token = response.json().get("accessToken")
+            self._vi_expires_at = _jwt_expiry(self._vi_token) or time.time() + VI_TOKEN_DEFAULT_LIFETIME
+            logger.info("Refreshed Video Indexer account token")
+            return self._vi_token
+
+    def invalidate_vi_token(self) -> None:
+        """Drops the cached account token (rejected with a 401), the next call fetches a new one."""
+        with self._lock:
+            self._vi_token = None
+            self._vi_expires_at = 0.0
+
+    async def aget_vi_token(self) -> str:
+        """Cached token without touching a thread; a refresh (about once an hour) runs in a worker thread."""
+        if self._vi_token and self._is_fresh(self._vi_expires_at):
+            return self._vi_token
+        return await asyncio.to_thread(self.get_vi_token)
+
+
+class VideoIndexerService:
+    def __init__(self):
+        self.account_id = settings.AZURE_VI_ACCOUNT_ID
+        self.location = settings.AZURE_VI_LOCATION
+        self.tokens = get_token_manager()
+        self.client = get_http_client()
+
     def get_access_token(self) -> str:
-        """Generates an ARM Access Token."""
-        try:
-            token_object = self.credential.get_token("https://management.azure.com/.default")
-            return token_object.token
-        except Exception as e:
-            logger.error(f"Failed to get Azure Token: {e}")
-            raise
-
-    def get_account_token(self, arm_access_token: str) -> str:
-        """Exchanges ARM token for Video Indexer Account Token."""
-        url = (
-            f"https://management.azure.com/subscriptions/{self.subscription_id}"
-            f"/resourceGroups/{self.resource_group}"
-            f"/providers/Microsoft.VideoIndexer/accounts/{self.vi_name}"
-            f"/generateAccessToken?api-version=2024-01-01"
-        )
-        headers = {"Authorization": f"Bearer {arm_access_token}"}
-        payload = {"permissionType": "Contributor", "scope": "Account"}
-        
-        response = httpx.post(url, headers=headers, json=payload)
-        if response.status_code != 200:
-            raise Exception(f"Failed to get VI Account Token: {response.text}")
-        return response.json().get("accessToken")
+        """Returns the cached ARM Access Token."""
+        return self.tokens.get_arm_token()
 
-    def download(self, url: str, output_path: str = "temp_video.mp4") -> str:
-        """Downloads a YouTube video to a local file."""
-        logger.info(f"Downloading YouTube video: {url}")
-        
+    def get_account_token(self) -> str:
+        """Returns the cached Video Indexer Account Token."""
+        return self.tokens.get_vi_token()
+
+    def _ydl_options(self, **overrides) -> dict:
         ydl_opts = {
             'format': 'best',
-            'outtmpl': output_path,
             'quiet': False,
             'no_warnings': False,
             'extractor_args': {'youtube': {'player_client': ['android', 'web']}},
@@ -57,82 +420,556 @@ class VideoIndexerService:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             }
         }
+        ydl_opts.update(overrides)
+        return ydl_opts
+
+    @traced("video_indexer.resolve_source")
+    def resolve_source(self, url: str) -> Dict[str, Any]:
+        """Resolves the direct media URL and metadata of a YouTube video without downloading it."""
+        try:
+            with yt_dlp.YoutubeDL(self._ydl_options()) as ydl:
+                info = ydl.extract_info(url, download=False)
+        except Exception as e:
+            raise Exception(f"YouTube Resolve Failed: {str(e)}")
+
+        return {
+            "media_url": info.get("url"),
+            "http_headers": info.get("http_headers", {}),
+            "ext": info.get("ext", "mp4"),
+            "title": info.get("title"),
+            "description": info.get("description"),
+            "tags": info.get("tags") or [],
+        }
+
+    @traced("video_indexer.download")
+    def download(self, url: str, output_path: str = "temp_video.mp4") -> str:
+        """Downloads a YouTube video to a local file."""
+        logger.info(f"Downloading YouTube video: {url}")
+        
+        ydl_opts = self._ydl_options(outtmpl=output_path)
         
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            with stage_slot("download"), yt_dlp.YoutubeDL(ydl_opts) as ydl:
                 ydl.download([url])
             logger.info("Download complete.")
             return output_path
         except Exception as e:
             raise Exception(f"YouTube Download Failed: {str(e)}")
 
-    def upload(self, video_path: str, video_name: str) -> str:
-        """Uploads a LOCAL FILE to Azure Video Indexer."""
-        arm_token = self.get_access_token()
-        vi_token = self.get_account_token(arm_token)
+    def _videos_url(self) -> str:
+        return f"{settings.AZURE_VI_API_URL.rstrip('/')}/{self.location}/Accounts/{self.account_id}/Videos"
+
+    def _request(self, action: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """Video Indexer API call within the VI_API_RPM quota; 429/503 answers are retried with backoff."""
+        def send() -> httpx.Response:
+            response = self.client.request(method, url, **kwargs)
+            raise_for_throttling(response, action)
+            return response
+        return call_with_retry("vi:api", send)
 
-        api_url = f"https://api.videoindexer.ai/{self.location}/Accounts/{self.account_id}/Videos"
+    def _upload_request(self, video_name: str, external_id: Optional[str] = None, **extra_params) -> Tuple[str, dict]:
+        api_url = self._videos_url()
         
         params = {
-            "accessToken": vi_token,
+            "accessToken": self.get_account_token(),
             "name": video_name,
             "privacy": "Private",
             "indexingPreset": "Default",
+            **extra_params
         }
+        if external_id:
+            # Canonical YouTube ID, so later audits of the same video find this entry
+            params["externalId"] = external_id
+            params["metadata"] = json.dumps({"source": VI_METADATA_SOURCE, "youtube_id": external_id})
+        if settings.VI_RETENTION_DAYS > 0:
+            params["retentionPeriod"] = settings.VI_RETENTION_DAYS
+        if settings.AZURE_VI_CALLBACK_URL:
+            params["callbackUrl"] = self._callback_url()
+        return api_url, params
+
+    @traced("video_indexer.search_videos")
+    def search_videos(self, **filters) -> List[Dict[str, Any]]:
+        """All pages of the Search Videos API for the given filters."""
+        results: List[Dict[str, Any]] = []
+        skip = 0
+        while True:
+            params = {"accessToken": self.get_account_token(), "pageSize": 100, "skip": skip, **filters}
+            response = self._request("Azure Video Search", "GET", f"{self._videos_url()}/Search", params=params)
+            if response.status_code != 200:
+                raise Exception(f"Azure Video Search Failed: {response.text}")
+            data = response.json()
+            results.extend(data.get("results", []))
+            next_page = data.get("nextPage") or {}
+            if next_page.get("done", True):
+                return results
+            skip = next_page.get("skip", skip) + next_page.get("pageSize", 100)
+
+    def find_indexed_video(self, external_id: str, created_after: Optional[str] = None) -> Optional[str]:
+        """
+        Newest reusable Video Indexer entry tagged with this YouTube ID, created within
+        VI_REUSE_MAX_AGE_DAYS (or after `created_after`). A video that's still processing
+        is reused too, so concurrent audits of the same video share one indexing run.
+        """
+        try:
+            cutoff = created_after or _search_cutoff(settings.VI_REUSE_MAX_AGE_DAYS)
+            candidates = self.search_videos(externalId=external_id, createdAfter=cutoff)
+        except Exception as e:
+            logger.warning(f"Lookup of indexed video {external_id} failed, uploading instead: {e}")
+            return None
+        return _pick_reusable(candidates, external_id)
+
+    @traced("video_indexer.delete_video")
+    def delete_video(self, video_id: str) -> None:
+        response = self._request("Azure Video Delete", "DELETE", f"{self._videos_url()}/{video_id}",
+                                 params={"accessToken": self.get_account_token()})
+        if response.status_code not in (200, 204):
+            raise Exception(f"Azure Video Delete Failed: {response.text}")
+
+    def cleanup_videos(self, older_than_days: int, dry_run: bool = False) -> List[str]:
+        """Deletes this service's uploads (tagged by `_upload_request`) created more than `older_than_days` ago."""
+        videos = self.search_videos(createdBefore=_search_cutoff(older_than_days))
+
+        deleted = []
+        for video in videos:
+            if not video.get("externalId") or VI_METADATA_SOURCE not in str(video.get("metadata") or ""):
+                continue
+            if not dry_run:
+                self.delete_video(video["id"])
+            deleted.append(video["id"])
+        logger.info(f"{'Would delete' if dry_run else 'Deleted'} {len(deleted)} Video Indexer entries older than {older_than_days} days")
+        return deleted
+
+    def _post_upload(self, api_url: str, params: dict, files: Optional[dict] = None) -> str:
+        """
+        Upload within the VI_UPLOAD_RPM quota, retried as far as that can't duplicate the video
+        (see _UploadAttempts) and never when its body was a one-off stream.
+        """
+        bodies = [body for _, body, _ in (files or {}).values()]
+        replayable = all(body.seekable() for body in bodies)
+        attempts = _UploadAttempts(params.get("externalId"))
+
+        def send() -> str:
+            if attempts.uncertain:
+                existing_id = attempts.created(self.find_indexed_video(attempts.external_id, attempts.created_after))
+                if existing_id:
+                    return existing_id
+            if replayable:
+                for body in bodies:
+                    body.seek(0)
+            try:
+                with stage_slot("upload"):
+                    response = self.client.post(api_url, params=params, files=files, timeout=300.0)
+            except httpx.TransportError as e:
+                attempts.failed(e)
+                raise
+            return attempts.result(response)
+
+        return call_with_retry("vi:upload", send, retries=replayable, retry_if=attempts.retry_if)
+
+    @traced("video_indexer.upload")
+    def upload(self, video_path: str, video_name: str, external_id: Optional[str] = None) -> str:
+        """Uploads a LOCAL FILE to Azure Video Indexer."""
+        api_url, params = self._upload_request(video_name, external_id)
         
         logger.info(f"Uploading file {video_path} to Azure...")
         
         with open(video_path, 'rb') as video_file:
             files = {'file': ('video.mp4', video_file, 'video/mp4')}
-            response = httpx.post(api_url, params=params, files=files, timeout=300.0)
-        
-        if response.status_code != 200:
-            raise Exception(f"Azure Upload Failed: {response.text}")
-            
-        return response.json().get("id")
+            azure_video_id = self._post_upload(api_url, params, files)
+        record_upload(os.path.getsize(video_path), "file")
+        return azure_video_id
+
+    @traced("video_indexer.upload_from_url")
+    def upload_from_url(self, media_url: str, video_name: str, external_id: Optional[str] = None) -> str:
+        """Lets Video Indexer fetch the video itself via the `videoUrl` parameter."""
+        api_url, params = self._upload_request(video_name, external_id, videoUrl=media_url)
+
+        logger.info(f"Submitting video URL for {video_name} to Azure...")
+        return self._post_upload(api_url, params)
+
+    @traced("video_indexer.upload_stream")
+    def upload_stream(self, source: Dict[str, Any], video_name: str, external_id: Optional[str] = None) -> str:
+        """Pipes the source media straight into a chunked multipart upload, without touching disk."""
+        api_url, params = self._upload_request(video_name, external_id)
+
+        logger.info(f"Streaming {video_name} to Azure...")
+        # The download slot is taken before the upload slot, like in the temp file path
+        with stage_slot("download"), \
+                self.client.stream("GET", source["media_url"], headers=source["http_headers"], timeout=300.0) as media:
+            media.raise_for_status()
+            body = _ResponseStream(media)
+            files = {'file': (f"video.{source['ext']}", body, 'video/mp4')}
+            azure_video_id = self._post_upload(api_url, params, files)
+
+        logger.info(f"Streamed {body.bytes_read} bytes for {video_name}")
+        record_upload(body.bytes_read, "stream")
+        return azure_video_id
+
+    @traced("video_indexer.ingest")
+    def ingest(self, url: str, video_name: str, external_id: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Reuses an entry already indexed for `external_id` (the YouTube ID) when
+        VI_REUSE_INDEXED is on; only the metadata is resolved then, nothing is downloaded.
+        Otherwise gets the video into Video Indexer according to VI_UPLOAD_MODE:
+        - url:    Video Indexer downloads the resolved media URL itself (streamed
+                  instead when that URL is locked to this machine's IP, see _is_ip_locked)
+        - stream: media is piped through this process into the upload
+        - file:   media is downloaded to a managed temp file, then uploaded
+        url/stream fall back to the temp file path if they fail.
+        Returns the Azure video id and the source metadata.
+        """
+        mode = settings.VI_UPLOAD_MODE.lower()
+        source: Dict[str, Any] = {}
+
+        if external_id and settings.VI_REUSE_INDEXED:
+            existing_id = self.find_indexed_video(external_id)
+            if existing_id:
+                logger.info(f"Reusing Video Indexer entry {existing_id} for {external_id}")
+                try:
+                    source = self.resolve_source(url)
+                except Exception as e:
+                    logger.warning(f"Could not resolve metadata of {url}: {e}")
+                return existing_id, source
+
+        if mode in ("url", "stream"):
+            try:
+                source = self.resolve_source(url)
+                if mode == "url" and not self._url_mode_blocked(source, video_name):
+                    return self.upload_from_url(source["media_url"], video_name, external_id), source
+                return self.upload_stream(source, video_name, external_id), source
+            except Exception as e:
+                logger.warning(f"{mode} upload failed for {video_name}, falling back to temp file: {e}")
 
+        return self.ingest_via_temp_file(url, video_name, external_id), source
+
+    def _url_mode_blocked(self, source: Dict[str, Any], video_name: str) -> bool:
+        if not _is_ip_locked(source.get("media_url")):
+            return False
+        logger.info(f"Media URL of {video_name} is IP-locked, streaming it instead of url mode")
+        return True
+
+    def ingest_via_temp_file(self, url: str, video_name: str, external_id: Optional[str] = None) -> str:
+        """Downloads the video to a managed temp file and uploads it."""
+        with managed_temp_file(video_name) as temp_path:
+            local_path = self.download(url, output_path=temp_path)
+            return self.upload(local_path, video_name=video_name, external_id=external_id)
+
+    def _callback_url(self) -> str:
+        """Callback URL handed to Video Indexer, signed with the shared secret if configured."""
+        if not settings.AZURE_VI_CALLBACK_SECRET:
+            return settings.AZURE_VI_CALLBACK_URL
+        separator = "&" if "?" in settings.AZURE_VI_CALLBACK_URL else "?"
+        return f"{settings.AZURE_VI_CALLBACK_URL}{separator}{urlencode({'token': settings.AZURE_VI_CALLBACK_SECRET})}"
+
+    def _index_url(self, video_id: str) -> str:
+        return f"{self._videos_url()}/{video_id}/Index"
+
+    @traced("video_indexer.wait_for_processing")
     def wait_for_processing(self, video_id: str) -> dict:
-        """Polls status until complete."""
+        """
+        Waits until the video is processed.
+        In callback mode the wait ends as soon as Video Indexer calls back; the
+        adaptive poller is the fallback and enforces VI_PROCESSING_TIMEOUT_SECONDS.
+        """
         logger.info(f"Waiting for video {video_id} to process...")
         
-        while True:
-            arm_token = self.get_access_token()
-            vi_token = self.get_account_token(arm_token)
-            
-            url = f"https://api.videoindexer.ai/{self.location}/Accounts/{self.account_id}/Videos/{video_id}/Index"
-            params = {"accessToken": vi_token}
-            response = httpx.get(url, params=params)
-            data = response.json()
-            
-            state = data.get("state")
-            if state == "Processed":
-                logger.info(f"Video {video_id} processing complete.")
-                return data
-            elif state == "Failed":
-                raise Exception("Video Indexing Failed in Azure.")
-            elif state == "Quarantined":
-                raise Exception("Video Quarantined (Copyright/Content Policy Violation).")
-            
-            logger.info(f"Status: {state}... waiting 30s")
-            time.sleep(30)
+        url = self._index_url(video_id)
+        completion = _completion_event(video_id) if settings.AZURE_VI_CALLBACK_URL else None
+        started_at = time.monotonic()
+        deadline = started_at + settings.VI_PROCESSING_TIMEOUT_SECONDS
+        attempt = 0
+        state = None
+        token_refreshed = False
+
+        try:
+            while True:
+                response = self._request("Azure Video Index", "GET", url, params=self._index_params())
+                data = _read_index(response, video_id)
+                if data is None:
+                    if token_refreshed:
+                        raise Exception(f"Azure Video Index unauthorized for {video_id} after a token refresh: {response.text}")
+                    logger.warning("Video Indexer rejected the account token (401), refreshing it")
+                    self.tokens.invalidate_vi_token()
+                    token_refreshed = True
+                    continue
+                token_refreshed = False
+
+                state = data.get("state")
+                if state == "Processed":
+                    logger.info(f"Video {video_id} processing complete.")
+                    return data
+                _check_failed_state(state)
+
+                now = time.monotonic()
+                if now >= deadline:
+                    raise TimeoutError(
+                        f"Video {video_id} not processed after {settings.VI_PROCESSING_TIMEOUT_SECONDS:.0f}s (state: {state})"
+                    )
 
+                progress = _parse_progress(data)
+                interval = min(next_poll_interval(attempt, progress, now - started_at), deadline - now)
+                logger.info(f"Status: {state} ({progress if progress is not None else '?'}%)... waiting {interval:.0f}s")
+
+                if completion is not None:
+                    # Returns early when the callback endpoint fires
+                    if completion.wait(interval):
+                        completion.clear()
+                else:
+                    time.sleep(interval)
+                attempt += 1
+
+        finally:
+            record_polls(attempt + 1, state or "unknown")
+            if completion is not None:
+                _remove_waiter(_completion_events, video_id, completion)
+
+    def _index_params(self) -> dict:
+        """Asks only for the insight types we keep, which shrinks the Index JSON considerably."""
+        included = ["transcript", *settings.VI_INSIGHT_TYPES]
+        return {
+            "accessToken": self.get_account_token(),
+            "includedInsights": ",".join(dict.fromkeys(t[0].upper() + t[1:] for t in included)),
+            "includeSummarizedInsights": "false"
+        }
+
+    @traced("video_indexer.extract_data")
     def extract_data(self, vi_json: dict) -> dict:
-        """Parses the Video Indexer JSON into our State format."""
-        transcript_lines = []
-        for v in vi_json.get("videos", []):
-            for insight in v.get("insights", {}).get("transcript", []):
-                transcript_lines.append(insight.get("text", ""))
-        
+        """
+        Parses the Video Indexer JSON into our State format in a single pass.
+        Transcript lines become a compact segment table (start, end, speaker,
+        language, confidence, text); OCR lines scored below VI_OCR_MIN_CONFIDENCE and
+        repeats of the same on-screen text are dropped as they're read; the other
+        types in VI_INSIGHT_TYPES are kept as name/confidence/[start, end] entries.
+        """
+        keep_types = set(settings.VI_INSIGHT_TYPES)
+        transcript_segments = []
         ocr_lines = []
+        seen_ocr = set()
+        video_insights: Dict[str, List[Dict[str, Any]]] = {}
+        language = None
+
         for v in vi_json.get("videos", []):
-            for insight in v.get("insights", {}).get("ocr", []):
-                ocr_lines.append(insight.get("text", ""))
-                
+            language = language or v.get("sourceLanguage") or v.get("language")
+            for insight_type, entries in (v.get("insights") or {}).items():
+                if insight_type == "transcript":
+                    for insight in entries:
+                        text = (insight.get("text") or "").strip()
+                        if not text:
+                            continue
+                        instances = insight.get("instances") or [{}]
+                        transcript_segments.append({
+                            "text": text,
+                            "start": instances[0].get("start"),
+                            "end": instances[-1].get("end"),
+                            "speaker": insight.get("speakerId"),
+                            "language": insight.get("language"),
+                            "confidence": insight.get("confidence")
+                        })
+
+                elif insight_type == "ocr" and "ocr" in keep_types:
+                    for insight in entries:
+                        text = (insight.get("text") or "").strip()
+                        key = " ".join(text.lower().split())
+                        if not key or key in seen_ocr:
+                            continue
+                        # Some accounts omit the confidence, those lines are kept
+                        confidence = insight.get("confidence")
+                        if confidence is not None and confidence < settings.VI_OCR_MIN_CONFIDENCE:
+                            continue
+                        seen_ocr.add(key)
+                        ocr_lines.append(text)
+
+                elif insight_type in keep_types and isinstance(entries, list):
+                    video_insights.setdefault(insight_type, []).extend(
+                        _compact_insight(insight) for insight in entries
+                    )
+
         return {
-            "transcript": " ".join(transcript_lines),
+            "transcript": " ".join(segment["text"] for segment in transcript_segments),
+            "transcript_segments": transcript_segments,
             "ocr_text": ocr_lines,
+            "video_insights": video_insights,
             "video_meta_data": {
-                "duration": vi_json.get("summarizedInsights", {}).get("duration", {}).get("seconds"),
+                "duration": vi_json.get("durationInSeconds")
+                            or vi_json.get("summarizedInsights", {}).get("duration", {}).get("seconds"),
+                "language": language,
                 "platform": "youtube"
             }
-        }
\ No newline at end of file
+        }
+
+
+class AsyncVideoIndexerService:
+    """
+    Event loop counterpart of VideoIndexerService for the async graph nodes.
+    Video Indexer calls go through the loop's shared httpx.AsyncClient and waiting
+    uses asyncio.sleep, so an audit waiting on Azure holds no thread. yt-dlp and
+    the media streaming paths are blocking and run in worker threads.
+    """
+
+    def __init__(self):
+        self.service = VideoIndexerService()
+        self.client = get_async_http_client()
+
+    async def _refresh_token(self) -> None:
+        # The sync helpers building request params then read the cached token
+        await self.service.tokens.aget_vi_token()
+
+    async def _request(self, action: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """See VideoIndexerService._request."""
+        async def send() -> httpx.Response:
+            response = await self.client.request(method, url, **kwargs)
+            raise_for_throttling(response, action)
+            return response
+        return await acall_with_retry("vi:api", send)
+
+    @traced("video_indexer.search_videos")
+    async def search_videos(self, **filters) -> List[Dict[str, Any]]:
+        """All pages of the Search Videos API for the given filters."""
+        results: List[Dict[str, Any]] = []
+        skip = 0
+        while True:
+            params = {"accessToken": await self.service.tokens.aget_vi_token(), "pageSize": 100, "skip": skip, **filters}
+            response = await self._request("Azure Video Search", "GET", f"{self.service._videos_url()}/Search", params=params)
+            if response.status_code != 200:
+                raise Exception(f"Azure Video Search Failed: {response.text}")
+            data = response.json()
+            results.extend(data.get("results", []))
+            next_page = data.get("nextPage") or {}
+            if next_page.get("done", True):
+                return results
+            skip = next_page.get("skip", skip) + next_page.get("pageSize", 100)
+
+    async def find_indexed_video(self, external_id: str, created_after: Optional[str] = None) -> Optional[str]:
+        """See VideoIndexerService.find_indexed_video."""
+        try:
+            cutoff = created_after or _search_cutoff(settings.VI_REUSE_MAX_AGE_DAYS)
+            candidates = await self.search_videos(externalId=external_id, createdAfter=cutoff)
+        except Exception as e:
+            logger.warning(f"Lookup of indexed video {external_id} failed, uploading instead: {e}")
+            return None
+        return _pick_reusable(candidates, external_id)
+
+    @traced("video_indexer.upload_from_url")
+    async def upload_from_url(self, media_url: str, video_name: str, external_id: Optional[str] = None) -> str:
+        """Lets Video Indexer fetch the video itself via the `videoUrl` parameter."""
+        await self._refresh_token()
+        api_url, params = self.service._upload_request(video_name, external_id, videoUrl=media_url)
+
+        logger.info(f"Submitting video URL for {video_name} to Azure...")
+        attempts = _UploadAttempts(external_id)
+
+        async def send() -> str:
+            if attempts.uncertain:
+                existing_id = attempts.created(await self.find_indexed_video(external_id, attempts.created_after))
+                if existing_id:
+                    return existing_id
+            try:
+                async with async_stage_slot("upload"):
+                    response = await self.client.post(api_url, params=params, timeout=300.0)
+            except httpx.TransportError as e:
+                attempts.failed(e)
+                raise
+            return attempts.result(response)
+
+        return await acall_with_retry("vi:upload", send, retry_if=attempts.retry_if)
+
+    @traced("video_indexer.ingest")
+    async def ingest(self, url: str, video_name: str, external_id: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+        """See VideoIndexerService.ingest; the same VI_REUSE_INDEXED / VI_UPLOAD_MODE rules apply."""
+        mode = settings.VI_UPLOAD_MODE.lower()
+        source: Dict[str, Any] = {}
+
+        if external_id and settings.VI_REUSE_INDEXED:
+            existing_id = await self.find_indexed_video(external_id)
+            if existing_id:
+                logger.info(f"Reusing Video Indexer entry {existing_id} for {external_id}")
+                try:
+                    source = await asyncio.to_thread(self.service.resolve_source, url)
+                except Exception as e:
+                    logger.warning(f"Could not resolve metadata of {url}: {e}")
+                return existing_id, source
+
+        if mode in ("url", "stream"):
+            try:
+                source = await asyncio.to_thread(self.service.resolve_source, url)
+                if mode == "url" and not self.service._url_mode_blocked(source, video_name):
+                    return await self.upload_from_url(source["media_url"], video_name, external_id), source
+                return await asyncio.to_thread(self.service.upload_stream, source, video_name, external_id), source
+            except Exception as e:
+                logger.warning(f"{mode} upload failed for {video_name}, falling back to temp file: {e}")
+
+        return await asyncio.to_thread(self.service.ingest_via_temp_file, url, video_name, external_id), source
+
+    @traced("video_indexer.wait_for_processing")
+    async def wait_for_processing(self, video_id: str) -> dict:
+        """See VideoIndexerService.wait_for_processing; sleeps with asyncio instead of blocking."""
+        logger.info(f"Waiting for video {video_id} to process...")
+
+        url = self.service._index_url(video_id)
+        waiter = _async_completion_event(video_id) if settings.AZURE_VI_CALLBACK_URL else None
+        completion = waiter[1] if waiter else None
+        started_at = time.monotonic()
+        deadline = started_at + settings.VI_PROCESSING_TIMEOUT_SECONDS
+        attempt = 0
+        state = None
+        token_refreshed = False
+
+        try:
+            while True:
+                await self._refresh_token()
+                response = await self._request("Azure Video Index", "GET", url, params=self.service._index_params())
+                data = _read_index(response, video_id)
+                if data is None:
+                    if token_refreshed:
+                        raise Exception(f"Azure Video Index unauthorized for {video_id} after a token refresh: {response.text}")
+                    logger.warning("Video Indexer rejected the account token (401), refreshing it")
+                    self.service.tokens.invalidate_vi_token()
+                    token_refreshed = True
+                    continue
+                token_refreshed = False
+
+                state = data.get("state")
+                if state == "Processed":
+                    logger.info(f"Video {video_id} processing complete.")
+                    return data
+                _check_failed_state(state)
+
+                now = time.monotonic()
+                if now >= deadline:
+                    raise TimeoutError(
+                        f"Video {video_id} not processed after {settings.VI_PROCESSING_TIMEOUT_SECONDS:.0f}s (state: {state})"
+                    )
+
+                progress = _parse_progress(data)
+                interval = min(next_poll_interval(attempt, progress, now - started_at), deadline - now)
+                logger.info(f"Status: {state} ({progress if progress is not None else '?'}%)... waiting {interval:.0f}s")
+
+                if completion is not None:
+                    # Returns early when the callback endpoint fires
+                    try:
+                        await asyncio.wait_for(completion.wait(), interval)
+                        completion.clear()
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await asyncio.sleep(interval)
+                attempt += 1
+
+        finally:
+            record_polls(attempt + 1, state or "unknown")
+            if waiter is not None:
+                _remove_waiter(_async_completion_events, video_id, waiter)
+
+    def extract_data(self, vi_json: dict) -> dict:
+        return self.service.extract_data(vi_json)
+
+
+def _compact_insight(insight: Dict[str, Any]) -> Dict[str, Any]:
+    """Label, named location, audio effect... reduced to name, best confidence and time ranges."""
+    instances = insight.get("instances") or []
+    confidences = [c for c in [insight.get("confidence")] + [i.get("confidence") for i in instances] if c is not None]
+    return {
+        "name": insight.get("name") or insight.get("type") or insight.get("text") or "",
+        "confidence": max(confidences) if confidences else None,
+        "instances": [[i.get("start"), i.get("end")] for i in instances]
+    }
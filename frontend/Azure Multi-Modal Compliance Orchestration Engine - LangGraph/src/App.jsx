@@ -101,7 +101,7 @@ export default function App() {
 
     try {
       // Assuming backend is running on localhost:8000
-      const response = await fetch('http://localhost:8000/audit', {
+      const response = await fetch('http://localhost:8000/audits', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -114,15 +114,49 @@ export default function App() {
         throw new Error(errorData.detail || `Server Error: ${response.status}`);
       }
 
-      const result = await response.json();
-      setData(result);
+      const job = await response.json();
+      setData({
+        session_id: job.job_id,
+        video_id: '',
+        status: 'RUNNING',
+        final_report: 'Audit in progress...',
+        compliance_results: [],
+        errors: []
+      });
+
+      // Violations are pushed as soon as the auditor parses them, the full result follows on completion
+      const events = new EventSource(`http://localhost:8000/audits/${job.job_id}/events`);
+      events.addEventListener('violation', (event) => {
+        const { issue } = JSON.parse(event.data);
+        setData((current) => ({ ...current, compliance_results: [...current.compliance_results, issue] }));
+      });
+      events.addEventListener('completed', async () => {
+        events.close();
+        try {
+          const finished = await fetch(`http://localhost:8000/audits/${job.job_id}`).then((res) => res.json());
+          setData(finished.result);
+        } catch (err) {
+          setError(err.message);
+        } finally {
+          setLoading(false);
+        }
+      });
+      events.addEventListener('failed', (event) => {
+        events.close();
+        setError(JSON.parse(event.data).error || 'Audit failed');
+        setLoading(false);
+      });
+      events.onerror = () => {
+        events.close();
+        setError('Lost connection to the audit event stream.');
+        setLoading(false);
+      };
     } catch (err) {
       console.error(err);
       setError(err.message === 'Failed to fetch' 
         ? 'Could not connect to backend. Is it running on port 8000 with CORS enabled?' 
         : err.message
       );
-    } finally {
       setLoading(false);
     }
   };
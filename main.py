@@ -6,16 +6,26 @@ Orchestrates the video compliance audit workflow:
 2. Processes through Azure Video Indexer
 3. Analyzes content for hate speech violations (Indian context)
 4. Generates compliance report
+
+Usage:
+    python main.py --url https://youtu.be/<id>
+    python main.py --batch urls.txt [--output results.jsonl]   # one URL or {"video_url": ...} per line
 """
 
+import sys
 import uuid
 import json
+import argparse
 import logging
 
 from dotenv import load_dotenv
 load_dotenv(override=True)
 
-from backend.src.graph.workflow import app
+from backend.src.graph.workflow import create_graph
+from backend.src.graph.checkpointer import get_checkpointer, build_run_config
+from backend.src.api.jobs import ResumeError, resume_point
+from backend.src.api.batch import read_url_lines, iter_batch_jsonl
+from backend.src.config.settings import settings
 
 logging.basicConfig(
     level=logging.INFO,
@@ -23,19 +33,32 @@ logging.basicConfig(
 )
 logger = logging.getLogger("compliance-engine")
 
+# Checkpointed per session, so a failed run can be picked up with --resume
+app = create_graph(checkpointer=get_checkpointer())
+
 
-def run_audit():
+def run_audit(video_url: str, resume_session: str = None):
     """
     Runs a video compliance audit for hate speech detection.
+    With `resume_session`, continues that session from its checkpoints instead.
     """
     
     # Generate unique session ID
-    session_id = str(uuid.uuid4())
-    logger.info(f"Starting Audit Session: {session_id}")
+    session_id = resume_session or str(uuid.uuid4())
+    logger.info(f"{'Resuming' if resume_session else 'Starting'} Audit Session: {session_id}")
+
+    run_config = None
+    if resume_session:
+        try:
+            run_config = resume_point(app, session_id)
+        except ResumeError as e:
+            logger.error(f"Cannot resume audit session {session_id}: {e}")
+            sys.exit(1)
+        video_url = app.get_state(run_config).values.get("video_url", video_url)
 
     # Initial state for the workflow
     initial_state = {
-        "video_url": "https://youtu.be/YOUR_VIDEO_ID",  # Replace with actual URL
+        "video_url": video_url,
         "video_id": f"vid_{session_id[:8]}",
         "compliance_results": [],
         "errors": []
@@ -50,7 +73,10 @@ def run_audit():
 
     try:
         # Execute the LangGraph workflow
-        final_state = app.invoke(initial_state)
+        if run_config:
+            final_state = app.invoke(None, run_config)
+        else:
+            final_state = app.invoke(initial_state, build_run_config(session_id))
         
         print("\n" + "=" * 60)
         print("COMPLIANCE AUDIT REPORT")
@@ -100,5 +126,35 @@ def run_audit():
         raise
 
 
+def run_batch(batch_path: str, output_path: str = None, max_parallel: int = settings.BATCH_MAX_PARALLEL):
+    """
+    Audits every URL in `batch_path` and writes one JSON line per video as each audit finishes.
+    Failed items are written as ERROR records, the batch keeps going.
+    """
+    with open(batch_path, "r", encoding="utf-8") as f:
+        urls = read_url_lines(f)
+    logger.info(f"Starting Batch Audit: {len(urls)} URLs from {batch_path}")
+
+    output = open(output_path, "w", encoding="utf-8") if output_path else sys.stdout
+    try:
+        for line in iter_batch_jsonl(app, urls, max_parallel):
+            output.write(line)
+            output.flush()
+    finally:
+        if output_path:
+            output.close()
+
+
 if __name__ == "__main__":
-    run_audit()
+    parser = argparse.ArgumentParser(description="Hate Speech Detection Engine")
+    parser.add_argument("--url", default="https://youtu.be/YOUR_VIDEO_ID", help="Audit a single video URL")
+    parser.add_argument("--batch", help="File with one URL (or JSONL {\"video_url\": ...}) per line")
+    parser.add_argument("--output", help="JSONL output file for --batch (default: stdout)")
+    parser.add_argument("--parallel", type=int, default=settings.BATCH_MAX_PARALLEL, help="Audits in flight for --batch")
+    parser.add_argument("--resume", help="Resume the audit session with this ID from its checkpoints")
+    args = parser.parse_args()
+
+    if args.batch:
+        run_batch(args.batch, args.output, args.parallel)
+    else:
+        run_audit(args.url, resume_session=args.resume)
@@ -0,0 +1,74 @@
+"""
+Shared fixtures. The Azure services are replaced by the benchmark stand-ins
+(backend/scripts/benchmark_fakes.py), so the suite runs offline and without credentials.
+"""
+
+import os
+import json
+import uuid
+import tempfile
+from typing import Any, Callable, Dict, Tuple
+
+import pytest
+
+# Test defaults, applied before the settings are imported (as in benchmark_pipeline)
+_work_dir = tempfile.mkdtemp(prefix="speechguard-tests-")
+for _name, _value in {
+    "AUDIT_OUTPUT_MODE": "text",
+    "CACHE_BACKEND": "none",
+    "EMBEDDING_CACHE_ENABLED": "false",
+    "TELEMETRY_EXPORTER": "none",
+    "CHECKPOINT_BACKEND": "sqlite",
+    "CHECKPOINT_SQLITE_PATH": os.path.join(_work_dir, "checkpoints.db"),
+    "VI_POLL_MIN_INTERVAL_SECONDS": "0.2",
+    "VI_POLL_MAX_INTERVAL_SECONDS": "0.5",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+from backend.src.config.settings import settings
+from backend.src.api.jobs import build_initial_state
+from backend.src.graph.workflow import create_graph
+from backend.src.graph.checkpointer import get_checkpointer, build_run_config
+from backend.scripts.benchmark_fakes import (FakeChatModel, FakeVideoIndexerServer, HashEmbeddings,
+                                             build_rule_store, install_fakes, synthesize_index_json)
+
+# .env (loaded by the settings) may turn LangSmith tracing on, which would leave the machine
+os.environ["LANGCHAIN_TRACING_V2"] = "false"
+os.environ["LANGSMITH_TRACING"] = "false"
+
+
+@pytest.fixture(scope="session")
+def samples():
+    with open(os.path.join(settings.DATA_FOLDER_PATH, "prefilter_samples.jsonl"), "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+@pytest.fixture(scope="session")
+def chat_model(samples) -> FakeChatModel:
+    """Auditor stand-in flagging the samples labelled harmful, without latency."""
+    return FakeChatModel(latency_seconds=0.0, output_tokens=50,
+                         flag_phrases=[sample["text"] for sample in samples if sample["label"] == 1])
+
+
+@pytest.fixture(scope="session")
+def fake_azure(samples, chat_model):
+    """Fake Video Indexer, chat model, embeddings and rule index, installed for the whole session."""
+    server = FakeVideoIndexerServer(synthesize_index_json(samples), processing_seconds=0.3, media_bytes=64 * 1024).start()
+    embedding = HashEmbeddings()
+    install_fakes(server, chat_model, embedding, build_rule_store(embedding, os.path.join(_work_dir, "rules"), 40))
+    yield server
+    server.stop()
+
+
+@pytest.fixture(scope="session")
+def graph(fake_azure):
+    return create_graph(checkpointer=get_checkpointer())
+
+
+@pytest.fixture
+def run_audit(graph) -> Callable[[str], Tuple[str, Dict[str, Any]]]:
+    """Audits a video URL end to end in a new session; returns (session id, final state)."""
+    def run(video_url: str) -> Tuple[str, Dict[str, Any]]:
+        session_id = str(uuid.uuid4())
+        return session_id, graph.invoke(build_initial_state(video_url, session_id), build_run_config(session_id))
+    return run
@@ -0,0 +1,51 @@
+from backend.src.api.batch import dedupe_urls, read_url_lines
+
+
+def test_read_url_lines_accepts_plain_and_jsonl_lines():
+    lines = [
+        "https://youtu.be/aaaaaaaaaaa\n",
+        "\n",
+        "# a comment\n",
+        '{"video_url": "https://www.youtube.com/watch?v=bbbbbbbbbbb", "note": "jsonl"}\n',
+        "   https://youtu.be/ccccccccccc   \n",
+    ]
+    assert read_url_lines(lines) == [
+        "https://youtu.be/aaaaaaaaaaa",
+        "https://www.youtube.com/watch?v=bbbbbbbbbbb",
+        "https://youtu.be/ccccccccccc",
+    ]
+
+
+def test_read_url_lines_skips_malformed_and_empty_records(caplog):
+    lines = [
+        '{"video_url": "https://youtu.be/aaaaaaaaaaa"',  # Unterminated
+        '{"title": "no url"}',
+        '{"video_url": ""}',
+        "https://youtu.be/bbbbbbbbbbb",
+    ]
+    assert read_url_lines(lines) == ["https://youtu.be/bbbbbbbbbbb"]
+    assert "malformed batch line 1" in caplog.text
+
+
+def test_dedupe_urls_by_youtube_id():
+    urls = [
+        "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+        "https://youtu.be/aaaaaaaaaaa",
+        "https://www.youtube.com/shorts/aaaaaaaaaaa",
+        "https://youtu.be/bbbbbbbbbbb",
+    ]
+    unique, duplicates = dedupe_urls(urls)
+
+    assert unique == ["https://www.youtube.com/watch?v=aaaaaaaaaaa", "https://youtu.be/bbbbbbbbbbb"]
+    assert duplicates == {
+        "https://youtu.be/aaaaaaaaaaa": "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+        "https://www.youtube.com/shorts/aaaaaaaaaaa": "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+    }
+
+
+def test_dedupe_urls_compares_other_urls_verbatim():
+    urls = ["https://example.com/video.mp4", "https://example.com/video.mp4", "https://example.com/other.mp4"]
+    unique, duplicates = dedupe_urls(urls)
+
+    assert unique == ["https://example.com/video.mp4", "https://example.com/other.mp4"]
+    assert duplicates == {"https://example.com/video.mp4": "https://example.com/video.mp4"}
@@ -0,0 +1,32 @@
+import asyncio
+import uuid
+
+from backend.src.api.jobs import build_initial_state
+from backend.src.graph.workflow import create_graph
+from backend.src.graph.checkpointer import build_run_config
+
+
+def _flagged(final_state) -> set:
+    return {issue.get("flagged_text") for issue in final_state.get("compliance_results", [])}
+
+
+def test_audit_flags_the_harmful_samples(run_audit, chat_model):
+    _, final_state = run_audit("https://youtu.be/graphtest01")
+
+    assert not final_state.get("errors")
+    assert final_state["azure_video_id"]
+    assert final_state["transcript"]
+    assert final_state["final_report_status"] == "FAIL"
+    assert _flagged(final_state) & set(chat_model.flag_phrases)
+
+
+def test_async_audit_matches_the_sync_one(fake_azure, chat_model):
+    graph = create_graph()
+    session_id = str(uuid.uuid4())
+
+    final_state = asyncio.run(graph.ainvoke(build_initial_state("https://youtu.be/graphtest02", session_id),
+                                            build_run_config(session_id)))
+
+    assert not final_state.get("errors")
+    assert final_state["final_report_status"] == "FAIL"
+    assert _flagged(final_state) & set(chat_model.flag_phrases)
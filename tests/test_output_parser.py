@@ -0,0 +1,58 @@
+import json
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from backend.src.config.settings import settings
+from backend.src.graph.nodes import _read_audit_result
+from backend.src.graph.output_parser import AuditParseError, parse_audit_json, validate_audit_result
+
+ISSUE = {"category": "Hate Speech", "description": "Targets a community", "severity": "HIGH", "flagged_text": "sample"}
+ANSWER = json.dumps({"compliance_results": [ISSUE], "status": "FAIL", "final_report": "One violation."})
+
+
+def test_parse_audit_json_strict_and_fenced():
+    assert parse_audit_json(ANSWER) == (json.loads(ANSWER), True)
+    assert parse_audit_json(f"Here is the audit:\n```json\n{ANSWER}\n```\nLet me know.") == (json.loads(ANSWER), True)
+    assert parse_audit_json(f"{ANSWER}\nThe video needs review.") == (json.loads(ANSWER), True)
+
+
+def test_parse_audit_json_closes_a_truncated_answer():
+    data, complete = parse_audit_json(ANSWER[:ANSWER.index('"final_report"') + 25])
+
+    assert not complete
+    assert data["compliance_results"] == [ISSUE]
+
+
+def test_parse_audit_json_without_json():
+    with pytest.raises(AuditParseError):
+        parse_audit_json("I can't audit this video.")
+
+
+def test_validate_audit_result_infers_the_status():
+    assert validate_audit_result({"compliance_results": [ISSUE]})["status"] == "FAIL"
+    assert validate_audit_result({"compliance_results": [{}], "status": "unsure"}) == \
+        {"compliance_results": [], "status": "PASS", "final_report": ""}
+
+
+def test_broken_answer_is_repaired(fake_azure):
+    audit_data, repairs = _read_audit_result(AIMessage(content="The audit: {\"compliance_results\": [oops"), "full")
+
+    # The repair call goes to the (fake) auditor, whose answer is complete
+    assert repairs == 1
+    assert audit_data["status"] in ("PASS", "FAIL")
+    assert audit_data["final_report"].startswith("reviewed")
+
+
+def test_truncated_answer_is_salvaged_when_repairs_are_off(fake_azure, monkeypatch):
+    monkeypatch.setattr(settings, "AUDIT_REPAIR_RETRIES", 0)
+    audit_data, repairs = _read_audit_result(AIMessage(content=ANSWER[:-30]), "full")
+
+    assert repairs == 0
+    assert audit_data["compliance_results"] == [ISSUE]
+
+
+def test_unrecoverable_answer_raises_when_repairs_are_off(fake_azure, monkeypatch):
+    monkeypatch.setattr(settings, "AUDIT_REPAIR_RETRIES", 0)
+    with pytest.raises(AuditParseError):
+        _read_audit_result(AIMessage(content="no JSON here"), "full")
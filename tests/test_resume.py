@@ -0,0 +1,27 @@
+import pytest
+
+from backend.src.api.jobs import ResumeError, resume_point
+from backend.src.graph.workflow import create_graph
+
+
+def test_finished_audit_resumes_at_the_audit_branches(graph, run_audit):
+    session_id, first_run = run_audit("https://youtu.be/resumetst01")
+
+    config = resume_point(graph, session_id)
+    snapshot = graph.get_state(config)
+    assert "transcript_auditor" in snapshot.next
+    # Indexing isn't repeated, the fork starts from the recorded transcript
+    assert snapshot.values["azure_video_id"] == first_run["azure_video_id"]
+
+    resumed = graph.invoke(None, config)
+    assert resumed["final_report_status"] == first_run["final_report_status"]
+
+
+def test_resume_of_an_unknown_session_fails(graph):
+    with pytest.raises(ResumeError, match="No checkpoints"):
+        resume_point(graph, "no-such-session")
+
+
+def test_resume_needs_a_checkpointer(fake_azure):
+    with pytest.raises(ResumeError, match="Checkpointing is disabled"):
+        resume_point(create_graph(checkpointer=None), "any-session")